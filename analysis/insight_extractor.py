@@ -7,11 +7,12 @@ import os
 import logging
 import json
 from datetime import datetime
-import requests
 from typing import Dict, Any, List, Optional, Tuple, Set
 import networkx as nx
-import config
+from llm_client import get_client, MalformedResponse
+from llm_schemas import FINDINGS
 from knowledge_graph.graph_query import GraphQueryManager
+from knowledge_graph.query_registry import QUERIES
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
@@ -33,7 +34,7 @@ class InsightExtractor:
         """
         self.neo4j_manager = neo4j_manager
         self.graph_query = GraphQueryManager(neo4j_manager)
-        self.model_config = config.MODELS['reasoning']
+        self.llm = get_client()
         
         # Create output directory for insights
         self.output_dir = os.path.join("data", "knowledge_base", "insights")
@@ -70,29 +71,31 @@ class InsightExtractor:
         
         # Apply different insight extraction methods
         try:
-            # General graph analysis
-            graph_metrics = self._analyze_graph_structure(entity_name)
-            insights["metrics"] = graph_metrics
-            
-            # Pattern detection
-            patterns = self._detect_patterns(entity_name)
-            insights["patterns"] = patterns
-            
-            # Trend analysis
-            trends = self._analyze_trends(entity_name)
-            insights["trends"] = trends
-            
-            # Correlation analysis
-            correlations = self._find_correlations(entity_name)
-            insights["correlations"] = correlations
-            
-            # Anomaly detection
-            anomalies = self._detect_anomalies(entity_name)
-            insights["anomalies"] = anomalies
-            
-            # Network analysis
-            network_insights = self._analyze_network(entity_name)
-            insights["networks"] = network_insights
+            # Run the graph queries on one shared session
+            with self.neo4j_manager.unit_of_work(read_only=True):
+                # General graph analysis
+                graph_metrics = self._analyze_graph_structure(entity_name)
+                insights["metrics"] = graph_metrics
+                
+                # Pattern detection
+                patterns = self._detect_patterns(entity_name)
+                insights["patterns"] = patterns
+                
+                # Trend analysis
+                trends = self._analyze_trends(entity_name)
+                insights["trends"] = trends
+                
+                # Correlation analysis
+                correlations = self._find_correlations(entity_name)
+                insights["correlations"] = correlations
+                
+                # Anomaly detection
+                anomalies = self._detect_anomalies(entity_name)
+                insights["anomalies"] = anomalies
+                
+                # Network analysis
+                network_insights = self._analyze_network(entity_name)
+                insights["networks"] = network_insights
             
             # Generate key findings using LLM
             key_findings = self._generate_key_findings(
@@ -124,58 +127,25 @@ class InsightExtractor:
         """
         logger.info("Analyzing graph structure")
         
-        # Query to get basic graph metrics
-        graph_metric_query = """
-        MATCH (n)
-        RETURN 
-            COUNT(n) as node_count, 
-            size([p = ()-[]->() | p]) as relationship_count
-        """
-        
-        # Query to get entity type distribution
-        entity_type_query = """
-        MATCH (n)
-        WITH labels(n) as entity_labels
-        UNWIND entity_labels as label
-        RETURN label, COUNT(*) as count
-        ORDER BY count DESC
-        """
-        
-        # Query to get relationship type distribution
-        relationship_type_query = """
-        MATCH ()-[r]->()
-        WITH type(r) as rel_type
-        RETURN rel_type, COUNT(*) as count
-        ORDER BY count DESC
-        """
-        
-        # Execute queries
-        graph_metrics = self.neo4j_manager.execute_query(graph_metric_query)
-        entity_types = self.neo4j_manager.execute_query(entity_type_query)
-        relationship_types = self.neo4j_manager.execute_query(relationship_type_query)
-        
-        # Calculate graph density if we have nodes and relationships
-        density = 0
-        if graph_metrics and len(graph_metrics) > 0:
-            node_count = graph_metrics[0]['node_count']
-            rel_count = graph_metrics[0]['relationship_count']
-            if node_count > 1:
-                density = rel_count / (node_count * (node_count - 1))
+        # Graph-wide counts come from the cached statistics snapshot, read
+        # from the count store and reused until the graph changes
+        statistics = self.neo4j_manager.statistics
+        snapshot = statistics.snapshot()
         
         # If entity_name is provided, get entity-specific metrics
         entity_specific = {}
         if entity_name:
-            entity_query = f"""
-            MATCH (e {{name: $entity_name}})-[r]-(connected)
+            entity_query = QUERIES.named("entity_network_metrics", """
+            MATCH (e {name: $entity_name})-[r]-(connected)
             WITH e, connected, r, type(r) as rel_type
             RETURN 
                 COUNT(DISTINCT connected) as connection_count,
                 COUNT(r) as relationship_count,
                 COLLECT(DISTINCT rel_type) as relationship_types,
                 size([p = (e)-[*1..2]-(indirect) | p]) as extended_network_size
-            """
+            """)
             
-            entity_metrics = self.neo4j_manager.execute_query(
+            entity_metrics = self.neo4j_manager.execute_read(
                 entity_query, {"entity_name": entity_name})
             
             if entity_metrics and len(entity_metrics) > 0:
@@ -184,12 +154,12 @@ class InsightExtractor:
         # Compile results
         return {
             "overall": {
-                "node_count": graph_metrics[0]['node_count'] if graph_metrics else 0,
-                "relationship_count": graph_metrics[0]['relationship_count'] if graph_metrics else 0,
-                "density": density,
+                "node_count": snapshot["node_count"],
+                "relationship_count": snapshot["relationship_count"],
+                "density": snapshot["density"],
             },
-            "entity_distribution": entity_types,
-            "relationship_distribution": relationship_types,
+            "entity_distribution": statistics.label_histogram(),
+            "relationship_distribution": statistics.relationship_type_histogram(),
             "entity_specific": entity_specific
         }
     
@@ -208,7 +178,7 @@ class InsightExtractor:
         patterns = []
         
         # Pattern 1: Common entity relationships (frequent relationship paths)
-        path_query = """
+        path_query = QUERIES.named("relationship_chains", """
         MATCH path = (a)-[r1]->(b)-[r2]->(c)
         WHERE type(r1) <> type(r2)
         WITH type(r1) as type1, type(r2) as type2, COUNT(path) as frequency
@@ -216,20 +186,20 @@ class InsightExtractor:
         RETURN type1, type2, frequency
         ORDER BY frequency DESC
         LIMIT 5
-        """
+        """)
         
         # If entity name is provided, focus on that entity
         if entity_name:
-            path_query = """
+            path_query = QUERIES.named("entity_relationship_chains", """
             MATCH path = (a {name: $entity_name})-[r1]->(b)-[r2]->(c)
             WITH type(r1) as type1, type(r2) as type2, COUNT(path) as frequency
             WHERE frequency > 1
             RETURN type1, type2, frequency
             ORDER BY frequency DESC
             LIMIT 5
-            """
+            """)
         
-        relationship_patterns = self.neo4j_manager.execute_query(
+        relationship_patterns = self.neo4j_manager.execute_read(
             path_query, {"entity_name": entity_name} if entity_name else {})
         
         if relationship_patterns:
@@ -247,16 +217,16 @@ class InsightExtractor:
         
         # Pattern 2: Common attribute combinations
         # (entities that frequently share the same set of attributes)
-        attribute_query = """
+        attribute_query = QUERIES.named("attribute_combinations", """
         MATCH (e:Entity)
         WITH keys(e) as attributes, COUNT(*) as entity_count
         WHERE entity_count > 1 AND size(attributes) > 3
         RETURN attributes, entity_count
         ORDER BY entity_count DESC
         LIMIT 5
-        """
+        """)
         
-        attribute_patterns = self.neo4j_manager.execute_query(attribute_query)
+        attribute_patterns = self.neo4j_manager.execute_read(attribute_query)
         
         if attribute_patterns:
             patterns.append({
@@ -268,7 +238,7 @@ class InsightExtractor:
             })
         
         # Pattern 3: Cyclical relationships (entities forming loops)
-        cycle_query = """
+        cycle_query = QUERIES.named("relationship_cycles", """
         MATCH path = (a)-[r1]->(b)-[r2]->(c)-[r3]->(a)
         WHERE elementId(a) < elementId(b) AND elementId(b) < elementId(c) // Avoid duplicates
         WITH a.name as node1, b.name as node2, c.name as node3, 
@@ -277,9 +247,9 @@ class InsightExtractor:
         RETURN node1, node2, node3, rel1, rel2, rel3, cycle_count
         ORDER BY cycle_count DESC
         LIMIT 5
-        """
+        """)
         
-        cycle_patterns = self.neo4j_manager.execute_query(cycle_query)
+        cycle_patterns = self.neo4j_manager.execute_read(cycle_query)
         
         if cycle_patterns:
             patterns.append({
@@ -314,7 +284,7 @@ class InsightExtractor:
         trends = []
         
         # Trend 1: Metric changes over time
-        metric_trend_query = """
+        metric_trend_query = QUERIES.named("metric_trends", """
         MATCH (e:Entity)-[:HAS_METRIC]->(m:Metric)
         WHERE m.timestamp IS NOT NULL
         WITH e.name as entity, m.name as metric, m.value as value, m.timestamp as timestamp
@@ -323,10 +293,10 @@ class InsightExtractor:
         WHERE size(values) > 1
         RETURN entity, metric, values
         LIMIT 10
-        """
+        """)
         
         if entity_name:
-            metric_trend_query = """
+            metric_trend_query = QUERIES.named("entity_metric_trends", """
             MATCH (e:Entity {name: $entity_name})-[:HAS_METRIC]->(m:Metric)
             WHERE m.timestamp IS NOT NULL
             WITH e.name as entity, m.name as metric, m.value as value, m.timestamp as timestamp
@@ -334,9 +304,9 @@ class InsightExtractor:
             WITH entity, metric, COLLECT({value: value, timestamp: timestamp}) as values
             WHERE size(values) > 1
             RETURN entity, metric, values
-            """
+            """)
         
-        metric_trends = self.neo4j_manager.execute_query(
+        metric_trends = self.neo4j_manager.execute_read(
             metric_trend_query, {"entity_name": entity_name} if entity_name else {})
         
         # Process metric trends to determine direction and significance
@@ -376,7 +346,7 @@ class InsightExtractor:
                 continue
         
         # Trend 2: Relationship growth patterns
-        relationship_trend_query = """
+        relationship_trend_query = QUERIES.named("relationship_growth", """
         MATCH (e1)-[r]->(e2)
         WHERE r.timestamp IS NOT NULL
         WITH type(r) as relationship_type, COUNT(r) as rel_count, 
@@ -384,9 +354,9 @@ class InsightExtractor:
         RETURN relationship_type, rel_count, first_occurrence, last_occurrence
         ORDER BY rel_count DESC
         LIMIT 5
-        """
+        """)
         
-        relationship_trends = self.neo4j_manager.execute_query(relationship_trend_query)
+        relationship_trends = self.neo4j_manager.execute_read(relationship_trend_query)
         
         for trend in relationship_trends:
             if "first_occurrence" not in trend or "last_occurrence" not in trend:
@@ -416,29 +386,29 @@ class InsightExtractor:
                 continue
         
         # Trend 3: Entity importance evolution
-        entity_evolution_query = """
+        entity_evolution_query = QUERIES.named("entity_evolution", """
         MATCH (e:Entity)
         WHERE e.created_at IS NOT NULL OR e.mentioned_dates IS NOT NULL
         WITH e, 
             CASE WHEN e.created_at IS NOT NULL THEN e.created_at ELSE null END as created_at,
             CASE WHEN e.mentioned_dates IS NOT NULL THEN e.mentioned_dates ELSE [] END as mentioned_dates,
-            COUNT {(e)--()} as connection_count
+            coalesce(e.degree, 0) as connection_count
         RETURN e.name as entity, created_at, mentioned_dates, connection_count
         ORDER BY connection_count DESC
         LIMIT 10
-        """
+        """)
         
         if entity_name:
             # For a specific entity, look at its connections over time instead
-            entity_evolution_query = """
+            entity_evolution_query = QUERIES.named("entity_connection_timeline", """
             MATCH (e:Entity {name: $entity_name})-[r]-(connected)
             WHERE r.timestamp IS NOT NULL
             WITH connected.name as connected_entity, r.timestamp as connection_time
             ORDER BY connection_time
             RETURN connected_entity, connection_time
-            """
+            """)
         
-        entity_evolution = self.neo4j_manager.execute_query(
+        entity_evolution = self.neo4j_manager.execute_read(
             entity_evolution_query, {"entity_name": entity_name} if entity_name else {})
         
         if entity_name and entity_evolution:
@@ -471,7 +441,7 @@ class InsightExtractor:
         correlations = []
         
         # Correlation 1: Entity metrics that move together
-        metric_correlation_query = """
+        metric_correlation_query = QUERIES.named("metric_correlations", """
         MATCH (e1:Entity)-[:HAS_METRIC]->(m1:Metric)
         MATCH (e2:Entity)-[:HAS_METRIC]->(m2:Metric)
         WHERE e1 <> e2 AND m1.name = m2.name 
@@ -484,10 +454,10 @@ class InsightExtractor:
         WHERE size(value_pairs) > 2
         RETURN entity1, entity2, metric, value_pairs
         LIMIT 5
-        """
+        """)
         
         if entity_name:
-            metric_correlation_query = """
+            metric_correlation_query = QUERIES.named("entity_metric_correlations", """
             MATCH (e1:Entity {name: $entity_name})-[:HAS_METRIC]->(m1:Metric)
             MATCH (e2:Entity)-[:HAS_METRIC]->(m2:Metric)
             WHERE e1 <> e2 AND m1.name = m2.name 
@@ -499,9 +469,9 @@ class InsightExtractor:
             WITH entity1, entity2, metric, COLLECT({v1: value1, v2: value2}) as value_pairs
             WHERE size(value_pairs) > 2
             RETURN entity1, entity2, metric, value_pairs
-            """
+            """)
         
-        metric_correlations = self.neo4j_manager.execute_query(
+        metric_correlations = self.neo4j_manager.execute_read(
             metric_correlation_query, {"entity_name": entity_name} if entity_name else {})
         
         # Calculate correlation coefficient and significance
@@ -554,7 +524,7 @@ class InsightExtractor:
                 continue
         
         # Correlation 2: Entities that frequently appear together
-        cooccurrence_query = """
+        cooccurrence_query = QUERIES.named("cooccurrence", """
         MATCH (a)-[r]-(b)
         WHERE a <> b AND (type(r) IN ['COMPETES_WITH', 'PARTNERED_WITH', 'OPERATES_IN'])
         WITH a, b, COUNT(*) as frequency
@@ -562,10 +532,10 @@ class InsightExtractor:
         RETURN a.name as entity1, b.name as entity2, frequency
         ORDER BY frequency DESC
         LIMIT 10
-        """
+        """)
         
         if entity_name:
-            cooccurrence_query = """
+            cooccurrence_query = QUERIES.named("entity_cooccurrence", """
             MATCH (a {name: $entity_name})-[r]-(b)
             WHERE type(r) IN ['COMPETES_WITH', 'PARTNERED_WITH', 'OPERATES_IN']
             WITH a, b, COUNT(*) as frequency
@@ -573,9 +543,9 @@ class InsightExtractor:
             RETURN a.name as entity1, b.name as entity2, frequency
             ORDER BY frequency DESC
             LIMIT 10
-            """
+            """)
         
-        cooccurrence_correlations = self.neo4j_manager.execute_query(
+        cooccurrence_correlations = self.neo4j_manager.execute_read(
             cooccurrence_query, {"entity_name": entity_name} if entity_name else {})
         
         for corr in cooccurrence_correlations:
@@ -604,7 +574,7 @@ class InsightExtractor:
         anomalies = []
     
         # Anomaly 1: Metric outliers (values that deviate significantly from average)
-        metric_outlier_query = """
+        metric_outlier_query = QUERIES.named("metric_outliers", """
         MATCH (e:Entity)-[:HAS_METRIC]->(m:Metric)
         WHERE m.name IS NOT NULL AND m.value IS NOT NULL
         WITH m.name as metric_name, AVG(toFloat(m.value)) as avg_value, 
@@ -617,10 +587,10 @@ class InsightExtractor:
             abs(toFloat(m.value) - avg_value) / std_value as z_score
         ORDER BY z_score DESC
         LIMIT 10
-        """
+        """)
     
         if entity_name:
-            metric_outlier_query = """
+            metric_outlier_query = QUERIES.named("entity_metric_outliers", """
             MATCH (e:Entity {name: $entity_name})-[:HAS_METRIC]->(m:Metric)
             WHERE m.name IS NOT NULL AND m.value IS NOT NULL
             WITH m.name as metric_name, toFloat(m.value) as entity_value
@@ -634,9 +604,9 @@ class InsightExtractor:
                 avg_value, std_value, 
                 abs(entity_value - avg_value) / std_value as z_score
             ORDER BY z_score DESC
-            """
+            """)
     
-        metric_outliers = self.neo4j_manager.execute_query(
+        metric_outliers = self.neo4j_manager.execute_read(
             metric_outlier_query, {"entity_name": entity_name} if entity_name else {})
     
         for outlier in metric_outliers:
@@ -659,37 +629,36 @@ class InsightExtractor:
             })
     
         # Anomaly 2: Structural anomalies (unusually connected or isolated entities)
-        connection_anomaly_query = """
+        connection_anomaly_query = QUERIES.named("connection_anomalies", """
         MATCH (e:Entity)
-        WITH e, COUNT {(e)--()} as connection_count
-        WITH AVG(connection_count) as avg_connections, 
-            STDEV(connection_count) as std_connections
+        WITH AVG(coalesce(e.degree, 0)) as avg_connections, 
+            STDEV(coalesce(e.degree, 0)) as std_connections
         MATCH (e:Entity)
-        WITH e, COUNT {(e)--()} as connection_count, avg_connections, std_connections
+        WITH e, coalesce(e.degree, 0) as connection_count, avg_connections, std_connections
         WHERE abs(connection_count - avg_connections) > 2 * std_connections
         RETURN e.name as entity, connection_count, 
             avg_connections, std_connections,
             abs(connection_count - avg_connections) / std_connections as z_score
         ORDER BY z_score DESC
         LIMIT 10
-        """
+        """)
     
         if entity_name:
-            connection_anomaly_query = """
+            connection_anomaly_query = QUERIES.named("entity_connection_anomalies", """
             MATCH (e:Entity {name: $entity_name})
-            WITH e, COUNT {(e)--()} as entity_connections
+            WITH e, coalesce(e.degree, 0) as entity_connections
             MATCH (other:Entity)
             WHERE other.name <> $entity_name
-            WITH e, entity_connections, other, COUNT {(other)--()} as other_connections
+            WITH e, entity_connections, other, coalesce(other.degree, 0) as other_connections
             WITH e, entity_connections, AVG(other_connections) as avg_connections, 
                 STDEV(other_connections) as std_connections
             WHERE abs(entity_connections - avg_connections) > 1.5 * std_connections AND std_connections > 0
             RETURN e.name as entity, entity_connections as connection_count, 
                 avg_connections, std_connections,
                 abs(entity_connections - avg_connections) / std_connections as z_score
-            """
+            """)
     
-        connection_anomalies = self.neo4j_manager.execute_query(
+        connection_anomalies = self.neo4j_manager.execute_read(
             connection_anomaly_query, {"entity_name": entity_name} if entity_name else {})
     
         for anomaly in connection_anomalies:
@@ -711,7 +680,7 @@ class InsightExtractor:
     
         # Anomaly 3: Temporal anomalies (sudden changes or irregular patterns)
         if entity_name:
-            temporal_anomaly_query = """
+            temporal_anomaly_query = QUERIES.named("entity_metric_series", """
             MATCH (e:Entity {name: $entity_name})-[:HAS_METRIC]->(m:Metric)
             WHERE m.timestamp IS NOT NULL
             WITH m.name as metric, m.value as value, m.timestamp as timestamp
@@ -719,9 +688,9 @@ class InsightExtractor:
             WITH metric, COLLECT({value: value, timestamp: timestamp}) as values
             WHERE size(values) > 3
             RETURN metric, values
-            """
+            """)
         
-            temporal_data = self.neo4j_manager.execute_query(
+            temporal_data = self.neo4j_manager.execute_read(
                 temporal_anomaly_query, {"entity_name": entity_name})
         
             for series in temporal_data:
@@ -806,31 +775,46 @@ class InsightExtractor:
         """
         logger.info("Performing network analysis")
 
+        # Offload to cached GDS projections when the server has the library
+        if self.neo4j_manager.gds_available():
+            try:
+                return self._analyze_network_gds(entity_name)
+            except Exception as e:
+                logger.warning(f"GDS network analysis failed, falling back to NetworkX: {e}")
+
         # Prepare query to get graph data for network analysis
         if entity_name:
             # Focused subgraph for specific entity
-            graph_query = """
+            graph_query = QUERIES.named("entity_network_edges", """
             MATCH path = (e:Entity {name: $name})-[*1..2]-(connected:Entity)
             UNWIND relationships(path) as rel
             WITH DISTINCT startNode(rel) as source, endNode(rel) as target, type(rel) as rel_type
             WHERE source:Entity AND target:Entity
             RETURN source.name as source, target.name as target, rel_type
-            """
+            """)
     
             params = {"name": entity_name}
         else:
             # Full entity graph (limited to a reasonable size)
-            graph_query = """
+            graph_query = QUERIES.named("network_edges", """
             MATCH (source:Entity)-[rel]->(target:Entity)
             RETURN source.name as source, target.name as target, type(rel) as rel_type
             LIMIT 1000
-            """
+            """)
     
             params = {}
 
-        # Execute query with better error handling
+        # Stream edges straight into the NetworkX graph so the raw result set
+        # is never held in memory alongside it
+        G = nx.DiGraph()
         try:
-            relationships = self.neo4j_manager.execute_query(graph_query, params)
+            for rel in self.neo4j_manager.stream_query(graph_query, params):
+                source = rel["source"]
+                target = rel["target"]
+                rel_type = rel["rel_type"]
+        
+                if source and target:  # Make sure both exist
+                    G.add_edge(source, target, type=rel_type)
         except Exception as e:
             logger.error(f"Error retrieving network data: {e}")
             # Return empty results instead of failing
@@ -841,7 +825,7 @@ class InsightExtractor:
             }
     
         # If no relationships found, return empty results
-        if not relationships:
+        if G.number_of_edges() == 0:
             return {
                 "centrality": [],
                 "communities": [],
@@ -849,18 +833,6 @@ class InsightExtractor:
             }
 
         try:
-            # Build NetworkX graph
-            G = nx.DiGraph()
-    
-            # Add edges
-            for rel in relationships:
-                source = rel["source"]
-                target = rel["target"]
-                rel_type = rel["rel_type"]
-        
-                if source and target:  # Make sure both exist
-                    G.add_edge(source, target, type=rel_type)
-    
             # Calculate network metrics
             results = {
                 "graph_size": {
@@ -869,7 +841,8 @@ class InsightExtractor:
                 },
                 "centrality": [],
                 "communities": [],
-                "clusters": []
+                "clusters": [],
+                "engine": "networkx"
             }
     
             # Only proceed if we have nodes
@@ -995,6 +968,101 @@ class InsightExtractor:
                 "clusters": []
             }
     
+    def _analyze_network_gds(self, entity_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Network analysis on cached GDS projections of the Entity graph
+        
+        Centrality and communities are computed server-side, so no edges are
+        pulled into the client. With a focus entity, the candidates are the
+        top entities by PageRank personalized on it, and only communities
+        containing them are reported.
+        
+        Args:
+            entity_name: Optional entity to focus on
+            
+        Returns:
+            dict: Network analysis results, shaped like the NetworkX results
+        """
+        manager = self.neo4j_manager
+        with manager.gds_session() as uow:
+            projection = manager.projections.get(uow, orientation="NATURAL")
+        node_count = projection["nodeCount"]
+        
+        results = {
+            "graph_size": {
+                "nodes": node_count,
+                "edges": projection["relationshipCount"]
+            },
+            "centrality": [],
+            "communities": [],
+            "clusters": [],
+            "engine": "gds"
+        }
+        if projection["relationshipCount"] == 0:
+            return results
+        
+        # L1-scaled PageRank sums to 1, like nx.pagerank
+        pagerank_config = {"maxIterations": 50, "dampingFactor": 0.85, "scaler": "L1Norm"}
+        if entity_name:
+            pagerank_rows = manager.run_graph_analytics(
+                "personalized_pagerank", pagerank_config, source_name=entity_name, limit=50)
+        else:
+            pagerank_rows = manager.run_graph_analytics("pagerank", pagerank_config, limit=50)
+        
+        pagerank_values = {row["entity"]: row["score"] for row in pagerank_rows if row["entity"]}
+        if not pagerank_values:
+            return results
+        names = list(pagerank_values)
+        
+        # Sample betweenness sources on large graphs, as the NetworkX path does
+        betweenness_config = {"samplingSize": 1000} if node_count > 1000 else {}
+        degree_rows = manager.run_graph_analytics("degree", names=names, limit=len(names))
+        betweenness_rows = manager.run_graph_analytics(
+            "centrality", betweenness_config, names=names, limit=len(names))
+        
+        # Normalize to the NetworkX scales: degree over n-1, directed
+        # betweenness over (n-1)(n-2)
+        degree_scale = max(node_count - 1, 1)
+        betweenness_scale = max((node_count - 1) * (node_count - 2), 1)
+        degree_centrality = {row["entity"]: row["score"] / degree_scale for row in degree_rows}
+        betweenness_centrality = {row["entity"]: row["score"] / betweenness_scale
+                                  for row in betweenness_rows}
+        
+        centrality_results = []
+        for node in names:
+            centrality_results.append({
+                "entity": node,
+                "degree_centrality": round(degree_centrality.get(node, 0), 3),
+                "betweenness_centrality": round(betweenness_centrality.get(node, 0), 3),
+                "pagerank": round(pagerank_values.get(node, 0), 3),
+                "overall_importance": round(
+                    degree_centrality.get(node, 0) * 0.3 +
+                    betweenness_centrality.get(node, 0) * 0.3 +
+                    pagerank_values.get(node, 0) * 0.4,
+                    3
+                )
+            })
+        centrality_results.sort(key=lambda x: x["overall_importance"], reverse=True)
+        results["centrality"] = centrality_results[:10]
+        
+        community_rows = manager.run_graph_analytics(
+            "community_detection", names=names if entity_name else None,
+            min_size=2, member_limit=50, limit=10)
+        for i, row in enumerate(community_rows):
+            members = row["entities"]
+            results["communities"].append({
+                "id": i + 1,
+                "size": row["community_size"],
+                "entities": members[:5],
+                "key_entities": sorted(
+                    members,
+                    key=lambda x: pagerank_values.get(x, 0),
+                    reverse=True
+                )[:3]
+            })
+        
+        return results
+    
     def _generate_key_findings(self, entity_name: Optional[str], patterns: List[Dict[str, Any]], 
                               trends: List[Dict[str, Any]], correlations: List[Dict[str, Any]], 
                               anomalies: List[Dict[str, Any]], 
@@ -1122,31 +1190,14 @@ class InsightExtractor:
         # Call the LLM
         try:
             logger.info("Calling LLM for key findings analysis")
-            response = requests.post(
-                self.model_config['endpoint'],
-                json={
-                    "model": self.model_config['name'],
-                    "prompt": prompt,
-                    "stream": False,
-                    **self.model_config['parameters']
-                }
-            )
-            
-            result = response.json()
-            content = result.get('response', '')
-            
-            # Extract the JSON object from response
-            start_idx = content.find('[')
-            end_idx = content.rfind(']') + 1
-            
-            if start_idx >= 0 and end_idx > start_idx:
-                json_str = content[start_idx:end_idx]
-                findings = json.loads(json_str)
-                logger.info(f"Generated {len(findings)} key findings")
-                return findings
-            else:
-                logger.warning("Could not extract JSON from LLM response")
-                return self._generate_fallback_findings(high_significance)
+            # Output is constrained to the findings schema and validated against it
+            findings = self.llm.generate_json(prompt, FINDINGS, task="insight_generation")
+            logger.info(f"Generated {len(findings)} key findings")
+            return findings
+
+        except MalformedResponse as e:
+            logger.warning(f"Unusable LLM response ({e}), using fallback findings")
+            return self._generate_fallback_findings(high_significance)
                 
         except Exception as e:
             logger.error(f"Error in LLM key findings generation: {e}")
@@ -1,15 +1,18 @@
 # analysis/risk_engine.py
-import json
 from typing import Any, Dict
-import requests
 import logging
-from config import MODELS, RISK_THRESHOLDS
+from config import RISK_THRESHOLDS
+from llm_client import get_client, MalformedResponse
+from llm_schemas import RISK
+from knowledge_graph.async_neo4j_manager import run_independent_queries
+from knowledge_graph.query_registry import QUERIES
 
 class RiskAnalyzer:
     """Analyzes knowledge graph to determine business risks."""
     
-    def __init__(self, neo4j_manager):
+    def __init__(self, neo4j_manager, async_manager=None):
         self.kg_manager = neo4j_manager
+        self.async_manager = async_manager
         self.logger = logging.getLogger(__name__)
         self.risk_scores = {
             'financial': 0.0,
@@ -20,29 +23,41 @@ class RiskAnalyzer:
     
     def _get_graph_summary(self):
         """Extract a summary of the knowledge graph for LLM analysis."""
-        # Get key financial indicators
-        financial_risks = self.kg_manager.run_risk_query("financial")
-        
-        # Get operational risks
-        operational_risks = self.kg_manager.run_risk_query("operational")
-        
-        # Get market risks
-        market_risks = self.kg_manager.run_risk_query("market")
-        
-        # Get central entities (most connected nodes)
-        with self.kg_manager.driver.session() as session:
-            central_entities = session.run("""
-                MATCH (e:Entity)
-                WITH e, COUNT {(e)--()} AS connections
-                ORDER BY connections DESC
-                LIMIT 10
-                RETURN e.name AS entity, connections
-            """)
-            central_entities = [record.data() for record in central_entities]
+        # Get financial, operational and market risk indicators plus the
+        # central entities (most connected nodes); the queries are independent
+        central_query = QUERIES.named("central_entities", """
+            MATCH (e:Entity)
+            WHERE e.degree IS NOT NULL
+            RETURN e.name AS entity, e.degree AS connections
+            ORDER BY e.degree DESC
+            LIMIT 10
+        """)
+        queries = [
+            (self.kg_manager.get_risk_query("financial"), None),
+            (self.kg_manager.get_risk_query("operational"), None),
+            (self.kg_manager.get_risk_query("market"), None),
+            (central_query, None)
+        ]
+        financial_risks, operational_risks, market_risks, central_entities = \
+            run_independent_queries(self.kg_manager, queries, self.async_manager)
         
         # Prepare a text summary for the LLM
         summary = []
         
+        # Graph-wide figures from the cached statistics snapshot
+        try:
+            statistics = self.kg_manager.statistics
+            snapshot = statistics.snapshot()
+            summary.append(f"Knowledge graph size: {snapshot['node_count']} nodes, "
+                           f"{snapshot['relationship_count']} relationships")
+            top_types = statistics.relationship_type_histogram()[:5]
+            if top_types:
+                summary.append("Most common relationships: " + ", ".join(
+                    f"{t['rel_type']} ({t['count']})" for t in top_types))
+            summary.append("")
+        except Exception as e:
+            self.logger.warning(f"Graph statistics unavailable: {e}")
+        
         # Add central entities
         summary.append("Key entities in the business:")
         for entity in central_entities:
@@ -73,7 +88,6 @@ class RiskAnalyzer:
     
     def _use_llm_for_risk_analysis(self):
         """Use LLM to analyze the graph for risks."""
-        model_config = MODELS['reasoning']
     
         # Get graph summary for LLM
         graph_summary = self._get_graph_summary()
@@ -106,41 +120,24 @@ class RiskAnalyzer:
         # Call the LLM
         try:
             self.logger.info("Calling LLM for risk analysis")
-            response = requests.post(
-                model_config['endpoint'],
-                json={
-                    "model": model_config['name'],
-                    "prompt": prompt,
-                    "stream": False,
-                    **model_config['parameters']
-                }
-            )
-        
-            result = response.json()
-            content = result.get('response', '')
-        
-            # Find the JSON object in the response
-            start_idx = content.find('{')
-            end_idx = content.rfind('}') + 1
-        
-            if start_idx >= 0 and end_idx > start_idx:
-                json_str = content[start_idx:end_idx]
-                risk_data = json.loads(json_str)
-            
-                # Add detailed logging to understand risk values
-                self.logger.info(f"Raw risk data from LLM: {risk_data}")
-                # Log all risk values explicitly
-                self.logger.info(f"Financial risk: {risk_data.get('financial', 'not set')}")
-                self.logger.info(f"Operational risk: {risk_data.get('operational', 'not set')}")
-                self.logger.info(f"Market risk: {risk_data.get('market', 'not set')}")
-                self.logger.info(f"Overall risk: {risk_data.get('overall', 'not set')}")
-            
-                self.logger.info("Successfully parsed LLM risk analysis")
-                return risk_data
-            else:
-                self.logger.warning("Could not extract JSON from LLM response")
-                # Fallback to rule-based calculation
-                return self._calculate_rule_based_risk()
+            # Output is constrained to the risk schema and validated against it
+            risk_data = get_client().generate_json(prompt, RISK, task="risk_assessment")
+
+            # Add detailed logging to understand risk values
+            self.logger.info(f"Raw risk data from LLM: {risk_data}")
+            # Log all risk values explicitly
+            self.logger.info(f"Financial risk: {risk_data['financial']}")
+            self.logger.info(f"Operational risk: {risk_data['operational']}")
+            self.logger.info(f"Market risk: {risk_data['market']}")
+            self.logger.info(f"Overall risk: {risk_data['overall']}")
+
+            self.logger.info("Successfully parsed LLM risk analysis")
+            return risk_data
+
+        except MalformedResponse as e:
+            self.logger.warning(f"Unusable LLM risk analysis ({e})")
+            # Fallback to rule-based calculation
+            return self._calculate_rule_based_risk()
             
         except Exception as e:
             self.logger.error(f"Error in LLM risk analysis: {e}")
@@ -156,58 +153,44 @@ class RiskAnalyzer:
             financial_risk = 0.4
             operational_risk = 0.5
             market_risk = 0.45
+            
+            # One parameterized query serves all three risk types
+            risk_level_query = QUERIES.named("average_risk_level", """
+                MATCH (e:Entity)-[:HAS_RISK]->(r:Risk)
+                WHERE r.type = $risk_type
+                WITH AVG(r.level) as avg_risk_level
+                RETURN 
+                    CASE WHEN avg_risk_level IS NOT NULL 
+                    THEN avg_risk_level
+                    ELSE $default_level END AS risk_score
+            """)
         
-            with self.kg_manager.driver.session() as session:
-                # Financial risk based on entities with financial risk type
-                try:
-                    financial_result = session.run("""
-                        MATCH (e:Entity)-[:HAS_RISK]->(r:Risk)
-                        WHERE r.type = 'financial'
-                        WITH AVG(r.level) as avg_risk_level
-                        RETURN 
-                            CASE WHEN avg_risk_level IS NOT NULL 
-                            THEN avg_risk_level
-                            ELSE 0.4 END AS risk_score
-                    """)
-                    financial_record = financial_result.single()
-                    if financial_record:
-                        financial_risk = financial_record["risk_score"]
-                except Exception as e:
-                    self.logger.warning(f"Error calculating financial risk: {e}")
+            # Financial risk based on entities with financial risk type
+            try:
+                financial_record = self.kg_manager.execute_read(
+                    risk_level_query, {"risk_type": "financial", "default_level": 0.4})
+                if financial_record:
+                    financial_risk = financial_record[0]["risk_score"]
+            except Exception as e:
+                self.logger.warning(f"Error calculating financial risk: {e}")
         
-                # Operational risk based on operational risk entities
-                try:
-                    operational_result = session.run("""
-                        MATCH (e:Entity)-[:HAS_RISK]->(r:Risk)
-                        WHERE r.type = 'operational'
-                        WITH AVG(r.level) as avg_risk_level
-                        RETURN 
-                            CASE WHEN avg_risk_level IS NOT NULL 
-                            THEN avg_risk_level
-                            ELSE 0.5 END AS risk_score
-                    """)
-                    operational_record = operational_result.single()
-                    if operational_record:
-                        operational_risk = operational_record["risk_score"]
-                except Exception as e:
-                    self.logger.warning(f"Error calculating operational risk: {e}")
+            # Operational risk based on operational risk entities
+            try:
+                operational_record = self.kg_manager.execute_read(
+                    risk_level_query, {"risk_type": "operational", "default_level": 0.5})
+                if operational_record:
+                    operational_risk = operational_record[0]["risk_score"]
+            except Exception as e:
+                self.logger.warning(f"Error calculating operational risk: {e}")
         
-                # Market risk based on market risk entities and trends
-                try:
-                    market_result = session.run("""
-                        MATCH (e:Entity)-[:HAS_RISK]->(r:Risk)
-                        WHERE r.type = 'market'
-                        WITH AVG(r.level) as avg_risk_level
-                        RETURN 
-                            CASE WHEN avg_risk_level IS NOT NULL 
-                            THEN avg_risk_level
-                            ELSE 0.45 END AS risk_score
-                    """)
-                    market_record = market_result.single()
-                    if market_record:
-                        market_risk = market_record["risk_score"]
-                except Exception as e:
-                    self.logger.warning(f"Error calculating market risk: {e}")
+            # Market risk based on market risk entities and trends
+            try:
+                market_record = self.kg_manager.execute_read(
+                    risk_level_query, {"risk_type": "market", "default_level": 0.45})
+                if market_record:
+                    market_risk = market_record[0]["risk_score"]
+            except Exception as e:
+                self.logger.warning(f"Error calculating market risk: {e}")
         
             # Calculate overall risk (weighted average)
             overall_risk = (financial_risk * 0.4 + operational_risk * 0.3 + market_risk * 0.3)
@@ -240,12 +223,12 @@ class RiskAnalyzer:
         """Run complete risk analysis with support for the 30 group assessment structure."""
         # Try to get assessment data from Neo4j
         try:
-            assessment_query = """
+            assessment_query = QUERIES.named("entity_assessments", """
             MATCH (e:Entity)-[:HAS_ASSESSMENT]->(a)
             RETURN e.name as entity, a.name as assessment_name, a.risk_score as risk_score
-            """
+            """)
         
-            assessment_data = self.kg_manager.execute_query(assessment_query)
+            assessment_data = self.kg_manager.execute_read(assessment_query)
         
             if assessment_data and len(assessment_data) > 0:
                 # If we have assessment data, use that for risk analysis
@@ -7,9 +7,9 @@ import os
 import logging
 import json
 from datetime import datetime
-import requests
 from typing import Dict, Any, List, Optional, Tuple
-import config
+from llm_client import get_client, MalformedResponse
+from llm_schemas import STRATEGIES
 from knowledge_graph.graph_query import GraphQueryManager
 
 # Set up logging
@@ -34,7 +34,7 @@ class StrategyGenerator:
         self.neo4j_manager = neo4j_manager
         self.graph_query = GraphQueryManager(neo4j_manager)
         self.risk_analyzer = risk_analyzer
-        self.model_config = config.MODELS['reasoning']
+        self.llm = get_client()
         
         # Create output directory for strategy documents
         self.output_dir = os.path.join("data", "knowledge_base", "strategies")
@@ -148,7 +148,7 @@ class StrategyGenerator:
             MATCH (e:Entity {name: $entity_name})-[:HAS_STRENGTH]->(s:Strength)
             RETURN s.name as name, s.description as description, s.importance as importance
             """
-            strengths = self.neo4j_manager.execute_query(strengths_query, {"entity_name": entity_name})
+            strengths = self.neo4j_manager.execute_read(strengths_query, {"entity_name": entity_name})
             if strengths:
                 entity_info.append("\nKey Strengths:")
                 for strength in strengths:
@@ -165,7 +165,7 @@ class StrategyGenerator:
             RETURN p.name as name, p.description as description, p.revenue as revenue, 
                 p.growth_rate as growth_rate, p.market_share as market_share
             """
-            products = self.neo4j_manager.execute_query(products_query, {"entity_name": entity_name})
+            products = self.neo4j_manager.execute_read(products_query, {"entity_name": entity_name})
             if products:
                 entity_info.append("\nProducts:")
                 for product in products:
@@ -182,7 +182,7 @@ class StrategyGenerator:
             RETURN m.name as name, m.size as size, m.growth_rate as growth_rate, 
                 r.market_position as position, r.years_present as years
             """
-            markets = self.neo4j_manager.execute_query(markets_query, {"entity_name": entity_name})
+            markets = self.neo4j_manager.execute_read(markets_query, {"entity_name": entity_name})
             if markets:
                 entity_info.append("\nMarkets:")
                 for market in markets:
@@ -210,7 +210,7 @@ class StrategyGenerator:
             r.impact_area as impact_area, r.probability as probability
         """
         try:
-            risks = self.neo4j_manager.execute_query(risks_query, {"entity_name": entity_name})
+            risks = self.neo4j_manager.execute_read(risks_query, {"entity_name": entity_name})
             if risks:
                 risk_info.append("\nSpecific Risks:")
                 for risk in risks:
@@ -244,7 +244,7 @@ class StrategyGenerator:
             RETURN c.name as name, c.industry as industry, r.intensity as intensity, 
                 r.overlap_areas as overlap_areas
             """
-            competitors = self.neo4j_manager.execute_query(competitor_query, {"entity_name": entity_name})
+            competitors = self.neo4j_manager.execute_read(competitor_query, {"entity_name": entity_name})
             if competitors:
                 opportunity_info.append("\nCompetitive Landscape:")
                 for competitor in competitors:
@@ -312,60 +312,26 @@ class StrategyGenerator:
         ONLY return the JSON array of recommendations and nothing else.
         """
 
-        # Call the LLM
+        # Call the LLM; output is constrained to the strategy schema, strategies
+        # are parsed as they stream in, and a reply that stops matching the
+        # schema is abandoned at that point
+        strategies = []
         try:
             logger.info("Calling LLM for strategy generation")
-            response = requests.post(
-                self.model_config['endpoint'],
-                json={
-                    "model": self.model_config['name'],
-                    "prompt": prompt,
-                    "stream": False,
-                    **self.model_config['parameters']
-                }
-            )
-        
-            result = response.json()
-            content = result.get('response', '')
-        
-            # First try with regular extraction
-            start_idx = content.find('[')
-            end_idx = content.rfind(']') + 1
-        
-            if start_idx >= 0 and end_idx > start_idx:
-                try:
-                    json_str = content[start_idx:end_idx]
-                    strategies = json.loads(json_str)
-                    logger.info(f"Generated {len(strategies)} strategy recommendations")
-                    return strategies
-                except json.JSONDecodeError:
-                    logger.warning("JSON extraction failed, trying with regex")
-        
-            # If that fails, try more aggressive JSON extraction
-            import re
-            json_pattern = r'\[\s*\{.*?\}\s*\]'
-            json_match = re.search(json_pattern, content, re.DOTALL)
-            if json_match:
-                try:
-                    strategies = json.loads(json_match.group(0))
-                    logger.info(f"Generated {len(strategies)} strategy recommendations using regex")
-                    return strategies
-                except json.JSONDecodeError:
-                    logger.warning("Regex extraction failed, trying alternative approach")
-        
-            # If both methods fail, try to fix common JSON issues
-            fixed_content = content.replace("'", '"')  # Replace single quotes with double quotes
-            json_match = re.search(r'\[\s*\{.*?\}\s*\]', fixed_content, re.DOTALL)
-            if json_match:
-                try:
-                    strategies = json.loads(json_match.group(0))
-                    logger.info(f"Generated {len(strategies)} strategy recommendations after fixing quotes")
-                    return strategies
-                except json.JSONDecodeError:
-                    logger.warning("All extraction methods failed, using fallback strategy generation")
-        
+            for strategy in self.llm.stream_json_array(prompt, task="strategy_generation",
+                                                       schema=STRATEGIES):
+                strategies.append(strategy)
+
+            logger.info(f"Generated {len(strategies)} strategy recommendations")
+            return strategies
+
+        except MalformedResponse as e:
+            if strategies:
+                logger.warning(f"Abandoned LLM response after {len(strategies)} strategies: {e}")
+                return strategies
+            logger.warning(f"Could not extract JSON from LLM response ({e}), using fallback strategy generation")
             return self._generate_fallback_strategies(entity_name, risk_data)
-    
+
         except Exception as e:
             logger.error(f"Error in LLM strategy generation: {e}")
             return self._generate_fallback_strategies(entity_name, risk_data)
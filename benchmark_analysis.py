@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the Python side of StrategyAssessment.assess and
+InsightExtractor.extract_insights.
+Records their Neo4j traffic once against a live database, then replays
+the recording so runs can be timed and profiled without a server.
+"""
+
+import os
+import sys
+import time
+import cProfile
+import pstats
+import argparse
+import logging
+import statistics
+import config
+from knowledge_graph.neo4j_manager import Neo4jManager
+from analysis.insight_extractor import InsightExtractor
+from strategy_assessment import StrategyAssessment
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                   format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("benchmark_analysis")
+
+DEFAULT_RECORDING = os.path.join("data", "benchmarks", "analysis_queries.jsonl.gz")
+DEFAULT_USER_INPUTS = {"risk_tolerance": "Medium", "priorities": ["growth"], "constraints": []}
+
+def run_targets(neo4j, entity_name, targets):
+    """
+    Run each benchmark target once
+
+    Key findings are generated by the configured LLM; with no model server
+    running, extract_insights falls back to rule-based findings at once.
+
+    Args:
+        neo4j: Connected Neo4jManager (recording or replaying)
+        entity_name (str): Entity to assess
+        targets (list): "assess" and/or "insights"
+
+    Returns:
+        dict: Seconds taken per target
+    """
+    timings = {}
+
+    if "assess" in targets:
+        assessment = StrategyAssessment(neo4j)
+        start = time.perf_counter()
+        assessment.assess(entity_name, DEFAULT_USER_INPUTS)
+        timings["assess"] = time.perf_counter() - start
+
+    if "insights" in targets:
+        extractor = InsightExtractor(neo4j)
+        start = time.perf_counter()
+        extractor.extract_insights(entity_name)
+        timings["insights"] = time.perf_counter() - start
+
+    return timings
+
+def record(path, entity_name, targets):
+    """Run the targets once against the live database, recording every query"""
+    neo4j = Neo4jManager(record_path=path)
+    if not neo4j.connect():
+        logger.error("Could not connect to Neo4j")
+        return None
+
+    try:
+        return run_targets(neo4j, entity_name, targets)
+    finally:
+        neo4j.close()
+
+def replay(path, entity_name, targets, iterations, profile_path=None):
+    """
+    Run the targets repeatedly against a recording
+
+    Args:
+        path (str): Recording written by record()
+        entity_name (str): Entity the recording was made for
+        targets (list): "assess" and/or "insights"
+        iterations (int): Timed runs per target
+        profile_path (str, optional): Write cProfile stats for all runs here
+
+    Returns:
+        dict: Per-target list of run times in seconds
+    """
+    profiler = cProfile.Profile() if profile_path else None
+    runs = {target: [] for target in targets}
+
+    for _ in range(iterations):
+        # A fresh manager per run, so replay starts from the first recorded
+        # call and cached projections and statistics do not make later runs
+        # cheaper than the first
+        neo4j = Neo4jManager(replay_path=path)
+        neo4j.connect()
+        try:
+            if profiler:
+                profiler.enable()
+            timings = run_targets(neo4j, entity_name, targets)
+            if profiler:
+                profiler.disable()
+        finally:
+            neo4j.close()
+
+        for target, elapsed in timings.items():
+            runs[target].append(elapsed)
+
+    if profiler:
+        profiler.dump_stats(profile_path)
+        pstats.Stats(profile_path).sort_stats("cumulative").print_stats(25)
+
+    return runs
+
+def main():
+    """Parse arguments, then record or replay and print a summary table"""
+    parser = argparse.ArgumentParser(description="Benchmark the analysis code on recorded Neo4j queries")
+    parser.add_argument("mode", choices=["record", "replay"],
+                        help="Record against a live database, or replay a recording")
+    parser.add_argument("--entity", default="TechCorp", help="Entity to assess")
+    parser.add_argument("--recording", default=DEFAULT_RECORDING, help="Recording file")
+    parser.add_argument("--targets", default="assess,insights",
+                        help="Comma-separated targets: assess, insights")
+    parser.add_argument("--iterations", type=int, default=5, help="Replay runs per target")
+    parser.add_argument("--latency", default=None,
+                        help="Injected delay per replayed query: milliseconds, or 'recorded' "
+                             "(default: config.NEO4J_REPLAY_LATENCY)")
+    parser.add_argument("--profile", default=None, help="Write cProfile stats of the replay runs here")
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+
+    if args.mode == "record":
+        timings = record(args.recording, args.entity, targets)
+        if timings is None:
+            return 1
+        for target, elapsed in timings.items():
+            print(f"{target:>10}: {elapsed:.3f}s (live)")
+        print(f"Recording written to {args.recording}")
+        return 0
+
+    if not os.path.exists(args.recording):
+        logger.error(f"No recording at {args.recording}; run with 'record' first")
+        return 1
+    if args.latency is not None:
+        config.NEO4J_REPLAY_LATENCY = args.latency
+
+    runs = replay(args.recording, args.entity, targets, args.iterations, args.profile)
+
+    print(f"\n{'Target':>10} {'Runs':>6} {'Min':>10} {'Median':>10} {'Mean':>10}")
+    print("-"*50)
+    for target, times in runs.items():
+        print(f"{target:>10} {len(times):>6} {min(times):>10.4f} "
+              f"{statistics.median(times):>10.4f} {statistics.mean(times):>10.4f}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
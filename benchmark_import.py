@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark for Neo4jManager.import_triplets_batch.
+Loads synthetic triplets at several sizes and reports triplets/sec.
+"""
+
+import sys
+import random
+import argparse
+import logging
+from datetime import datetime
+from knowledge_graph.neo4j_manager import Neo4jManager
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                   format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("benchmark_import")
+
+BENCH_PREFIX = "bench_"
+PREDICATES = ["COMPETES_WITH", "PARTNERED_WITH", "ACQUIRED", "INVESTED", "SUPPLIES", "HAS_METRIC"]
+
+def generate_triplets(count, entity_count=None, seed=42):
+    """
+    Generate synthetic triplets over a bounded pool of entity names.
+
+    Args:
+        count: Number of triplets to generate
+        entity_count: Size of the entity pool (default: count / 5)
+        seed: Random seed for reproducible runs
+
+    Returns:
+        list: Triplet dictionaries in extractor format
+    """
+    rng = random.Random(seed)
+    entity_count = entity_count or max(10, count // 5)
+    timestamp = datetime.now().isoformat()
+
+    triplets = []
+    for i in range(count):
+        triplets.append({
+            "subject": f"{BENCH_PREFIX}{rng.randrange(entity_count)}",
+            "subject_type": "company",
+            "predicate": rng.choice(PREDICATES),
+            "object": f"{BENCH_PREFIX}{rng.randrange(entity_count)}",
+            "object_type": "company",
+            "context": f"synthetic context {i}",
+            "confidence": round(rng.uniform(0.5, 1.0), 2),
+            "extraction_method": "benchmark",
+            "timestamp": timestamp
+        })
+
+    return triplets
+
+def cleanup_bench_data(neo4j):
+    """Delete benchmark nodes in batches to keep transactions small"""
+    query = """
+    MATCH (e:Entity)
+    WHERE e.name STARTS WITH $prefix
+    WITH e LIMIT 10000
+    DETACH DELETE e
+    RETURN count(*) AS deleted
+    """
+    while True:
+        result = neo4j.execute_query(query, {"prefix": BENCH_PREFIX})
+        if not result or result[0]["deleted"] == 0:
+            break
+
+def run_benchmark(sizes, batch_size, keep=False):
+    """
+    Run the import benchmark for each size.
+
+    Args:
+        sizes: List of triplet counts to load
+        batch_size: Triplets per transaction
+        keep: Leave benchmark data in the database when True
+
+    Returns:
+        list: Result rows with size, elapsed time and throughput
+    """
+    neo4j = Neo4jManager()
+    if not neo4j.connect():
+        logger.error("Could not connect to Neo4j")
+        return []
+
+    results = []
+    try:
+        neo4j.verify_indexes()
+
+        for size in sizes:
+            cleanup_bench_data(neo4j)
+            triplets = generate_triplets(size)
+
+            logger.info(f"Loading {size} synthetic triplets (batch size {batch_size})")
+            stats = neo4j.import_triplets_batch(triplets, batch_size=batch_size)
+
+            results.append({
+                "size": size,
+                "imported": stats["imported"],
+                "errors": stats["errors"],
+                "elapsed_seconds": stats["elapsed_seconds"],
+                "triplets_per_sec": stats["triplets_per_sec"]
+            })
+
+        if not keep:
+            cleanup_bench_data(neo4j)
+    finally:
+        neo4j.close()
+
+    return results
+
+def main():
+    """Parse arguments, run the benchmark and print a summary table"""
+    parser = argparse.ArgumentParser(description="Benchmark bulk triplet import")
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="Comma-separated triplet counts to load")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Triplets per transaction (default: config.NEO4J_BATCH_SIZE)")
+    parser.add_argument("--keep", action="store_true", help="Keep benchmark data after the run")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = run_benchmark(sizes, args.batch_size, args.keep)
+
+    if not results:
+        return 1
+
+    print(f"\n{'Triplets':>10} {'Imported':>10} {'Errors':>8} {'Seconds':>10} {'Triplets/sec':>14}")
+    print("-"*56)
+    for row in results:
+        print(f"{row['size']:>10} {row['imported']:>10} {row['errors']:>8} "
+              f"{row['elapsed_seconds']:>10.2f} {row['triplets_per_sec']:>14.1f}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
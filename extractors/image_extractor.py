@@ -5,13 +5,13 @@ Extracts text, objects, and insights from image files using vision models.
 import re
 import os
 import logging
-import json
-import requests
 import base64
 from datetime import datetime
 from PIL import Image
 import io
 import config
+from llm_client import get_client, MalformedResponse
+from llm_schemas import CHART_VISION, DOCUMENT_VISION
 from extractors.extractor_utils import (
     ensure_output_dir, generate_output_filename, save_extraction_result,
     create_extraction_result_template, detect_entities, COMMON_ENTITY_PATTERNS
@@ -135,9 +135,6 @@ def _process_with_vision_model(img_base64, file_path):
     """
     logger.info("Processing image with vision model")
     
-    # Get model configuration
-    model_config = config.MODELS['vision']
-    
     # Determine likely document type from file extension for better prompting
     file_ext = os.path.splitext(file_path)[1].lower()
     is_likely_chart = file_ext in ['.png', '.jpg', '.jpeg'] and 'chart' in file_path.lower()
@@ -150,47 +147,22 @@ def _process_with_vision_model(img_base64, file_path):
     
     # Call the vision model API (Ollama)
     try:
-        response = requests.post(
-            model_config['endpoint'],
-            json={
-                "model": model_config['name'],
-                "messages": [
-                    {"role": "user", "content": prompt},
-                ],
-                "stream": False,
-                "images": [img_base64],
-                **model_config['parameters']
-            }
+        # Output is constrained to the schema matching the prompt and validated against it
+        vision_data = get_client().generate_json(
+            prompt,
+            CHART_VISION if is_likely_chart else DOCUMENT_VISION,
+            task="chart_analysis" if is_likely_chart else "image_processing",
+            images=[img_base64]
         )
+        logger.info("Successfully parsed vision model response")
         
-        result = response.json()
-        content = result.get('message', {}).get('content', '')
-        
-        # Extract JSON from the response
-        start_idx = content.find('{')
-        end_idx = content.rfind('}') + 1
-        
-        if start_idx >= 0 and end_idx > start_idx:
-            json_str = content[start_idx:end_idx]
-            try:
-                vision_data = json.loads(json_str)
-                logger.info("Successfully parsed vision model response")
-                
-                # Post-process the results
-                vision_data = _post_process_vision_results(vision_data, file_path)
-                
-                return vision_data
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse JSON from vision model response: {e}")
-                # Try to fix common JSON parsing issues
-                fixed_json = _fix_json_response(content)
-                if fixed_json:
-                    logger.info("Successfully fixed and parsed JSON response")
-                    return _post_process_vision_results(fixed_json, file_path)
+        # Post-process the results
+        return _post_process_vision_results(vision_data, file_path)
         
-        # Fallback to text extraction if JSON parsing fails
-        logger.warning("Using fallback text extraction from vision model response")
-        text_content = _extract_text_from_non_json_response(content)
+    except MalformedResponse as e:
+        # Fallback to text extraction if the response is unusable
+        logger.warning(f"Using fallback text extraction from vision model response ({e})")
+        text_content = _extract_text_from_non_json_response(e.content or "")
         return _create_fallback_vision_results(text_content)
         
     except Exception as e:
@@ -367,55 +339,6 @@ def _post_process_vision_results(vision_data, file_path):
     
     return vision_data
 
-def _fix_json_response(content):
-    """
-    Attempt to fix common JSON errors in model responses
-    
-    Args:
-        content: Model response text
-        
-    Returns:
-        dict: Fixed JSON object or None if fixing failed
-    """
-    # Find the JSON part
-    json_start = content.find('{')
-    json_end = content.rfind('}') + 1
-    
-    if json_start >= 0 and json_end > json_start:
-        json_str = content[json_start:json_end]
-        
-        # Try common fixes
-        try:
-            # Fix 1: Try to parse as is
-            return json.loads(json_str)
-        except json.JSONDecodeError:
-            pass
-        
-        try:
-            # Fix 2: Fix unescaped quotes in strings
-            fixed_str = re.sub(r'(?<!")("[\w\s]+)(?!")(?=:)', r'\1"', json_str)
-            fixed_str = re.sub(r'(?<=:)(?<!")([\w\s]+")(?!")', r'"\1', fixed_str)
-            return json.loads(fixed_str)
-        except (json.JSONDecodeError, re.error):
-            pass
-        
-        try:
-            # Fix 3: Fix missing quotes around keys
-            fixed_str = re.sub(r'([{,])\s*(\w+)\s*:', r'\1"\2":', json_str)
-            return json.loads(fixed_str)
-        except (json.JSONDecodeError, re.error):
-            pass
-        
-        try:
-            # Fix 4: Replace single quotes with double quotes
-            fixed_str = json_str.replace("'", '"')
-            return json.loads(fixed_str)
-        except json.JSONDecodeError:
-            pass
-            
-    # All fixes failed
-    return None
-
 def _extract_text_from_non_json_response(content):
     """
     Extract useful text from a non-JSON response
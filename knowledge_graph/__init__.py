@@ -4,5 +4,8 @@ Handles graph construction, querying, and relationship extraction.
 """
 
 from knowledge_graph.neo4j_manager import Neo4jManager
+from knowledge_graph.async_neo4j_manager import AsyncNeo4jManager
 from knowledge_graph.triplet_extractor import TripletExtractor
-from knowledge_graph.graph_query import GraphQueryManager
\ No newline at end of file
+from knowledge_graph.graph_query import GraphQueryManager
+from knowledge_graph.graph_store import GraphStore, create_graph_store
+from knowledge_graph.embedded_store import EmbeddedGraphStore
@@ -0,0 +1,224 @@
+"""
+Asynchronous Neo4j database manager for the knowledge graph component.
+Runs independent Cypher queries concurrently on the neo4j async driver.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from collections import Counter
+from neo4j import AsyncGraphDatabase, READ_ACCESS, WRITE_ACCESS
+from neo4j.exceptions import ServiceUnavailable, AuthError
+import config
+from knowledge_graph.query_profiler import QueryProfiler
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class AsyncNeo4jManager:
+    """
+    asyncio counterpart to Neo4jManager.
+    Query results have the same shape: a list of record dictionaries.
+    """
+
+    def __init__(self, uri=None, user=None, password=None, max_concurrency=None, database=None,
+                 stats_manager=None):
+        """
+        Initialize with connection parameters
+
+        Args:
+            uri, user, password: Connection settings (default to config)
+            max_concurrency (int, optional): Queries in flight at once
+            database (str, optional): Database every session uses (None = default)
+            stats_manager (Neo4jManager, optional): Manager whose query counters
+                                                    and profiler this one feeds, so
+                                                    one report covers both paths
+        """
+        self.uri = uri or config.NEO4J_URI
+        self.user = user or config.NEO4J_USER
+        self.password = password or config.NEO4J_PASSWORD
+        self.max_concurrency = max_concurrency or config.NEO4J_ASYNC_MAX_CONCURRENCY
+        self.database = database or config.NEO4J_DATABASE or None
+        self.driver = None
+
+        self.stats_manager = stats_manager
+        self.profiler = stats_manager.profiler if stats_manager is not None else QueryProfiler()
+        self.query_counts = Counter()
+        self._counts_lock = threading.Lock()
+
+        # Private event loop used by the synchronous run_many bridge
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+    async def connect(self):
+        """Establish connection to Neo4j database"""
+        try:
+            self.driver = AsyncGraphDatabase.driver(
+                self.uri,
+                auth=(self.user, self.password),
+                max_connection_pool_size=config.NEO4J_MAX_POOL_SIZE,
+                max_connection_lifetime=config.NEO4J_MAX_CONNECTION_LIFETIME,
+                connection_acquisition_timeout=config.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+                max_transaction_retry_time=config.NEO4J_MAX_TRANSACTION_RETRY_TIME
+            )
+            await self.driver.verify_connectivity()
+            logger.info(f"Async driver connected to Neo4j at {self.uri}")
+            return True
+        except (ServiceUnavailable, AuthError) as e:
+            logger.error(f"Failed to connect async driver to Neo4j: {e}")
+            self.driver = None
+            return False
+
+    async def close(self):
+        """Close the async Neo4j connection"""
+        if self.driver:
+            await self.driver.close()
+            self.driver = None
+            logger.info("Async Neo4j connection closed")
+
+    async def _ensure_connected(self):
+        """Connect lazily, raising ConnectionError if the database is unreachable"""
+        if not self.driver:
+            if not await self.connect():
+                raise ConnectionError("Failed to connect to Neo4j database")
+
+    def _record_query(self, query):
+        """Count one query text sent to the server"""
+        if self.stats_manager is not None:
+            self.stats_manager._record_query(query)
+            return
+        with self._counts_lock:
+            self.query_counts[query] += 1
+
+    async def execute_query(self, query, parameters=None, read_only=True):
+        """
+        Execute a Cypher query in a managed transaction
+
+        Args:
+            query (str): Cypher query
+            parameters (dict, optional): Query parameters
+            read_only (bool): Run on the read path (default) or the write path
+
+        Returns:
+            list: Records as dictionaries
+        """
+        await self._ensure_connected()
+
+        # Same counting and profiling as Neo4jManager._run_and_collect
+        async def tx_function(tx):
+            self._record_query(query)
+
+            if not self.profiler.enabled:
+                result = await tx.run(query, parameters or {})
+                return [record.data() async for record in result]
+
+            profiled = self.profiler.should_profile(query)
+            start = time.perf_counter()
+            result = await tx.run(f"PROFILE {query}" if profiled else query, parameters or {})
+            records = [record.data() async for record in result]
+            summary = await result.consume()
+            self.profiler.record(query, time.perf_counter() - start, len(records), summary, profiled)
+            return records
+
+        access_mode = READ_ACCESS if read_only else WRITE_ACCESS
+
+        try:
+            async with self.driver.session(default_access_mode=access_mode,
+                                           fetch_size=config.NEO4J_FETCH_SIZE,
+                                           database=self.database) as session:
+                if read_only:
+                    return await session.execute_read(tx_function)
+                return await session.execute_write(tx_function)
+        except Exception as e:
+            logger.error(f"Query execution failed: {query}")
+            logger.error(f"Error: {e}")
+            raise
+
+    async def execute_many(self, queries, max_concurrency=None, read_only=True,
+                           return_exceptions=False):
+        """
+        Fan out independent queries concurrently
+
+        Args:
+            queries (list): (query, parameters) tuples; parameters may be None
+            max_concurrency (int, optional): Maximum queries in flight at once
+            read_only (bool): Run all queries on the read path
+            return_exceptions (bool): Return exceptions in place of failed
+                                      results instead of raising the first one
+
+        Returns:
+            list: One result list per query, in input order
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def run_one(query, parameters):
+            async with semaphore:
+                return await self.execute_query(query, parameters, read_only=read_only)
+
+        await self._ensure_connected()
+
+        return await asyncio.gather(
+            *(run_one(query, parameters) for query, parameters in queries),
+            return_exceptions=return_exceptions
+        )
+
+    def run_many(self, queries, max_concurrency=None, read_only=True):
+        """
+        Synchronous bridge to execute_many for callers that are not async
+
+        The async driver is bound to the event loop it was created on, so all
+        synchronous calls share one private loop owned by this manager. Must
+        not be called from inside a running event loop.
+
+        Args:
+            queries (list): (query, parameters) tuples
+            max_concurrency (int, optional): Maximum queries in flight at once
+            read_only (bool): Run all queries on the read path
+
+        Returns:
+            list: One result list per query, in input order
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            return self._loop.run_until_complete(
+                self.execute_many(queries, max_concurrency, read_only))
+
+    def shutdown(self):
+        """Close the driver and the private event loop used by run_many"""
+        with self._loop_lock:
+            if self._loop is None:
+                return
+            self._loop.run_until_complete(self.close())
+            self._loop.close()
+            self._loop = None
+
+def run_independent_queries(neo4j_manager, queries, async_manager=None):
+    """
+    Run read queries that do not depend on each other
+
+    Uses the async manager to run them concurrently when one is available,
+    otherwise runs them one after another on the synchronous manager. The
+    async driver bypasses query recording and replay, so they also run
+    sequentially while the synchronous manager records or replays.
+
+    Args:
+        neo4j_manager: Neo4jManager used for the sequential path
+        queries (list): (query, parameters) tuples
+        async_manager (AsyncNeo4jManager, optional): Manager for the concurrent path
+
+    Returns:
+        list: One result list per query, in input order
+    """
+    recording = (getattr(neo4j_manager, "record_path", None)
+                 or getattr(neo4j_manager, "replay_path", None))
+    if async_manager is not None and not recording:
+        try:
+            return async_manager.run_many(queries)
+        except Exception as e:
+            logger.warning(f"Concurrent query execution failed, running sequentially: {e}")
+
+    return [neo4j_manager.execute_read(query, parameters) for query, parameters in queries]
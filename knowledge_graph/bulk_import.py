@@ -0,0 +1,304 @@
+"""
+Offline bulk import for the knowledge graph component.
+Writes deduplicated triplets as the header/CSV file sets that
+`neo4j-admin database import full` reads, and verifies the imported
+database against the expected counts afterwards.
+"""
+
+import os
+import csv
+import posixpath
+import json
+import shlex
+import hashlib
+import logging
+from datetime import datetime
+import config
+from knowledge_graph.query_registry import QUERIES
+from knowledge_graph.graph_store import GraphStore
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+NODE_HEADER = ["id:ID", "name"]
+RELATIONSHIP_HEADER = [":START_ID", ":END_ID", "triplet_key", "source_doc", "context", "source",
+                       "timestamp", "confidence:float", "created_at:datetime"]
+# Provenance nodes as upsert_document writes them; the import id is not
+# stored, the document id goes in the id property
+DOCUMENT_HEADER = [":ID", "id", "name", "content_hash", "triplet_keys:string[]",
+                   "created_at:datetime", "updated_at:datetime"]
+PRODUCED_HEADER = [":START_ID", ":END_ID"]
+
+def stable_node_id(label, name):
+    """
+    Deterministic import id for a node
+
+    The same (label, name) pair gets the same id in every run, so file sets
+    produced by separate runs can be combined in one import.
+
+    Args:
+        label (str): Node label
+        name (str): Node name
+
+    Returns:
+        str: 20-character hex id
+    """
+    return hashlib.sha1(f"{label}\x1f{name}".encode("utf-8")).hexdigest()[:20]
+
+def container_import_path(output_dir):
+    """
+    Where neo4j-admin in the container sees a local directory
+
+    Args:
+        output_dir (str): Local directory inside config.NEO4J_IMPORT_HOST_DIR
+
+    Returns:
+        str: The same directory under config.NEO4J_IMPORT_CONTAINER_DIR
+
+    Raises:
+        ValueError: If output_dir is outside the mounted import directory
+    """
+    relative = os.path.relpath(os.path.abspath(output_dir),
+                               os.path.abspath(config.NEO4J_IMPORT_HOST_DIR))
+    if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+        raise ValueError(f"Bulk import directory {output_dir} is not inside "
+                         f"{config.NEO4J_IMPORT_HOST_DIR}, the container's import volume; "
+                         f"pass import_dir to say where neo4j-admin sees it")
+    parts = [] if relative == os.curdir else relative.split(os.sep)
+    return posixpath.join(config.NEO4J_IMPORT_CONTAINER_DIR, *parts)
+
+class BulkImportWriter:
+    """
+    Streams prepared triplets into per-label node files and per-type
+    relationship files for neo4j-admin.
+
+    Rows are written as they arrive, with the same provenance that
+    upsert_document records: every relationship carries its triplet_key
+    and source_doc, and each document gets a Document node with its
+    content hash and triplet keys plus PRODUCED links to its subjects.
+    Only node ids and triplet keys are kept in memory for
+    deduplication. Within a document the first occurrence of a
+    triplet_key wins.
+    """
+
+    def __init__(self, output_dir=None, database=None, import_dir=None):
+        """
+        Initialize the writer
+
+        Args:
+            output_dir (str, optional): Local directory for the file set
+                                        (defaults to config.BULK_IMPORT_DIR)
+            database (str, optional): Target database name (defaults to config.BULK_IMPORT_DATABASE)
+            import_dir (str, optional): Where neo4j-admin sees output_dir, e.g. inside
+                                        the container (defaults to config.BULK_IMPORT_CONTAINER_DIR,
+                                        or for a custom output_dir, its path under the
+                                        container's import volume)
+
+        Raises:
+            ValueError: If a custom output_dir is outside the import volume and
+                        no import_dir is given
+        """
+        self.output_dir = output_dir or config.BULK_IMPORT_DIR
+        self.database = database or config.BULK_IMPORT_DATABASE
+        if import_dir:
+            self.import_dir = import_dir
+        elif output_dir:
+            self.import_dir = container_import_path(output_dir)
+        else:
+            self.import_dir = config.BULK_IMPORT_CONTAINER_DIR or self.output_dir
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        self._node_ids = set()
+        self._rel_keys = set()
+        self._files = {}
+        self.node_counts = {}
+        self.relationship_counts = {}
+        self.stats = {"documents": 0, "triplets": 0, "duplicate_nodes": 0, "duplicate_relationships": 0}
+        self._created_at = datetime.now().isoformat()
+
+    def _writer(self, kind, name, header):
+        """Open (once) the data file for a label or relationship type"""
+        key = (kind, name)
+        if key not in self._files:
+            base = f"{kind}_{name}"
+            with open(os.path.join(self.output_dir, f"{base}_header.csv"), "w",
+                      newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(header)
+            handle = open(os.path.join(self.output_dir, f"{base}.csv"), "w",
+                          newline="", encoding="utf-8")
+            self._files[key] = (handle, csv.writer(handle))
+        return self._files[key][1]
+
+    def _add_node(self, label, props):
+        name = props["name"]
+        node_id = stable_node_id(label, name)
+        if node_id in self._node_ids:
+            self.stats["duplicate_nodes"] += 1
+            return node_id
+        self._node_ids.add(node_id)
+        self._writer("nodes", label, NODE_HEADER).writerow([node_id, name])
+        self.node_counts[label] = self.node_counts.get(label, 0) + 1
+        return node_id
+
+    def add_document(self, source_id, content_hash, triplets, name=None):
+        """
+        Add a document's prepared triplets (the rows taken by upsert_document)
+
+        Args:
+            source_id (str): Stable document id (e.g. its path)
+            content_hash (str): Hash of the document content
+            triplets (list): Dicts with subject_type, subject_props, predicate,
+                             object_type, object_props and rel_props
+            name (str, optional): Display name for the Document node
+        """
+        document_id = stable_node_id("Document", source_id)
+        if document_id in self._node_ids:
+            logger.warning(f"Document {source_id} already added to the bulk import, skipping")
+            return
+        self._node_ids.add(document_id)
+
+        triplet_keys = []
+        subjects = set()
+        for t in triplets:
+            subject_id = self._add_node(t["subject_type"], t["subject_props"])
+            object_id = self._add_node(t["object_type"], t["object_props"])
+            rel_props = t.get("rel_props") or {}
+            predicate = t["predicate"]
+            self.stats["triplets"] += 1
+
+            key = GraphStore.triplet_key(source_id, t)
+            if key in self._rel_keys:
+                self.stats["duplicate_relationships"] += 1
+                continue
+            self._rel_keys.add(key)
+            triplet_keys.append(key)
+
+            self._writer("relationships", predicate, RELATIONSHIP_HEADER).writerow([
+                subject_id, object_id,
+                key, source_id,
+                rel_props.get("context", ""),
+                rel_props.get("source", ""),
+                rel_props.get("timestamp", ""),
+                rel_props.get("confidence", ""),
+                self._created_at
+            ])
+            self.relationship_counts[predicate] = self.relationship_counts.get(predicate, 0) + 1
+
+            if subject_id not in subjects:
+                subjects.add(subject_id)
+                self._writer("relationships", "PRODUCED", PRODUCED_HEADER).writerow(
+                    [document_id, subject_id])
+                self.relationship_counts["PRODUCED"] = self.relationship_counts.get("PRODUCED", 0) + 1
+
+        self._writer("nodes", "Document", DOCUMENT_HEADER).writerow([
+            document_id, source_id, name or source_id, content_hash,
+            ";".join(sorted(triplet_keys)), self._created_at, self._created_at
+        ])
+        self.node_counts["Document"] = self.node_counts.get("Document", 0) + 1
+        self.stats["documents"] += 1
+
+    def import_command(self):
+        """
+        Build the neo4j-admin command for the written file set
+
+        Returns:
+            list: Command arguments
+        """
+        command = ["neo4j-admin", "database", "import", "full",
+                   "--overwrite-destination=true", "--multiline-fields=true"]
+        for kind, name in sorted(self._files):
+            option = "--nodes" if kind == "nodes" else "--relationships"
+            header = f"{self.import_dir}/{kind}_{name}_header.csv"
+            data = f"{self.import_dir}/{kind}_{name}.csv"
+            command.append(f"{option}={name}={header},{data}")
+        command.append(self.database)
+        return command
+
+    def finish(self):
+        """
+        Close the data files and write the manifest and import script
+
+        Returns:
+            dict: Manifest with expected counts, the import command and file paths
+        """
+        for handle, _ in self._files.values():
+            handle.close()
+
+        command = self.import_command()
+        manifest = {
+            "database": self.database,
+            "created_at": self._created_at,
+            "node_counts": self.node_counts,
+            "relationship_counts": self.relationship_counts,
+            "nodes": sum(self.node_counts.values()),
+            "relationships": sum(self.relationship_counts.values()),
+            "stats": self.stats,
+            "command": command
+        }
+
+        manifest_path = os.path.join(self.output_dir, "manifest.json")
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        # The DBMS must be stopped while neo4j-admin writes the store, so the
+        # script runs a one-off container on the compose volumes
+        script_path = os.path.join(self.output_dir, "import.sh")
+        with open(script_path, "w", encoding="utf-8") as f:
+            f.write("#!/bin/sh\n"
+                    "# Offline import; stop the running Neo4j container first:\n"
+                    "#   docker compose stop neo4j\n"
+                    "set -e\n"
+                    "docker run --rm \\\n"
+                    "  -v \"$(pwd)/neo4j/data:/data\" \\\n"
+                    f"  -v \"$(pwd)/{config.NEO4J_IMPORT_HOST_DIR}:{config.NEO4J_IMPORT_CONTAINER_DIR}\" \\\n"
+                    f"  {config.BULK_IMPORT_IMAGE} \\\n"
+                    f"  {' '.join(shlex.quote(arg) for arg in command)}\n"
+                    "docker compose start neo4j\n")
+        os.chmod(script_path, 0o755)
+
+        manifest["manifest_path"] = manifest_path
+        manifest["script_path"] = script_path
+        logger.info(f"Bulk import file set written to {self.output_dir}: {manifest['nodes']} nodes, "
+                    f"{manifest['relationships']} relationships "
+                    f"({self.stats['duplicate_nodes']} duplicate nodes, "
+                    f"{self.stats['duplicate_relationships']} duplicate relationships dropped)")
+        return manifest
+
+def verify_import(graph_store, manifest):
+    """
+    Compare per-label and per-type counts in the database with a manifest
+
+    Args:
+        graph_store: Connected GraphStore for the imported database
+        manifest (dict or str): Manifest from BulkImportWriter.finish() or its path
+
+    Returns:
+        dict: ok flag plus expected/actual counts for every mismatch
+    """
+    if isinstance(manifest, str):
+        with open(manifest, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    mismatches = []
+    for label, expected in manifest["node_counts"].items():
+        result = graph_store.execute_read(QUERIES.render("count_label_nodes", label=label))
+        actual = result[0]["count"] if result else 0
+        if actual != expected:
+            mismatches.append({"label": label, "expected": expected, "actual": actual})
+
+    for rel_type, expected in manifest["relationship_counts"].items():
+        result = graph_store.execute_read(QUERIES.render("count_type_relationships", rel_type=rel_type))
+        actual = result[0]["count"] if result else 0
+        if actual != expected:
+            mismatches.append({"relationship_type": rel_type, "expected": expected, "actual": actual})
+
+    if mismatches:
+        logger.error(f"Bulk import verification failed: {len(mismatches)} count mismatches")
+    else:
+        logger.info(f"Bulk import verified: {manifest['nodes']} nodes, "
+                    f"{manifest['relationships']} relationships")
+
+    return {"ok": not mismatches, "mismatches": mismatches,
+            "nodes": manifest["nodes"], "relationships": manifest["relationships"]}
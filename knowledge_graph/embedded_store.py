@@ -0,0 +1,1446 @@
+"""
+Embedded in-process graph backend for the knowledge graph component.
+Holds nodes and typed relationships in compact in-memory adjacency arrays,
+with optional on-disk snapshots, so analysis can run without a Neo4j server.
+"""
+
+import os
+import re
+import gzip
+import math
+import pickle
+import logging
+import threading
+from array import array
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import config
+from knowledge_graph.graph_store import GraphStore
+from knowledge_graph.query_registry import QUERIES
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+# Query name -> handler method, filled in by the @_handles decorator
+_QUERY_HANDLERS = {}
+
+def _handles(*names):
+    """Register a method as the embedded implementation of named queries"""
+    def decorator(method):
+        for name in names:
+            _QUERY_HANDLERS[name] = method
+        return method
+    return decorator
+
+def _to_float(value):
+    """Cypher toFloat(): numbers and numeric strings convert, anything else is null"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _to_datetime(value):
+    """Parse a stored timestamp into a naive UTC datetime, or None"""
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, str):
+        try:
+            dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    elif hasattr(value, "to_native"):
+        dt = value.to_native()
+    else:
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def _order_key(value):
+    """Sort key that tolerates mixed types; nulls sort last ascending, first descending"""
+    if value is None:
+        return (2, 0)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value)
+    return (1, str(value))
+
+def _sort(rows, *keys):
+    """Sort rows in place by (field, descending) pairs, first pair most significant"""
+    for field, descending in reversed(keys):
+        rows.sort(key=lambda row: _order_key(row[field]), reverse=descending)
+    return rows
+
+def _avg(values):
+    """Cypher avg(): mean of non-null values, or None"""
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+def _stdev(values):
+    """Cypher stDev(): sample standard deviation of non-null values"""
+    values = [v for v in values if v is not None]
+    if len(values) < 2:
+        return 0.0
+    mean = sum(values) / len(values)
+    return math.sqrt(sum((v - mean) ** 2 for v in values) / (len(values) - 1))
+
+class EmbeddedGraphStore(GraphStore):
+    """
+    In-process graph store implementing the GraphStore interface.
+
+    Nodes are rows in parallel lists (labels, properties); relationships are
+    rows in typed arrays of start node, end node and type id, with per-node
+    outgoing/incoming arrays of relationship ids. Deleted rows are
+    tombstoned (their properties become None and they are dropped from the
+    adjacency and lookup indexes), so ids stay stable until the store is
+    compacted on save or once deleted rows pass config.GRAPH_COMPACT_RATIO.
+    Cypher is not interpreted:
+    execute_read/execute_write dispatch on the query's registry name to a
+    Python implementation, and ad-hoc queries raise NotImplementedError.
+    """
+
+    backend = "embedded"
+
+    def __init__(self, snapshot_path=None):
+        """
+        Initialize an empty store
+
+        Args:
+            snapshot_path (str, optional): File loaded on connect() and saved on
+                                           close() (defaults to config.GRAPH_SNAPSHOT_PATH)
+        """
+        self.snapshot_path = snapshot_path if snapshot_path is not None else config.GRAPH_SNAPSHOT_PATH
+        self._lock = threading.RLock()
+        self._dirty = False
+        self.query_counts = Counter()
+        self._reset()
+
+    def _reset(self):
+        """Drop all graph data"""
+        # Nodes
+        self._node_labels = []      # node id -> frozenset of labels
+        self._node_props = []       # node id -> property dict
+        self._by_label = {}         # label -> array of node ids
+        self._by_label_name = {}    # (label, name) -> node id (MERGE key)
+        self._by_name = {}          # name -> list of node ids, any label
+        self._deleted_nodes = set()    # tombstoned node ids
+        self._label_tombstones = Counter()  # label -> tombstoned ids still in _by_label
+
+        # Relationships
+        self._rel_start = array('l')
+        self._rel_end = array('l')
+        self._rel_type = array('l')
+        self._rel_props = []
+        self._type_names = []
+        self._type_ids = {}
+        self._deleted_rels = set()  # tombstoned relationship ids
+
+        # Adjacency: node id -> array of relationship ids
+        self._out = []
+        self._in = []
+
+        # Document provenance: source id -> name, content_hash, triplet_keys,
+        # and source id -> ids of the relationships it produced
+        self._documents = {}
+        self._doc_rels = {}
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def connect(self):
+        """Load the snapshot if one is configured; always succeeds"""
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            self.load_snapshot(self.snapshot_path)
+        logger.info(f"Embedded graph store ready ({self.node_count()} nodes, "
+                    f"{self.relationship_count()} relationships)")
+        return True
+
+    def close(self):
+        """Save a snapshot if one is configured and the graph changed"""
+        if self.snapshot_path and self._dirty:
+            self.save_snapshot(self.snapshot_path)
+
+    def save_snapshot(self, path=None):
+        """
+        Write the whole graph to a gzip-compressed snapshot file
+
+        Args:
+            path (str, optional): Target file (defaults to snapshot_path)
+
+        Returns:
+            str: Path written
+        """
+        path = path or self.snapshot_path
+        if not path:
+            raise ValueError("No snapshot path configured")
+
+        with self._lock:
+            self._compact()
+            state = {
+                "format": SNAPSHOT_FORMAT,
+                "node_labels": [sorted(labels) for labels in self._node_labels],
+                "node_props": self._node_props,
+                "rel_start": self._rel_start,
+                "rel_end": self._rel_end,
+                "rel_type": self._rel_type,
+                "rel_props": self._rel_props,
+                "type_names": self._type_names,
+                "documents": self._documents
+            }
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with gzip.open(tmp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._dirty = False
+
+        logger.info(f"Saved graph snapshot to {path} ({self.node_count()} nodes, "
+                    f"{self.relationship_count()} relationships)")
+        return path
+
+    def load_snapshot(self, path=None):
+        """
+        Replace the graph with the contents of a snapshot file
+
+        Args:
+            path (str, optional): Snapshot file (defaults to snapshot_path)
+        """
+        path = path or self.snapshot_path
+        with gzip.open(path, "rb") as f:
+            state = pickle.load(f)
+
+        if state.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format in {path}: {state.get('format')}")
+
+        with self._lock:
+            self._reset()
+            for labels, props in zip(state["node_labels"], state["node_props"]):
+                self._create_node(labels, props)
+            self._type_names = list(state["type_names"])
+            self._type_ids = {name: i for i, name in enumerate(self._type_names)}
+            for start, end, type_id, props in zip(state["rel_start"], state["rel_end"],
+                                                  state["rel_type"], state["rel_props"]):
+                self._append_rel(start, end, type_id, props)
+            self._documents = dict(state.get("documents", {}))
+            self._dirty = False
+            self._graph_changed()
+
+        logger.info(f"Loaded graph snapshot from {path}")
+
+    def clear_database(self, confirm=False):
+        """Delete all nodes and relationships (use with caution!)"""
+        if not confirm:
+            logger.warning("Database clear operation requires confirmation")
+            return False
+        with self._lock:
+            self._reset()
+            self._dirty = True
+            self._graph_changed()
+        logger.warning("Embedded graph cleared - all nodes and relationships deleted")
+        return True
+
+    # ------------------------------------------------------------------
+    # Storage primitives
+    # ------------------------------------------------------------------
+
+    def _create_node(self, labels, props):
+        """Append a node and index it; returns its id"""
+        node_id = len(self._node_props)
+        labels = frozenset(labels)
+        props = dict(props or {})
+        self._node_labels.append(labels)
+        self._node_props.append(props)
+        self._out.append(array('l'))
+        self._in.append(array('l'))
+        for label in labels:
+            self._by_label.setdefault(label, array('l')).append(node_id)
+        self._index_name(node_id, props.get("name"))
+        return node_id
+
+    def _index_name(self, node_id, name):
+        """Add a node to the name indexes"""
+        if name is None:
+            return
+        self._by_name.setdefault(name, []).append(node_id)
+        for label in self._node_labels[node_id]:
+            self._by_label_name.setdefault((label, name), node_id)
+
+    def _type_id(self, rel_type):
+        """Intern a relationship type name"""
+        type_id = self._type_ids.get(rel_type)
+        if type_id is None:
+            type_id = len(self._type_names)
+            self._type_names.append(rel_type)
+            self._type_ids[rel_type] = type_id
+        return type_id
+
+    def _append_rel(self, start, end, type_id, props):
+        """Append a relationship row and its adjacency entries; returns its id"""
+        rel_id = len(self._rel_props)
+        self._rel_start.append(start)
+        self._rel_end.append(end)
+        self._rel_type.append(type_id)
+        self._rel_props.append(dict(props or {}))
+        self._out[start].append(rel_id)
+        self._in[end].append(rel_id)
+        source_id = self._rel_props[rel_id].get("source_doc")
+        if source_id is not None:
+            self._doc_rels.setdefault(source_id, []).append(rel_id)
+        return rel_id
+
+    def _node_ids(self):
+        """Ids of the nodes that have not been deleted"""
+        deleted = self._deleted_nodes
+        return (n for n in range(len(self._node_props)) if n not in deleted)
+
+    def _rel_ids(self):
+        """Ids of the relationships that have not been deleted"""
+        deleted = self._deleted_rels
+        return (r for r in range(len(self._rel_props)) if r not in deleted)
+
+    def _labels(self, node_id):
+        return sorted(self._node_labels[node_id])
+
+    def _name(self, node_id):
+        return self._node_props[node_id].get("name")
+
+    def _has_label(self, node_id, label):
+        return label in self._node_labels[node_id]
+
+    def _rel_type_name(self, rel_id):
+        return self._type_names[self._rel_type[rel_id]]
+
+    def _degree(self, node_id):
+        """Number of relationships attached to a node, COUNT {(n)--()}"""
+        return len(self._out[node_id]) + len(self._in[node_id])
+
+    def _rels(self, node_id, direction="both", types=None):
+        """
+        Yield (relationship id, other node id) pairs for a node
+
+        Args:
+            node_id: Node to expand
+            direction: "out", "in" or "both"
+            types: Optional collection of relationship type names
+        """
+        type_ids = None
+        if types:
+            type_ids = {self._type_ids[t] for t in types if t in self._type_ids}
+            if not type_ids:
+                return
+        if direction in ("out", "both"):
+            for rel_id in self._out[node_id]:
+                if type_ids is None or self._rel_type[rel_id] in type_ids:
+                    yield rel_id, self._rel_end[rel_id]
+        if direction in ("in", "both"):
+            for rel_id in self._in[node_id]:
+                if type_ids is None or self._rel_type[rel_id] in type_ids:
+                    yield rel_id, self._rel_start[rel_id]
+
+    def _nodes_with_label(self, label):
+        ids = self._by_label.get(label, ())
+        if not self._label_tombstones[label]:
+            return ids
+        return [n for n in ids if n not in self._deleted_nodes]
+
+    def _nodes_named(self, name, label=None):
+        """Node ids with a given name, optionally restricted to a label"""
+        if label is not None:
+            node_id = self._by_label_name.get((label, name))
+            return [] if node_id is None else [node_id]
+        return list(self._by_name.get(name, ()))
+
+    def _node_data(self, node_id):
+        """Node as record.data() renders it: a property dictionary"""
+        return dict(self._node_props[node_id])
+
+    def _rel_data(self, rel_id):
+        """Relationship as record.data() renders it: (start, type, end)"""
+        return (self._node_data(self._rel_start[rel_id]),
+                self._rel_type_name(rel_id),
+                self._node_data(self._rel_end[rel_id]))
+
+    # ------------------------------------------------------------------
+    # Graph operations
+    # ------------------------------------------------------------------
+
+    def node_count(self):
+        return len(self._node_props) - len(self._deleted_nodes)
+
+    def relationship_count(self):
+        return len(self._rel_props) - len(self._deleted_rels)
+
+    def merge_node(self, label, name, properties=None):
+        """
+        MERGE a node by label and name
+
+        Args:
+            label (str): Node label
+            name (str): Value of the name property
+            properties (dict, optional): Properties set only when the node is created
+
+        Returns:
+            tuple: (node id, True if the node was created)
+        """
+        with self._lock:
+            node_id = self._by_label_name.get((label, name))
+            if node_id is not None:
+                return node_id, False
+            props = dict(properties or {})
+            props["name"] = name
+            self._dirty = True
+            self._graph_changed()
+            return self._create_node([label], props), True
+
+    def create_node(self, labels, properties=None):
+        """Create a node with the given labels; returns its id"""
+        with self._lock:
+            self._dirty = True
+            self._graph_changed()
+            return self._create_node(labels, properties)
+
+    def add_relationship(self, start, rel_type, end, properties=None):
+        """Create a typed relationship between two node ids; returns its id"""
+        with self._lock:
+            self._dirty = True
+            self._graph_changed()
+            return self._append_rel(start, end, self._type_id(rel_type), properties)
+
+    def neighbors(self, node_id, rel_types=None, direction="both"):
+        """
+        Typed neighbor expansion
+
+        Args:
+            node_id (int): Node to expand
+            rel_types (list, optional): Relationship types to follow
+            direction (str): "out", "in" or "both"
+
+        Returns:
+            list: (relationship type, neighbor id) pairs
+        """
+        with self._lock:
+            return [(self._rel_type_name(rel_id), other)
+                    for rel_id, other in self._rels(node_id, direction, rel_types)]
+
+    def expand(self, node_ids, max_depth=3, rel_types=None, direction="both"):
+        """
+        Variable-length expansion up to max_depth hops (breadth first)
+
+        Args:
+            node_ids (iterable): Start node ids
+            max_depth (int): Maximum hops, capped at 3 like the Cypher callers
+            rel_types (list, optional): Relationship types to follow
+            direction (str): "out", "in" or "both"
+
+        Returns:
+            tuple: ({node id: depth}, [relationship ids traversed])
+        """
+        max_depth = max(0, min(max_depth, 3))
+        with self._lock:
+            depth = {node_id: 0 for node_id in node_ids}
+            rel_ids = []
+            seen_rels = set()
+            queue = deque(depth)
+            while queue:
+                node_id = queue.popleft()
+                if depth[node_id] >= max_depth:
+                    continue
+                for rel_id, other in self._rels(node_id, direction, rel_types):
+                    if rel_id not in seen_rels:
+                        seen_rels.add(rel_id)
+                        rel_ids.append(rel_id)
+                    if other not in depth:
+                        depth[other] = depth[node_id] + 1
+                        queue.append(other)
+            return depth, rel_ids
+
+    def count_by_label(self):
+        """Node count per label, largest first"""
+        with self._lock:
+            counts = [{"label": label, "count": len(ids) - self._label_tombstones[label]}
+                      for label, ids in self._by_label.items()
+                      if len(ids) > self._label_tombstones[label]]
+        return _sort(counts, ("count", True))
+
+    def _count_statistics(self):
+        """Graph-wide counts from the in-memory indexes"""
+        return {
+            "node_count": self.node_count(),
+            "relationship_count": self.relationship_count(),
+            "labels": {row["label"]: row["count"] for row in self.count_by_label()},
+            "relationship_types": {row["rel_type"]: row["count"]
+                                   for row in self.count_by_relationship_type()},
+            "source": "embedded"
+        }
+
+    def count_by_relationship_type(self):
+        """Relationship count per type, largest first"""
+        with self._lock:
+            counts = Counter(self._rel_type)
+            counts.subtract(self._rel_type[r] for r in self._deleted_rels)
+            rows = [{"rel_type": self._type_names[type_id], "count": count}
+                    for type_id, count in counts.items() if count > 0]
+        return _sort(rows, ("count", True))
+
+    def aggregate_property(self, label, prop):
+        """
+        Aggregate a numeric property over all nodes with a label
+
+        Args:
+            label (str): Node label
+            prop (str): Property name
+
+        Returns:
+            dict: count, sum, avg, min, max and stdev of the numeric values
+        """
+        with self._lock:
+            values = [_to_float(self._node_props[n].get(prop)) for n in self._nodes_with_label(label)]
+        values = [v for v in values if v is not None]
+        return {
+            "count": len(values),
+            "sum": sum(values),
+            "avg": _avg(values),
+            "min": min(values) if values else None,
+            "max": max(values) if values else None,
+            "stdev": _stdev(values)
+        }
+
+    # ------------------------------------------------------------------
+    # GraphStore interface
+    # ------------------------------------------------------------------
+
+    def _dispatch(self, query, parameters):
+        """Run the embedded implementation of a registered query"""
+        name = QUERIES.name_of(query)
+        handler = _QUERY_HANDLERS.get(name)
+        if handler is None:
+            first_line = next((line.strip() for line in query.splitlines() if line.strip()), "")
+            raise NotImplementedError(
+                f"Embedded graph store has no implementation for query "
+                f"{name or 'ad-hoc'}: {first_line[:80]}")
+        self.query_counts[name] += 1
+        with self._lock:
+            return handler(self, parameters or {})
+
+    def execute_read(self, query, parameters=None):
+        """Run a registered read query against the in-memory graph"""
+        return self._dispatch(query, parameters)
+
+    def execute_write(self, query, parameters=None):
+        """Run a registered write query against the in-memory graph"""
+        return self._dispatch(query, parameters)
+
+    def stream_query(self, query, parameters=None, batch_size=None, fetch_size=None,
+                     read_only=True):
+        """Yield records (or batches) of a registered query"""
+        records = self.execute_read(query, parameters) if read_only else self.execute_write(query, parameters)
+        if batch_size:
+            for start in range(0, len(records), batch_size):
+                yield records[start:start + batch_size]
+        else:
+            yield from records
+
+    @contextmanager
+    def unit_of_work(self, read_only=True, transaction=False):
+        """No session to share in-process; yields the store itself"""
+        yield self
+
+    def verify_indexes(self, force=False):
+        """Name and label indexes are maintained on write; nothing to apply"""
+        return {"version": None, "applied": [], "failed": [], "skipped": True}
+
+    def get_query_stats(self, top=5):
+        """Counts of named queries served by the embedded store"""
+        counts = Counter(self.query_counts)
+        return {
+            "total_queries": sum(counts.values()),
+            "distinct_queries": len(counts),
+            "top_queries": [{"query": name, "count": count} for name, count in counts.most_common(top)],
+            "registry": QUERIES.get_stats()
+        }
+
+    def reset_query_stats(self):
+        self.query_counts.clear()
+
+    def find_entity(self, entity_name, entity_types=None, mode="fuzzy"):
+        """Find nodes by exact or case-insensitive substring name match"""
+        return self.execute_read(QUERIES.render("find_entity_regex"), {
+            "name": entity_name,
+            "fuzzy_name": f"(?i).*{re.escape(entity_name)}.*",
+            "entity_types": entity_types or None
+        })
+
+    def create_entity(self, entity_type, properties):
+        """Create a new entity node in the graph"""
+        node_id = self.create_node([entity_type], properties)
+        return [{"e": self._node_data(node_id)}]
+
+    def create_relationship(self, from_node, relationship, to_node, properties=None):
+        """Create a relationship between two node ids"""
+        rel_id = self.add_relationship(from_node, relationship, to_node, properties)
+        return [{"r": self._rel_data(rel_id)}]
+
+    def add_triplet(self, subject_type, subject_props, predicate, object_type, object_props,
+                    rel_props=None):
+        """Add a subject-predicate-object triplet to the graph"""
+        with self._lock:
+            subject_id, _ = self.merge_node(subject_type, subject_props.get("name"), subject_props)
+            object_id, _ = self.merge_node(object_type, object_props.get("name"), object_props)
+            rel_id = self.add_relationship(subject_id, predicate, object_id, rel_props)
+            return [{"s": self._node_data(subject_id), "r": self._rel_data(rel_id),
+                     "o": self._node_data(object_id)}]
+
+    def add_triplets_batch(self, triplets, batch_size=None):
+        """
+        Add many triplets; same statistics shape as Neo4jManager.add_triplets_batch
+
+        Args:
+            triplets (list): Triplet dicts with subject_type, subject_props,
+                             predicate, object_type, object_props and rel_props
+            batch_size (int, optional): Rows per reported batch
+
+        Returns:
+            dict: Totals plus per-batch created/merged counts
+        """
+        batch_size = batch_size or config.NEO4J_BATCH_SIZE
+        stats = {"triplets": 0, "nodes_created": 0, "nodes_merged": 0,
+                 "relationships_created": 0, "errors": 0, "batches": []}
+
+        groups = {}
+        for t in triplets:
+            groups.setdefault((t["subject_type"], t["predicate"], t["object_type"]), []).append(t)
+
+        with self._lock:
+            for (subject_type, predicate, object_type), rows in groups.items():
+                for start in range(0, len(rows), batch_size):
+                    batch = rows[start:start + batch_size]
+                    created = 0
+                    for t in batch:
+                        subject_id, s_created = self.merge_node(
+                            subject_type, t["subject_props"].get("name"), t["subject_props"])
+                        object_id, o_created = self.merge_node(
+                            object_type, t["object_props"].get("name"), t["object_props"])
+                        self.add_relationship(subject_id, predicate, object_id, t.get("rel_props"))
+                        created += s_created + o_created
+
+                    stats["triplets"] += len(batch)
+                    stats["nodes_created"] += created
+                    stats["nodes_merged"] += 2 * len(batch) - created
+                    stats["relationships_created"] += len(batch)
+                    stats["batches"].append({
+                        "group": f"{subject_type}-{predicate}->{object_type}",
+                        "rows": len(batch),
+                        "nodes_created": created,
+                        "nodes_merged": 2 * len(batch) - created,
+                        "relationships_created": len(batch)
+                    })
+
+        return stats
+
+    def import_triplets_batch(self, triplets, batch_size=None):
+        """
+        Import extractor triplets as :Entity nodes with the same idempotent
+        (subject, predicate, object, context) relationship key as Neo4jManager
+
+        Args:
+            triplets (list): Triplet dictionaries with subject, predicate, object data
+            batch_size (int, optional): Unused; kept for interface compatibility
+
+        Returns:
+            dict: Import statistics
+        """
+        stats = {"imported": 0, "errors": 0, "skipped": 0, "nodes_created": 0,
+                 "relationships_created": 0, "elapsed_seconds": 0.0, "triplets_per_sec": 0.0}
+        start_time = datetime.now()
+
+        with self._lock:
+            for t in triplets:
+                subject = t.get("subject", "")
+                obj = t.get("object", "")
+                predicate = ''.join(c for c in str(t.get("predicate", "")).upper()
+                                    if c.isalnum() or c == '_')
+                if not subject or not obj or not predicate:
+                    stats["skipped"] += 1
+                    continue
+
+                now = datetime.now().isoformat()
+                subject_id, s_created = self.merge_node(
+                    "Entity", subject, {"type": t.get("subject_type", "Entity"), "created_at": now})
+                object_id, o_created = self.merge_node(
+                    "Entity", obj, {"type": t.get("object_type", "Entity"), "created_at": now})
+                stats["nodes_created"] += s_created + o_created
+
+                context = t.get("context", "")
+                confidence = t.get("confidence", 0.5)
+                existing = next((rel_id for rel_id, other in self._rels(subject_id, "out", [predicate])
+                                 if other == object_id
+                                 and self._rel_props[rel_id].get("context") == context), None)
+                if existing is None:
+                    self.add_relationship(subject_id, predicate, object_id, {
+                        "context": context,
+                        "created_at": now,
+                        "source": t.get("extraction_method", "unknown"),
+                        "timestamp": t.get("timestamp", now),
+                        "confidence": confidence
+                    })
+                    stats["relationships_created"] += 1
+                else:
+                    props = self._rel_props[existing]
+                    current = props.get("confidence")
+                    if current is None or (confidence is not None and confidence > current):
+                        props["confidence"] = confidence
+                        self._dirty = True
+                        self._graph_changed()
+                stats["imported"] += 1
+
+        elapsed = (datetime.now() - start_time).total_seconds()
+        stats["elapsed_seconds"] = round(elapsed, 3)
+        stats["triplets_per_sec"] = round(stats["imported"] / elapsed, 1) if elapsed > 0 else 0.0
+        return stats
+
+    def _delete_relationships(self, rel_ids):
+        """
+        Delete relationships and the endpoint nodes they leave isolated
+
+        Rows are tombstoned in place, so the cost is proportional to the
+        rows deleted and the ids of everything else are unchanged.
+
+        Returns:
+            tuple: (relationships deleted, orphan nodes deleted)
+        """
+        drop = set(rel_ids) - self._deleted_rels
+        if not drop:
+            return 0, 0
+
+        endpoints = set()
+        for rel_id in drop:
+            start, end = self._rel_start[rel_id], self._rel_end[rel_id]
+            endpoints.update((start, end))
+            source_id = self._rel_props[rel_id].get("source_doc")
+            if source_id is not None and source_id in self._doc_rels:
+                self._doc_rels[source_id].remove(rel_id)
+                if not self._doc_rels[source_id]:
+                    del self._doc_rels[source_id]
+            self._rel_props[rel_id] = None
+        self._deleted_rels.update(drop)
+
+        for node_id in endpoints:
+            self._out[node_id] = array('l', (r for r in self._out[node_id] if r not in drop))
+            self._in[node_id] = array('l', (r for r in self._in[node_id] if r not in drop))
+
+        orphans = [n for n in endpoints if not self._out[n] and not self._in[n]]
+        for node_id in orphans:
+            self._delete_node(node_id)
+
+        self._dirty = True
+        self._graph_changed()
+        self._maybe_compact()
+        return len(drop), len(orphans)
+
+    def _delete_node(self, node_id):
+        """Tombstone a node without relationships and drop it from the lookup indexes"""
+        name = self._node_props[node_id].get("name")
+        if name is not None:
+            named = self._by_name.get(name)
+            if named is not None:
+                named.remove(node_id)
+                if not named:
+                    del self._by_name[name]
+            for label in self._node_labels[node_id]:
+                if self._by_label_name.get((label, name)) == node_id:
+                    del self._by_label_name[(label, name)]
+                    # Another node of the label with this name becomes the MERGE target
+                    other = next((n for n in self._by_name.get(name, ())
+                                  if label in self._node_labels[n]), None)
+                    if other is not None:
+                        self._by_label_name[(label, name)] = other
+        for label in self._node_labels[node_id]:
+            self._label_tombstones[label] += 1
+        self._node_props[node_id] = None
+        self._deleted_nodes.add(node_id)
+
+    def _maybe_compact(self):
+        """Compact once deleted rows exceed config.GRAPH_COMPACT_RATIO of the store"""
+        rows = len(self._node_props) + len(self._rel_props)
+        deleted = len(self._deleted_nodes) + len(self._deleted_rels)
+        if rows and deleted / rows > config.GRAPH_COMPACT_RATIO:
+            self._compact()
+
+    def _compact(self):
+        """
+        Rebuild the arrays without tombstoned rows
+
+        Node and relationship ids change, so ids from earlier reads
+        (e.g. iter_subgraph batches) must not be used afterwards.
+        """
+        if not self._deleted_nodes and not self._deleted_rels:
+            return
+
+        node_labels, node_props = self._node_labels, self._node_props
+        rels = list(zip(self._rel_start, self._rel_end, self._rel_type, self._rel_props))
+        type_names, documents = self._type_names, self._documents
+        removed = len(self._deleted_nodes) + len(self._deleted_rels)
+
+        self._reset()
+        self._type_names = type_names
+        self._type_ids = {name: i for i, name in enumerate(type_names)}
+        self._documents = documents
+
+        new_ids = {}
+        for node_id, (labels, props) in enumerate(zip(node_labels, node_props)):
+            if props is not None:
+                new_ids[node_id] = self._create_node(labels, props)
+        for start, end, type_id, props in rels:
+            if props is not None:
+                self._append_rel(new_ids[start], new_ids[end], type_id, props)
+
+        self._graph_changed()
+        logger.info(f"Compacted embedded graph: {removed} deleted rows removed")
+
+    def _document_rels(self, source_id, keys=None):
+        """Ids of the relationships a document produced (all, or those with the given keys)"""
+        return [rel_id for rel_id in self._doc_rels.get(source_id, ())
+                if keys is None or self._rel_props[rel_id].get("triplet_key") in keys]
+
+    def get_document(self, source_id):
+        """Stored content_hash and triplet_keys of a document, or None if unknown"""
+        with self._lock:
+            document = self._documents.get(source_id)
+            if document is None:
+                return None
+            return {"content_hash": document["content_hash"],
+                    "triplet_keys": list(document["triplet_keys"])}
+
+    def upsert_document(self, source_id, content_hash, triplets, name=None):
+        """
+        Bring the graph in line with the current contents of a document;
+        same diff semantics and statistics as Neo4jManager.upsert_document
+
+        Args:
+            source_id (str): Stable document id (e.g. its path)
+            content_hash (str): Hash of the document content
+            triplets (list): Prepared triplet rows (as taken by add_triplets_batch)
+            name (str, optional): Display name of the document
+
+        Returns:
+            dict: status plus added/removed/unchanged relationship counts
+        """
+        stats = {"source_id": source_id, "status": "unchanged", "added": 0, "removed": 0,
+                 "unchanged": 0, "orphans_deleted": 0}
+
+        with self._lock:
+            existing = self._documents.get(source_id)
+            if existing and existing["content_hash"] == content_hash:
+                stats["unchanged"] = len(existing["triplet_keys"])
+                return stats
+
+            rows = {}
+            for t in triplets:
+                rows.setdefault(self.triplet_key(source_id, t), t)
+
+            old_keys = set(existing["triplet_keys"]) if existing else set()
+            removed = old_keys - rows.keys()
+            if removed:
+                stats["removed"], stats["orphans_deleted"] = self._delete_relationships(
+                    self._document_rels(source_id, removed))
+
+            for key, t in rows.items():
+                if key in old_keys:
+                    continue
+                subject_id, _ = self.merge_node(t["subject_type"], t["subject_props"].get("name"),
+                                                t["subject_props"])
+                object_id, _ = self.merge_node(t["object_type"], t["object_props"].get("name"),
+                                               t["object_props"])
+                self.add_relationship(subject_id, t["predicate"], object_id,
+                                      {**(t.get("rel_props") or {}), "triplet_key": key,
+                                       "source_doc": source_id})
+                stats["added"] += 1
+
+            self._documents[source_id] = {"name": name or source_id, "content_hash": content_hash,
+                                          "triplet_keys": sorted(rows)}
+            self._dirty = True
+
+        stats["status"] = "updated" if existing else "created"
+        stats["unchanged"] = len(rows) - stats["added"]
+        logger.info(f"Document {source_id} {stats['status']}: {stats['added']} relationships added, "
+                    f"{stats['removed']} removed, {stats['unchanged']} unchanged")
+        return stats
+
+    def delete_by_source(self, source_id):
+        """
+        Remove a document's relationships, the nodes they leave isolated and
+        its provenance record
+
+        Returns:
+            dict: Counts of deleted relationships and orphan nodes
+        """
+        with self._lock:
+            deleted, orphans = self._delete_relationships(self._document_rels(source_id))
+            if self._documents.pop(source_id, None) is not None:
+                self._dirty = True
+
+        logger.info(f"Deleted document {source_id}: {deleted} relationships, {orphans} orphan nodes")
+        return {"source_id": source_id, "relationships_deleted": deleted, "orphans_deleted": orphans}
+
+    def _subgraph_start_nodes(self, entity_name, label):
+        with self._lock:
+            return self._nodes_named(entity_name, label)
+
+    def _subgraph_expand(self, node_ids, relationship_types=None):
+        with self._lock:
+            return [{"rel_id": rel_id,
+                     "type": self._rel_type_name(rel_id),
+                     "source": self._rel_start[rel_id],
+                     "target": self._rel_end[rel_id],
+                     "properties": dict(self._rel_props[rel_id]),
+                     "neighbor": other}
+                    for node_id in node_ids
+                    for rel_id, other in self._rels(node_id, "both", relationship_types)]
+
+    def _subgraph_nodes(self, node_ids):
+        with self._lock:
+            return [{"id": node_id, "labels": self._labels(node_id),
+                     "properties": self._node_data(node_id)}
+                    for node_id in node_ids if node_id not in self._deleted_nodes]
+
+    # ------------------------------------------------------------------
+    # Named query implementations
+    # ------------------------------------------------------------------
+
+    @_handles("find_entity_regex")
+    def _q_find_entity(self, p):
+        pattern = re.compile(p["fuzzy_name"])
+        types = p.get("entity_types")
+        rows = []
+        for node_id, props in enumerate(self._node_props):
+            if props is None:
+                continue
+            name = props.get("name")
+            if name is None or not (name == p["name"] or pattern.fullmatch(str(name))):
+                continue
+            if types and not (self._node_labels[node_id] & set(types)):
+                continue
+            rows.append({"n": self._node_data(node_id), "types": self._labels(node_id)})
+            if len(rows) >= 10:
+                break
+        return rows
+
+    @_handles("entity_by_name")
+    def _q_entity_by_name(self, p):
+        return [{"e": self._node_data(n)} for n in self._nodes_named(p["entity_name"], "Entity")]
+
+    def _grouped_neighbors(self, p, direction, key):
+        counts = Counter()
+        for node_id in self._nodes_named(p["entity_name"], "Entity"):
+            for rel_id, other in self._rels(node_id, direction):
+                counts[(self._rel_type_name(rel_id), self._name(other), tuple(self._labels(other)))] += 1
+        rows = [{"relationship_type": rel_type, f"{key}_name": name, f"{key}_types": list(labels),
+                 "count": count} for (rel_type, name, labels), count in counts.items()]
+        return _sort(rows, ("count", True))
+
+    @_handles("entity_outgoing_relationships")
+    def _q_entity_outgoing(self, p):
+        return self._grouped_neighbors(p, "out", "target")
+
+    @_handles("entity_incoming_relationships")
+    def _q_entity_incoming(self, p):
+        return self._grouped_neighbors(p, "in", "source")
+
+    @_handles("entity_financial_metrics")
+    def _q_entity_financials(self, p):
+        rows = []
+        for node_id in self._nodes_named(p["entity_name"], "Entity"):
+            for _, metric in self._rels(node_id, "out", ["HAS_METRIC"]):
+                if self._has_label(metric, "Metric"):
+                    m = self._node_props[metric]
+                    rows.append({"metric_name": m.get("name"), "metric_value": m.get("value"),
+                                 "metric_unit": m.get("unit"), "metric_date": m.get("timestamp")})
+        return rows
+
+    @_handles("search_entities_regex")
+    def _q_search_entities(self, p):
+        pattern = re.compile(p["pattern"])
+        rows = [{"name": self._name(n), "types": self._labels(n), "connection_count": self._degree(n)}
+                for n in self._nodes_with_label("Entity")
+                if self._name(n) is not None and pattern.fullmatch(str(self._name(n)))]
+        return _sort(rows, ("connection_count", True))[:p.get("limit", 10)]
+
+    def _entity_metrics(self, metric_names=None):
+        """Yield (entity id, metric id) for Entity-[:HAS_METRIC]->Metric paths"""
+        for entity in self._nodes_with_label("Entity"):
+            for _, metric in self._rels(entity, "out", ["HAS_METRIC"]):
+                if not self._has_label(metric, "Metric"):
+                    continue
+                if metric_names is not None and self._node_props[metric].get("name") not in metric_names:
+                    continue
+                yield entity, metric
+
+    @_handles("risk_metrics_financial")
+    def _q_risk_metrics_financial(self, p):
+        names = {'revenue', 'profit', 'cash_flow', 'debt_to_equity', 'current_ratio'}
+        rows = []
+        for entity, metric in self._entity_metrics(names):
+            m = self._node_props[metric]
+            value = _to_float(m.get("value"))
+            name = m.get("name")
+            decreased = any(True for _ in self._rels(metric, "in", ["DECREASED"]))
+            risky = ((name == 'debt_to_equity' and value is not None and value > 2.0)
+                     or (name == 'current_ratio' and value is not None and value < 1.0)
+                     or (name in ('revenue', 'profit') and decreased)
+                     or (name == 'cash_flow' and value is not None and value < 0))
+            if risky:
+                rows.append({"entity": self._name(entity), "metric": name, "value": m.get("value"),
+                             "risk_count": 1, "unit": m.get("unit")})
+        return _sort(rows, ("risk_count", True), ("value", False))[:20]
+
+    def _process_issues(self):
+        """Yield (entity, process, issue) ids for Entity-[:HAS_PROCESS]->Process-[:HAS_ISSUE]->()"""
+        for entity in self._nodes_with_label("Entity"):
+            for _, process in self._rels(entity, "out", ["HAS_PROCESS"]):
+                if self._has_label(process, "Process"):
+                    for _, issue in self._rels(process, "out", ["HAS_ISSUE"]):
+                        yield entity, process, issue
+
+    def _market_trends(self, keywords):
+        """Yield (entity, market, trend) ids for trends whose name contains a keyword"""
+        for entity in self._nodes_with_label("Entity"):
+            for _, market in self._rels(entity, "out", ["OPERATES_IN", "COMPETES_WITH"]):
+                for _, trend in self._rels(market, "out", ["HAS_EMERGING_TREND"]):
+                    name = self._name(trend)
+                    if isinstance(name, str) and any(k in name for k in keywords):
+                        yield entity, market, trend
+
+    @_handles("risk_metrics_operational", "risk_query_operational")
+    def _q_risk_operational(self, p):
+        counts = Counter(self._process_issues())
+        rows = [{"entity": self._name(e), "process": self._name(pr),
+                 "issue": self._node_props[i].get("description"), "risk_count": count}
+                for (e, pr, i), count in counts.items()]
+        return _sort(rows, ("risk_count", True))[:20]
+
+    @_handles("risk_metrics_market")
+    def _q_risk_metrics_market(self, p):
+        counts = Counter(self._market_trends(('declin', 'decrease', 'disrupt', 'threat')))
+        rows = [{"entity": self._name(e), "market": self._name(m), "trend": self._name(t),
+                 "risk_count": count} for (e, m, t), count in counts.items()]
+        return _sort(rows, ("risk_count", True))[:20]
+
+    @_handles("risk_query_market")
+    def _q_risk_query_market(self, p):
+        counts = Counter(self._market_trends(('declin', 'decrease')))
+        rows = [{"entity": self._name(e), "market": self._name(m), "trend": self._name(t),
+                 "risk_count": count} for (e, m, t), count in counts.items()]
+        return _sort(rows, ("risk_count", True))[:20]
+
+    @_handles("risk_query_financial")
+    def _q_risk_query_financial(self, p):
+        names = {'revenue', 'profit', 'cash_flow', 'debt_to_equity', 'current_ratio'}
+        counts = Counter(self._entity_metrics(names))
+        rows = []
+        for (entity, metric), count in counts.items():
+            m = self._node_props[metric]
+            rows.append({"entity": self._name(entity), "metric": m.get("name"), "value": m.get("value"),
+                         "unit": m.get("unit"), "risk_count": count})
+        return _sort(rows, ("risk_count", True))[:20]
+
+    @_handles("partnership_opportunities")
+    def _q_partnership_opportunities(self, p):
+        rows = []
+        for entity in self._nodes_named(p["entity_name"], "Entity"):
+            partners = {n for _, n in self._rels(entity, "both", ["PARTNERED_WITH"])}
+            own_strengths = {self._name(s) for _, s in self._rels(entity, "out", ["HAS_STRENGTH"])
+                             if self._has_label(s, "Strength")}
+            shared = Counter()
+            for _, market in self._rels(entity, "out", ["COMPETES_WITH"]):
+                if not self._has_label(market, "Market"):
+                    continue
+                for _, partner in self._rels(market, "in", ["COMPETES_WITH"]):
+                    if (partner != entity and self._has_label(partner, "Entity")
+                            and partner not in partners and self._degree(partner) > 5):
+                        shared[partner] += 1
+            for partner, shared_markets in shared.items():
+                strengths = []
+                for _, s in self._rels(partner, "out", ["HAS_STRENGTH"]):
+                    name = self._name(s)
+                    if self._has_label(s, "Strength") and name not in own_strengths and name not in strengths:
+                        strengths.append(name)
+                if strengths:
+                    rows.append({"potential_partner": self._name(partner),
+                                 "complementary_strengths": strengths,
+                                 "shared_markets": shared_markets,
+                                 "_size": len(strengths)})
+        _sort(rows, ("shared_markets", True), ("_size", True))
+        return [{k: v for k, v in row.items() if k != "_size"} for row in rows[:10]]
+
+    @_handles("expansion_opportunities")
+    def _q_expansion_opportunities(self, p):
+        markets = {}
+        for entity in self._nodes_named(p["entity_name"], "Entity"):
+            present = {m for _, m in self._rels(entity, "out", ["COMPETES_WITH", "OPERATES_IN"])}
+            strengths = [s for _, s in self._rels(entity, "out", ["HAS_STRENGTH"])
+                         if self._has_label(s, "Strength")]
+            for market in self._nodes_with_label("Market"):
+                if market in present:
+                    continue
+                # Strength names held by entities competing in this market
+                competitor_strengths = set()
+                for _, other in self._rels(market, "in", ["COMPETES_WITH"]):
+                    if self._has_label(other, "Entity"):
+                        competitor_strengths.update(
+                            self._name(s) for _, s in self._rels(other, "out", ["HAS_STRENGTH"])
+                            if self._has_label(s, "Strength"))
+                for s in strengths:
+                    if self._name(s) in competitor_strengths:
+                        entry = markets.setdefault(self._name(market), {"names": [], "ids": set()})
+                        if self._name(s) not in entry["names"]:
+                            entry["names"].append(self._name(s))
+                        entry["ids"].add(s)
+        rows = [{"potential_market": market, "relevant_strengths": entry["names"],
+                 "strength_count": len(entry["ids"])} for market, entry in markets.items()]
+        return _sort(rows, ("strength_count", True))[:10]
+
+    @_handles("central_entities")
+    def _q_central_entities(self, p):
+        rows = [{"entity": self._name(n), "connections": self._degree(n)}
+                for n in self._nodes_with_label("Entity")]
+        return _sort(rows, ("connections", True))[:10]
+
+    @_handles("entity_assessments")
+    def _q_entity_assessments(self, p):
+        rows = []
+        for entity in self._nodes_with_label("Entity"):
+            for _, a in self._rels(entity, "out", ["HAS_ASSESSMENT"]):
+                props = self._node_props[a]
+                rows.append({"entity": self._name(entity), "assessment_name": props.get("name"),
+                             "risk_score": props.get("risk_score")})
+        return rows
+
+    def _entity_risks(self):
+        """Yield (entity, risk) ids for Entity-[:HAS_RISK]->Risk paths"""
+        for entity in self._nodes_with_label("Entity"):
+            for _, risk in self._rels(entity, "out", ["HAS_RISK"]):
+                if self._has_label(risk, "Risk"):
+                    yield entity, risk
+
+    @_handles("average_risk_level")
+    def _q_average_risk_level(self, p):
+        levels = [_to_float(self._node_props[r].get("level")) for _, r in self._entity_risks()
+                  if self._node_props[r].get("type") == p["risk_type"]]
+        avg = _avg(levels)
+        return [{"risk_score": avg if avg is not None else p["default_level"]}]
+
+    @_handles("get_business_risks")
+    def _q_business_risks(self, p):
+        rows = []
+        for entity, risk in self._entity_risks():
+            r = self._node_props[risk]
+            if p.get("entity_name") and self._name(entity) != p["entity_name"]:
+                continue
+            if p.get("risk_types") is not None and r.get("type") not in p["risk_types"]:
+                continue
+            level = _to_float(r.get("level"))
+            if p.get("min_level") is not None and (level is None or level < p["min_level"]):
+                continue
+            strategies = [self._node_data(s) for _, s in self._rels(risk, "out", ["HAS_MITIGATION"])
+                          if self._has_label(s, "Strategy")]
+            rows.append({"entity": self._name(entity), "risk_type": r.get("type"),
+                         "risk_level": r.get("level"), "description": r.get("description"),
+                         "impact": r.get("impact"), "source": r.get("source"),
+                         "strategies": strategies})
+        return _sort(rows, ("risk_level", True))
+
+    @_handles("entity_network_metrics")
+    def _q_entity_network_metrics(self, p):
+        rows = []
+        for node_id in self._nodes_named(p["entity_name"]):
+            rels = list(self._rels(node_id))
+            if not rels:
+                continue
+            # Paths of length 1 and 2 that do not reuse a relationship
+            paths = 0
+            for rel_id, other in rels:
+                paths += 1 + sum(1 for rel2, _ in self._rels(other) if rel2 != rel_id)
+            rows.append({
+                "connection_count": len({other for _, other in rels}),
+                "relationship_count": len(rels),
+                "relationship_types": list(dict.fromkeys(self._rel_type_name(r) for r, _ in rels)),
+                "extended_network_size": paths
+            })
+        return rows
+
+    @_handles("relationship_chains")
+    def _q_relationship_chains(self, p):
+        frequency = Counter()
+        for node_id in self._node_ids():
+            incoming = Counter(self._rel_type_name(r) for r in self._in[node_id])
+            outgoing = Counter(self._rel_type_name(r) for r in self._out[node_id])
+            for type1, in_count in incoming.items():
+                for type2, out_count in outgoing.items():
+                    if type1 != type2:
+                        frequency[(type1, type2)] += in_count * out_count
+        rows = [{"type1": t1, "type2": t2, "frequency": f} for (t1, t2), f in frequency.items() if f > 2]
+        return _sort(rows, ("frequency", True))[:5]
+
+    @_handles("entity_relationship_chains")
+    def _q_entity_relationship_chains(self, p):
+        frequency = Counter()
+        for node_id in self._nodes_named(p["entity_name"]):
+            for rel1, middle in self._rels(node_id, "out"):
+                for rel2, _ in self._rels(middle, "out"):
+                    if rel2 != rel1:
+                        frequency[(self._rel_type_name(rel1), self._rel_type_name(rel2))] += 1
+        rows = [{"type1": t1, "type2": t2, "frequency": f} for (t1, t2), f in frequency.items() if f > 1]
+        return _sort(rows, ("frequency", True))[:5]
+
+    @_handles("attribute_combinations")
+    def _q_attribute_combinations(self, p):
+        counts = Counter(tuple(sorted(self._node_props[n])) for n in self._nodes_with_label("Entity"))
+        rows = [{"attributes": list(keys), "entity_count": count}
+                for keys, count in counts.items() if count > 1 and len(keys) > 3]
+        return _sort(rows, ("entity_count", True))[:5]
+
+    @_handles("relationship_cycles")
+    def _q_relationship_cycles(self, p):
+        counts = Counter()
+        for a in self._node_ids():
+            for r1, b in self._rels(a, "out"):
+                if b <= a:
+                    continue
+                for r2, c in self._rels(b, "out"):
+                    if c <= b:
+                        continue
+                    for r3, end in self._rels(c, "out"):
+                        if end == a:
+                            counts[(self._name(a), self._name(b), self._name(c),
+                                    self._rel_type_name(r1), self._rel_type_name(r2),
+                                    self._rel_type_name(r3))] += 1
+        rows = [{"node1": k[0], "node2": k[1], "node3": k[2], "rel1": k[3], "rel2": k[4],
+                 "rel3": k[5], "cycle_count": count} for k, count in counts.items()]
+        return _sort(rows, ("cycle_count", True))[:5]
+
+    def _metric_series(self, entity_ids, min_points):
+        """Group timestamped metric values by (entity name, metric name), ordered by timestamp"""
+        series = {}
+        for entity in entity_ids:
+            for _, metric in self._rels(entity, "out", ["HAS_METRIC"]):
+                m = self._node_props[metric]
+                if not self._has_label(metric, "Metric") or m.get("timestamp") is None:
+                    continue
+                series.setdefault((self._name(entity), m.get("name")), []).append(
+                    {"value": m.get("value"), "timestamp": m.get("timestamp")})
+        rows = []
+        for (entity, metric), values in sorted(series.items(), key=lambda item: tuple(map(_order_key, item[0]))):
+            values.sort(key=lambda v: _order_key(v["timestamp"]))
+            if len(values) > min_points:
+                rows.append({"entity": entity, "metric": metric, "values": values})
+        return rows
+
+    @_handles("metric_trends")
+    def _q_metric_trends(self, p):
+        return self._metric_series(self._nodes_with_label("Entity"), 1)[:10]
+
+    @_handles("entity_metric_trends")
+    def _q_entity_metric_trends(self, p):
+        return self._metric_series(self._nodes_named(p["entity_name"], "Entity"), 1)
+
+    @_handles("entity_metric_series")
+    def _q_entity_metric_series(self, p):
+        return [{"metric": row["metric"], "values": row["values"]}
+                for row in self._metric_series(self._nodes_named(p["entity_name"], "Entity"), 3)]
+
+    @_handles("relationship_growth")
+    def _q_relationship_growth(self, p):
+        groups = {}
+        for rel_id in self._rel_ids():
+            timestamp = self._rel_props[rel_id].get("timestamp")
+            if timestamp is not None:
+                groups.setdefault(self._rel_type_name(rel_id), []).append(timestamp)
+        rows = [{"relationship_type": rel_type, "rel_count": len(stamps),
+                 "first_occurrence": min(stamps, key=_order_key),
+                 "last_occurrence": max(stamps, key=_order_key)}
+                for rel_type, stamps in groups.items()]
+        return _sort(rows, ("rel_count", True))[:5]
+
+    @_handles("entity_evolution")
+    def _q_entity_evolution(self, p):
+        rows = []
+        for n in self._nodes_with_label("Entity"):
+            props = self._node_props[n]
+            if props.get("created_at") is None and props.get("mentioned_dates") is None:
+                continue
+            rows.append({"entity": props.get("name"), "created_at": props.get("created_at"),
+                         "mentioned_dates": props.get("mentioned_dates") or [],
+                         "connection_count": self._degree(n)})
+        return _sort(rows, ("connection_count", True))[:10]
+
+    @_handles("entity_connection_timeline")
+    def _q_entity_connection_timeline(self, p):
+        rows = []
+        for node_id in self._nodes_named(p["entity_name"], "Entity"):
+            for rel_id, other in self._rels(node_id):
+                timestamp = self._rel_props[rel_id].get("timestamp")
+                if timestamp is not None:
+                    rows.append({"connected_entity": self._name(other), "connection_time": timestamp})
+        return _sort(rows, ("connection_time", False))
+
+    def _metric_correlations(self, first_entities, limit):
+        by_name = {}
+        for entity, metric in self._entity_metrics():
+            m = self._node_props[metric]
+            when = _to_datetime(m.get("timestamp"))
+            if when is not None:
+                by_name.setdefault(m.get("name"), []).append((entity, when, m.get("value")))
+
+        first_entities = set(first_entities) if first_entities is not None else None
+        pairs = {}
+        window = timedelta(days=7)
+        for metric, points in by_name.items():
+            for e1, t1, v1 in points:
+                if first_entities is not None and e1 not in first_entities:
+                    continue
+                for e2, t2, v2 in points:
+                    if e1 == e2 or t2 - t1 >= window or v1 is None or v2 is None:
+                        continue
+                    pairs.setdefault((self._name(e1), self._name(e2), metric), []).append(
+                        {"v1": v1, "v2": v2})
+        rows = [{"entity1": e1, "entity2": e2, "metric": metric, "value_pairs": value_pairs}
+                for (e1, e2, metric), value_pairs in pairs.items() if len(value_pairs) > 2]
+        return rows[:limit] if limit else rows
+
+    @_handles("metric_correlations")
+    def _q_metric_correlations(self, p):
+        return self._metric_correlations(None, 5)
+
+    @_handles("entity_metric_correlations")
+    def _q_entity_metric_correlations(self, p):
+        return self._metric_correlations(self._nodes_named(p["entity_name"], "Entity"), None)
+
+    @_handles("cooccurrence")
+    def _q_cooccurrence(self, p):
+        counts = Counter()
+        for rel_id in self._rel_ids():
+            if self._rel_type_name(rel_id) in ('COMPETES_WITH', 'PARTNERED_WITH', 'OPERATES_IN'):
+                a, b = self._rel_start[rel_id], self._rel_end[rel_id]
+                if a != b:
+                    counts[(min(a, b), max(a, b))] += 1
+        rows = [{"entity1": self._name(a), "entity2": self._name(b), "frequency": f}
+                for (a, b), f in counts.items() if f > 2]
+        return _sort(rows, ("frequency", True))[:10]
+
+    @_handles("entity_cooccurrence")
+    def _q_entity_cooccurrence(self, p):
+        counts = Counter()
+        for node_id in self._nodes_named(p["entity_name"]):
+            for _, other in self._rels(node_id, "both", ['COMPETES_WITH', 'PARTNERED_WITH', 'OPERATES_IN']):
+                counts[(node_id, other)] += 1
+        rows = [{"entity1": self._name(a), "entity2": self._name(b), "frequency": f}
+                for (a, b), f in counts.items() if f > 1]
+        return _sort(rows, ("frequency", True))[:10]
+
+    @_handles("metric_outliers")
+    def _q_metric_outliers(self, p):
+        values = {}
+        paths = []
+        for entity, metric in self._entity_metrics():
+            m = self._node_props[metric]
+            if m.get("name") is None or m.get("value") is None:
+                continue
+            values.setdefault(m["name"], []).append(_to_float(m["value"]))
+            paths.append((entity, m))
+        stats = {name: (_avg(vals), _stdev(vals)) for name, vals in values.items()}
+
+        rows = []
+        for entity, m in paths:
+            avg, std = stats[m["name"]]
+            value = _to_float(m["value"])
+            if value is None or avg is None or not abs(value - avg) > 2 * std:
+                continue
+            rows.append({"entity": self._name(entity), "metric": m["name"], "value": m["value"],
+                         "avg_value": avg, "std_value": std, "z_score": abs(value - avg) / std})
+        return _sort(rows, ("z_score", True))[:10]
+
+    @_handles("entity_metric_outliers")
+    def _q_entity_metric_outliers(self, p):
+        others = {}
+        for entity, metric in self._entity_metrics():
+            if self._name(entity) != p["entity_name"]:
+                m = self._node_props[metric]
+                others.setdefault(m.get("name"), []).append(_to_float(m.get("value")))
+
+        rows = []
+        seen = set()
+        for entity in self._nodes_named(p["entity_name"], "Entity"):
+            for _, metric in self._rels(entity, "out", ["HAS_METRIC"]):
+                m = self._node_props[metric]
+                if not self._has_label(metric, "Metric") or m.get("name") is None or m.get("value") is None:
+                    continue
+                value = _to_float(m["value"])
+                key = (m["name"], value)
+                if key in seen or m["name"] not in others:
+                    continue
+                seen.add(key)
+                avg, std = _avg(others[m["name"]]), _stdev(others[m["name"]])
+                if value is None or avg is None or std <= 0 or not abs(value - avg) > 1.5 * std:
+                    continue
+                rows.append({"metric": m["name"], "value": value, "avg_value": avg,
+                             "std_value": std, "z_score": abs(value - avg) / std})
+        return _sort(rows, ("z_score", True))
+
+    @_handles("connection_anomalies")
+    def _q_connection_anomalies(self, p):
+        entities = list(self._nodes_with_label("Entity"))
+        degrees = [self._degree(n) for n in entities]
+        avg, std = _avg(degrees), _stdev(degrees)
+        if avg is None:
+            return []
+        rows = [{"entity": self._name(n), "connection_count": d, "avg_connections": avg,
+                 "std_connections": std, "z_score": abs(d - avg) / std}
+                for n, d in zip(entities, degrees) if abs(d - avg) > 2 * std]
+        return _sort(rows, ("z_score", True))[:10]
+
+    @_handles("entity_connection_anomalies")
+    def _q_entity_connection_anomalies(self, p):
+        degrees = [self._degree(n) for n in self._nodes_with_label("Entity")
+                   if self._name(n) != p["entity_name"]]
+        avg, std = _avg(degrees), _stdev(degrees)
+        rows = []
+        for node_id in self._nodes_named(p["entity_name"], "Entity"):
+            d = self._degree(node_id)
+            if avg is not None and std > 0 and abs(d - avg) > 1.5 * std:
+                rows.append({"entity": self._name(node_id), "connection_count": d,
+                             "avg_connections": avg, "std_connections": std,
+                             "z_score": abs(d - avg) / std})
+        return rows
+
+    def _entity_edge(self, rel_id):
+        return (self._name(self._rel_start[rel_id]), self._name(self._rel_end[rel_id]),
+                self._rel_type_name(rel_id))
+
+    @_handles("entity_network_edges")
+    def _q_entity_network_edges(self, p):
+        _, rel_ids = self.expand(self._nodes_named(p["name"], "Entity"), 2)
+        edges = dict.fromkeys(
+            self._entity_edge(r) for r in rel_ids
+            if self._has_label(self._rel_start[r], "Entity") and self._has_label(self._rel_end[r], "Entity"))
+        return [{"source": s, "target": t, "rel_type": rel_type} for s, t, rel_type in edges]
+
+    @_handles("network_edges")
+    def _q_network_edges(self, p):
+        rows = []
+        for rel_id in self._rel_ids():
+            if (self._has_label(self._rel_start[rel_id], "Entity")
+                    and self._has_label(self._rel_end[rel_id], "Entity")):
+                s, t, rel_type = self._entity_edge(rel_id)
+                rows.append({"source": s, "target": t, "rel_type": rel_type})
+                if len(rows) >= 1000:
+                    break
+        return rows
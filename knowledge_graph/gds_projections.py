@@ -0,0 +1,213 @@
+"""
+Graph Data Science projections for the knowledge graph component.
+Keeps named in-memory GDS graph projections per graph version so
+pagerank, louvain, betweenness and nodeSimilarity calls share one
+projection instead of re-projecting the database on every call.
+"""
+
+import time
+import uuid
+import hashlib
+import logging
+import threading
+import config
+from knowledge_graph.query_registry import QUERIES
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Algorithms run by Neo4jManager.run_graph_analytics. "params" are the
+# query parameters a caller may override besides the algorithm config.
+ALGORITHMS = {
+    "pagerank": {
+        "query": ("gds_node_scores", {"procedure": "pagerank"}),
+        "orientation": "NATURAL",
+        "default_config": {"maxIterations": 20, "dampingFactor": 0.85},
+        "params": {"limit": 20, "names": None}
+    },
+    "personalized_pagerank": {
+        "query": ("gds_personalized_pagerank", {}),
+        "orientation": "NATURAL",
+        "default_config": {"maxIterations": 20, "dampingFactor": 0.85},
+        "params": {"limit": 20, "source_name": None}
+    },
+    "centrality": {
+        "query": ("gds_node_scores", {"procedure": "betweenness"}),
+        "orientation": "NATURAL",
+        "default_config": {},
+        "params": {"limit": 20, "names": None}
+    },
+    "degree": {
+        "query": ("gds_node_scores", {"procedure": "degree"}),
+        "orientation": "UNDIRECTED",
+        "default_config": {},
+        "params": {"limit": 20, "names": None}
+    },
+    "community_detection": {
+        "query": ("gds_louvain", {}),
+        "orientation": "UNDIRECTED",
+        "default_config": {"includeIntermediateCommunities": False},
+        "params": {"limit": 100, "names": None, "min_size": 1, "member_limit": 1000}
+    },
+    "similarity": {
+        "query": ("gds_node_similarity", {}),
+        "orientation": "NATURAL",
+        "default_config": {"topK": 10, "similarityCutoff": 0.5},
+        "params": {"limit": 100}
+    }
+}
+
+class ProjectionCache:
+    """
+    Named GDS graph projections keyed by (labels, relationship types,
+    orientation) and tagged with the store's graph_version.
+
+    A projection is created on first use and reused until the store
+    records a write. Writes made by other processes are not seen by
+    graph_version, so a projection is also replaced once it is older than
+    config.GDS_PROJECTION_MAX_AGE seconds. Every request drops the stale
+    projections it finds. Names carry a per-process token, so several
+    processes sharing a database never reuse each other's projections.
+
+    A projection lives in the memory of the cluster member that created
+    it, so create, run and drop go through the store's gds_session(),
+    which routes to the same member every time.
+    """
+
+    def __init__(self, graph_store, prefix=None, max_age=None):
+        """
+        Initialize the cache
+
+        Args:
+            graph_store: Neo4jManager the projections are created on
+            prefix (str, optional): Projection name prefix
+                                    (defaults to config.GDS_PROJECTION_PREFIX)
+            max_age (float, optional): Seconds before a projection is replaced even
+                                       without local writes (defaults to
+                                       config.GDS_PROJECTION_MAX_AGE; 0 disables)
+        """
+        self.graph_store = graph_store
+        self.prefix = prefix or config.GDS_PROJECTION_PREFIX
+        self.max_age = config.GDS_PROJECTION_MAX_AGE if max_age is None else max_age
+        self._token = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._projections = {}
+        self._available = None
+        self.stats = {"hits": 0, "created": 0, "dropped": 0}
+
+    def available(self):
+        """
+        Whether the GDS library is installed and enabled (checked once)
+
+        Returns:
+            bool: True if projections can be created
+        """
+        if not config.GDS_ENABLED:
+            return False
+        if self._available is None:
+            try:
+                result = self.graph_store.execute_read(QUERIES.render("gds_version"))
+                self._available = bool(result)
+                if result:
+                    logger.info(f"Graph Data Science {result[0]['gdsVersion']} available")
+            except Exception as e:
+                logger.info(f"Graph Data Science not available: {e}")
+                self._available = False
+        return self._available
+
+    def _name(self, key, version):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:8]
+        # The sequence number keeps a replacement at the same version from
+        # colliding with a predecessor whose drop failed
+        return f"{self.prefix}_{self._token}_{digest}_v{version}_{self.stats['created']}"
+
+    def _is_current(self, entry):
+        if entry["version"] != self.graph_store.graph_version:
+            return False
+        return not self.max_age or time.monotonic() - entry["created"] < self.max_age
+
+    def _drop(self, uow, name):
+        try:
+            uow.execute_query(QUERIES.render("gds_graph_drop"), {"graph_name": name})
+            self.stats["dropped"] += 1
+        except Exception as e:
+            logger.warning(f"Could not drop GDS projection {name}: {e}")
+
+    def _drop_stale(self, uow):
+        stale = [key for key, entry in self._projections.items() if not self._is_current(entry)]
+        for key in stale:
+            self._drop(uow, self._projections.pop(key)["name"])
+        return len(stale)
+
+    def get(self, uow, node_labels=None, relationship_types=None, orientation="NATURAL"):
+        """
+        Get a projection of the current graph, creating it if needed
+
+        Args:
+            uow: Unit of work from the store's gds_session(); the algorithm
+                 must run on the same one
+            node_labels (list, optional): Labels to project (defaults to ["Entity"])
+            relationship_types (list, optional): Relationship types to project
+                                                 (all types if omitted)
+            orientation (str): NATURAL, REVERSE or UNDIRECTED
+
+        Returns:
+            dict: name, version, nodeCount and relationshipCount of the projection
+        """
+        node_labels = sorted(node_labels or ["Entity"])
+        relationship_types = sorted(relationship_types) if relationship_types else None
+        key = (tuple(node_labels), tuple(relationship_types or ()), orientation)
+
+        with self._lock:
+            self._drop_stale(uow)
+            entry = self._projections.get(key)
+            if entry is not None:
+                self.stats["hits"] += 1
+                return entry
+
+            if relationship_types:
+                relationship_projection = {rel_type: {"type": rel_type, "orientation": orientation}
+                                           for rel_type in relationship_types}
+            else:
+                relationship_projection = {"ALL": {"type": "*", "orientation": orientation}}
+
+            version = self.graph_store.graph_version
+            name = self._name(key, version)
+            result = uow.execute_query(QUERIES.render("gds_graph_project"), {
+                "graph_name": name,
+                "node_labels": node_labels,
+                "relationship_projection": relationship_projection
+            })
+            entry = {
+                "name": name,
+                "version": version,
+                "created": time.monotonic(),
+                "nodeCount": result[0]["nodeCount"] if result else 0,
+                "relationshipCount": result[0]["relationshipCount"] if result else 0
+            }
+            self._projections[key] = entry
+            self.stats["created"] += 1
+
+        logger.info(f"Created GDS projection {name}: {entry['nodeCount']} nodes, "
+                    f"{entry['relationshipCount']} relationships")
+        return entry
+
+    def drop_stale(self):
+        """Drop projections made before the latest write or past their max age; returns how many"""
+        with self._lock:
+            if not self._projections:
+                return 0
+            with self.graph_store.gds_session() as uow:
+                return self._drop_stale(uow)
+
+    def drop_all(self):
+        """Drop every projection this cache created"""
+        with self._lock:
+            if not self._projections:
+                return
+            with self.graph_store.gds_session() as uow:
+                for entry in self._projections.values():
+                    self._drop(uow, entry["name"])
+            self._projections.clear()
@@ -0,0 +1,398 @@
+"""
+Streaming subgraph writers for the knowledge graph component.
+Serialize the ("node" | "edge" | "summary", item) stream produced by
+GraphStore.iter_subgraph to GraphML, a replayable Cypher script, or
+columnar Parquet/Arrow files without holding the whole subgraph in memory.
+"""
+
+import os
+import json
+import shutil
+import logging
+import tempfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape, quoteattr
+import config
+from knowledge_graph.query_registry import quote_identifier
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def _plain_value(value):
+    """Convert driver temporal/spatial values to something JSON/XML can hold"""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_plain_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _plain_value(v) for k, v in value.items()}
+    if isinstance(value, (date, datetime)) or hasattr(value, "iso_format"):
+        return value.iso_format() if hasattr(value, "iso_format") else value.isoformat()
+    return str(value)
+
+def _json_properties(properties):
+    return json.dumps(_plain_value(properties or {}), ensure_ascii=False, sort_keys=True)
+
+class SubgraphWriter:
+    """
+    Base class for subgraph writers.
+
+    Subclasses implement write_node, write_edge and finish; write() drives
+    them from an iter_subgraph stream and returns the export statistics.
+    """
+
+    format = None
+
+    def __init__(self, path):
+        self.path = path
+        self.nodes = 0
+        self.edges = 0
+
+    def write(self, stream):
+        """
+        Consume an iter_subgraph stream
+
+        Args:
+            stream: Iterable of (kind, item) tuples
+
+        Returns:
+            dict: Output path(s), node/edge counts and the expansion summary
+        """
+        summary = {}
+        try:
+            for kind, item in stream:
+                if kind == "node":
+                    self.write_node(item)
+                    self.nodes += 1
+                elif kind == "edge":
+                    self.write_edge(item)
+                    self.edges += 1
+                else:
+                    summary = item
+            paths = self.finish()
+        except Exception:
+            self.abort()
+            raise
+
+        logger.info(f"Wrote {self.format} export with {self.nodes} nodes, {self.edges} edges")
+        return {"format": self.format, "paths": paths, "nodes": self.nodes,
+                "edges": self.edges, "truncated": summary.get("truncated", False)}
+
+    def write_node(self, node):
+        raise NotImplementedError
+
+    def write_edge(self, edge):
+        raise NotImplementedError
+
+    def finish(self):
+        """Flush and close output; returns the list of files written"""
+        raise NotImplementedError
+
+    def abort(self):
+        """Release resources after a failed export"""
+
+class GraphMLWriter(SubgraphWriter):
+    """
+    GraphML XML writer.
+
+    GraphML declares every attribute <key> before the graph, but property
+    names are only known once the stream has been read. The graph body is
+    therefore spooled to a temporary file next to the target and copied
+    behind the header at the end, so memory use stays constant.
+    """
+
+    format = "graphml"
+
+    def __init__(self, path):
+        super().__init__(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._body = tempfile.NamedTemporaryFile("w+", encoding="utf-8", delete=False,
+                                                 dir=os.path.dirname(path) or ".",
+                                                 suffix=".graphml.part")
+        self._keys = {"node": {}, "edge": {}}
+
+    def _key(self, domain, name, value):
+        if isinstance(value, bool):
+            attr_type = "boolean"
+        elif isinstance(value, int):
+            attr_type = "long"
+        elif isinstance(value, float):
+            attr_type = "double"
+        else:
+            attr_type = "string"
+
+        keys = self._keys[domain]
+        if name not in keys:
+            keys[name] = (f"{domain[0]}{len(keys)}", attr_type)
+        elif keys[name][1] != attr_type:
+            # Keys are written last, so a property with mixed types can
+            # still be widened: long + double -> double, otherwise string
+            widened = "double" if {keys[name][1], attr_type} == {"long", "double"} else "string"
+            keys[name] = (keys[name][0], widened)
+        return keys[name]
+
+    def _data(self, domain, properties):
+        parts = []
+        for name, value in (properties or {}).items():
+            value = _plain_value(value)
+            if value is None:
+                continue
+            key_id, attr_type = self._key(domain, name, value)
+            if isinstance(value, bool):
+                text = "true" if value else "false"
+            elif attr_type == "string" or isinstance(value, (list, dict)):
+                text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+            else:
+                text = repr(value)
+            parts.append(f'<data key="{key_id}">{escape(text)}</data>')
+        return "".join(parts)
+
+    def write_node(self, node):
+        labels = quoteattr(":" + ":".join(node["labels"])) if node["labels"] else '""'
+        self._body.write(f'    <node id="n{node["id"]}" labels={labels}>'
+                         f'{self._data("node", node["properties"])}</node>\n')
+
+    def write_edge(self, edge):
+        self._body.write(f'    <edge id="e{self.edges}" source="n{edge["source"]}" '
+                         f'target="n{edge["target"]}" label={quoteattr(edge["type"])}>'
+                         f'{self._data("edge", edge["properties"])}</edge>\n')
+
+    def finish(self):
+        self._body.flush()
+        self._body.seek(0)
+        with open(self.path, "w", encoding="utf-8") as out:
+            out.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                      '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+            for domain, keys in self._keys.items():
+                for name, (key_id, attr_type) in keys.items():
+                    out.write(f'  <key id="{key_id}" for="{domain}" attr.name={quoteattr(name)} '
+                              f'attr.type="{attr_type}"/>\n')
+            out.write('  <graph id="G" edgedefault="directed">\n')
+            shutil.copyfileobj(self._body, out)
+            out.write('  </graph>\n</graphml>\n')
+        self.abort()
+        return [self.path]
+
+    def abort(self):
+        if not self._body.closed:
+            self._body.close()
+        if os.path.exists(self._body.name):
+            os.remove(self._body.name)
+
+def _cypher_literal(value):
+    """Render a property value as a Cypher literal"""
+    value = _plain_value(value)
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, list):
+        return "[" + ", ".join(_cypher_literal(v) for v in value) + "]"
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{quote_identifier(str(k))}: {_cypher_literal(v)}"
+                               for k, v in value.items()) + "}"
+    # JSON string escapes (\", \\, \n, \uXXXX) are valid in Cypher strings
+    return json.dumps(value)
+
+class CypherScriptWriter(SubgraphWriter):
+    """
+    Replayable Cypher script writer, for cypher-shell -f.
+
+    Nodes are buffered per label set and edges per relationship type, and
+    each buffer is flushed as one UNWIND statement of up to batch_size
+    rows. Nodes carry a temporary export id (with a uniqueness constraint)
+    so edge batches can match their endpoints; the script removes it at
+    the end.
+    """
+
+    format = "cypher"
+
+    EXPORT_LABEL = "_ExportNode"
+    EXPORT_ID = "_export_id"
+
+    def __init__(self, path, batch_size=None):
+        super().__init__(path)
+        self.batch_size = batch_size or config.NEO4J_BATCH_SIZE
+        self._node_batches = {}
+        self._edge_batches = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._out = open(path, "w", encoding="utf-8")
+        self._out.write(f"CREATE CONSTRAINT export_node_id IF NOT EXISTS "
+                        f"FOR (n:{self.EXPORT_LABEL}) REQUIRE n.{self.EXPORT_ID} IS UNIQUE;\n")
+
+    def _flush_nodes(self, labels):
+        rows = self._node_batches.pop(labels, [])
+        if not rows:
+            return
+        label_clause = "".join(f":{quote_identifier(label)}" for label in labels)
+        self._out.write(f"UNWIND [{', '.join(rows)}] AS row\n"
+                        f"CREATE (n:{self.EXPORT_LABEL}{label_clause} {{{self.EXPORT_ID}: row.id}})\n"
+                        f"SET n += row.properties;\n")
+
+    def _flush_edges(self, rel_type):
+        rows = self._edge_batches.pop(rel_type, [])
+        if not rows:
+            return
+        # Endpoints may still be sitting in node buffers
+        for labels in list(self._node_batches):
+            self._flush_nodes(labels)
+        self._out.write(f"UNWIND [{', '.join(rows)}] AS row\n"
+                        f"MATCH (a:{self.EXPORT_LABEL} {{{self.EXPORT_ID}: row.source}})\n"
+                        f"MATCH (b:{self.EXPORT_LABEL} {{{self.EXPORT_ID}: row.target}})\n"
+                        f"CREATE (a)-[r:{quote_identifier(rel_type)}]->(b)\n"
+                        f"SET r = row.properties;\n")
+
+    def write_node(self, node):
+        labels = tuple(sorted(node["labels"]))
+        batch = self._node_batches.setdefault(labels, [])
+        batch.append(f"{{id: {node['id']}, properties: {_cypher_literal(node['properties'])}}}")
+        if len(batch) >= self.batch_size:
+            self._flush_nodes(labels)
+
+    def write_edge(self, edge):
+        batch = self._edge_batches.setdefault(edge["type"], [])
+        batch.append(f"{{source: {edge['source']}, target: {edge['target']}, "
+                     f"properties: {_cypher_literal(edge['properties'])}}}")
+        if len(batch) >= self.batch_size:
+            self._flush_edges(edge["type"])
+
+    def finish(self):
+        for labels in list(self._node_batches):
+            self._flush_nodes(labels)
+        for rel_type in list(self._edge_batches):
+            self._flush_edges(rel_type)
+        self._out.write(f"MATCH (n:{self.EXPORT_LABEL})\n"
+                        f"CALL {{ WITH n REMOVE n:{self.EXPORT_LABEL}, n.{self.EXPORT_ID} }} "
+                        f"IN TRANSACTIONS OF {self.batch_size} ROWS;\n"
+                        f"DROP CONSTRAINT export_node_id IF EXISTS;\n")
+        self._out.close()
+        return [self.path]
+
+    def abort(self):
+        if not self._out.closed:
+            self._out.close()
+
+class ColumnarWriter(SubgraphWriter):
+    """
+    Columnar node and edge tables as Parquet or Arrow IPC files.
+
+    Writes <path>_nodes.<ext> (id, labels, properties) and
+    <path>_edges.<ext> (source, target, type, properties), one record batch
+    per batch_size rows. Properties are heterogeneous across labels, so
+    they are stored as a JSON string column. Requires pyarrow.
+    """
+
+    def __init__(self, path, format="parquet", batch_size=None):
+        super().__init__(path)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(f"pyarrow is required for {format} export: {e}")
+
+        self.format = format
+        self.batch_size = batch_size or config.NEO4J_BATCH_SIZE
+        self._pa = pa
+        self._pq = pq
+        ext = "parquet" if format == "parquet" else "arrow"
+        base = path[:-len(ext) - 1] if path.endswith(f".{ext}") else path
+        self.node_path = f"{base}_nodes.{ext}"
+        self.edge_path = f"{base}_edges.{ext}"
+        os.makedirs(os.path.dirname(self.node_path) or ".", exist_ok=True)
+
+        self._schemas = {
+            "nodes": pa.schema([("id", pa.int64()), ("labels", pa.list_(pa.string())),
+                                ("properties", pa.string())]),
+            "edges": pa.schema([("source", pa.int64()), ("target", pa.int64()),
+                                ("type", pa.string()), ("properties", pa.string())])
+        }
+        self._buffers = {"nodes": [], "edges": []}
+        self._writers = {}
+
+    def _open(self, table):
+        path = self.node_path if table == "nodes" else self.edge_path
+        schema = self._schemas[table]
+        if self.format == "parquet":
+            return self._pq.ParquetWriter(path, schema)
+        return self._pa.ipc.new_file(path, schema)
+
+    def _flush(self, table):
+        rows = self._buffers[table]
+        if table not in self._writers:
+            self._writers[table] = self._open(table)
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        batch = self._pa.RecordBatch.from_arrays(
+            [self._pa.array(list(column), type=field.type)
+             for column, field in zip(columns, self._schemas[table])],
+            schema=self._schemas[table])
+        if self.format == "parquet":
+            self._writers[table].write_batch(batch)
+        else:
+            self._writers[table].write(batch)
+        self._buffers[table] = []
+
+    def write_node(self, node):
+        self._buffers["nodes"].append((node["id"], list(node["labels"]),
+                                       _json_properties(node["properties"])))
+        if len(self._buffers["nodes"]) >= self.batch_size:
+            self._flush("nodes")
+
+    def write_edge(self, edge):
+        self._buffers["edges"].append((edge["source"], edge["target"], edge["type"],
+                                       _json_properties(edge["properties"])))
+        if len(self._buffers["edges"]) >= self.batch_size:
+            self._flush("edges")
+
+    def finish(self):
+        for table in ("nodes", "edges"):
+            self._flush(table)
+        self.abort()
+        return [self.node_path, self.edge_path]
+
+    def abort(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+WRITERS = {
+    "graphml": GraphMLWriter,
+    "cypher": CypherScriptWriter,
+    "parquet": ColumnarWriter,
+    "arrow": ColumnarWriter
+}
+
+def create_writer(format, path, batch_size=None):
+    """
+    Create the writer for an export format
+
+    Args:
+        format (str): graphml, cypher, parquet or arrow
+        path (str): Output file (columnar formats derive _nodes/_edges files from it)
+        batch_size (int, optional): Rows per UNWIND statement or record batch
+
+    Returns:
+        SubgraphWriter: Writer ready to consume an iter_subgraph stream
+
+    Raises:
+        ValueError: For an unknown format
+    """
+    writer_class = WRITERS.get(format)
+    if writer_class is None:
+        raise ValueError(f"Unsupported export format: {format}")
+    if writer_class is GraphMLWriter:
+        return GraphMLWriter(path)
+    if writer_class is CypherScriptWriter:
+        return CypherScriptWriter(path, batch_size)
+    return ColumnarWriter(path, format, batch_size)
+
+def default_export_path(center_entity, format):
+    """Timestamped file under knowledge_graph/exports for a subgraph export"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join("knowledge_graph", "exports",
+                        f"subgraph_{center_entity.replace(' ', '_')}_{timestamp}.{format}")
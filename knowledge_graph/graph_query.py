@@ -7,6 +7,7 @@ import logging
 from typing import List, Dict, Any, Optional
 import json
 from datetime import datetime
+from knowledge_graph.query_registry import QUERIES
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
@@ -40,13 +41,13 @@ class GraphQueryManager:
             dict: Entity summary data including relationships and metrics
         """
         # Query to get basic entity information
-        entity_query = """
+        entity_query = QUERIES.named("entity_by_name", """
         MATCH (e:Entity {name: $entity_name})
         RETURN e
-        """
+        """)
         
         # Query to get entity relationships
-        relationships_query = """
+        relationships_query = QUERIES.named("entity_outgoing_relationships", """
         MATCH (e:Entity {name: $entity_name})-[r]->(target)
         WITH type(r) AS relationship_type, 
             target.name AS target_name,
@@ -54,10 +55,10 @@ class GraphQueryManager:
             COUNT(*) AS count
         ORDER BY count DESC
         RETURN relationship_type, target_name, target_types, count
-        """
+        """)
 
         # Query to get incoming relationships
-        incoming_query = """
+        incoming_query = QUERIES.named("entity_incoming_relationships", """
         MATCH (source)-[r]->(e:Entity {name: $entity_name})
         WITH type(r) AS relationship_type, 
             source.name AS source_name,
@@ -65,27 +66,27 @@ class GraphQueryManager:
             COUNT(*) AS count
         ORDER BY count DESC
         RETURN relationship_type, source_name, source_types, count
-        """
+        """)
         
         # Query to get financial metrics if they exist
-        financials_query = """
+        financials_query = QUERIES.named("entity_financial_metrics", """
         MATCH (e:Entity {name: $entity_name})-[:HAS_METRIC]->(m:Metric)
         RETURN m.name AS metric_name, m.value AS metric_value, 
                m.unit AS metric_unit, m.timestamp AS metric_date
-        """
+        """)
         
         # Execute queries
         try:
-            entity_data = self.neo4j_manager.execute_query(
+            entity_data = self.neo4j_manager.execute_read(
                 entity_query, {"entity_name": entity_name})
             
-            relationships = self.neo4j_manager.execute_query(
+            relationships = self.neo4j_manager.execute_read(
                 relationships_query, {"entity_name": entity_name})
             
-            incoming = self.neo4j_manager.execute_query(
+            incoming = self.neo4j_manager.execute_read(
                 incoming_query, {"entity_name": entity_name})
             
-            financials = self.neo4j_manager.execute_query(
+            financials = self.neo4j_manager.execute_read(
                 financials_query, {"entity_name": entity_name})
             
             # Compile results
@@ -107,6 +108,9 @@ class GraphQueryManager:
         """
         Search for entities by name pattern.
         
+        Results are ranked by full-text score when the entity full-text
+        index is available, otherwise by connection count.
+        
         Args:
             name_pattern: Pattern to search for
             limit: Maximum number of results to return
@@ -114,19 +118,27 @@ class GraphQueryManager:
         Returns:
             list: Matching entities with basic information
         """
-        query = """
+        if self.neo4j_manager.fulltext_available():
+            try:
+                return self.neo4j_manager.fulltext_search(
+                    name_pattern, mode="fuzzy_prefix", entity_types=["Entity"], limit=limit,
+                    return_clause="summary")
+            except Exception as e:
+                logger.warning(f"Full-text search failed for {name_pattern}, using regex: {e}")
+        
+        query = QUERIES.named("search_entities_regex", """
         MATCH (e:Entity)
         WHERE e.name =~ $pattern
         RETURN e.name AS name, labels(e) AS types, 
-               COUNT {(e)--()} AS connection_count
+               coalesce(e.degree, 0) AS connection_count
         ORDER BY connection_count DESC
         LIMIT $limit
-        """
+        """)
         
         pattern = f"(?i).*{name_pattern}.*"  # Case-insensitive pattern match
         
         try:
-            results = self.neo4j_manager.execute_query(
+            results = self.neo4j_manager.execute_read(
                 query, {"pattern": pattern, "limit": limit})
             return results
         except Exception as e:
@@ -145,7 +157,7 @@ class GraphQueryManager:
         """
         # Different queries based on risk type
         queries = {
-            "financial": """
+            "financial": QUERIES.named("risk_metrics_financial", """
                 MATCH (e:Entity)-[:HAS_METRIC]->(m:Metric)
                 WHERE m.name IN ['revenue', 'profit', 'cash_flow', 'debt_to_equity', 'current_ratio']
                 WITH e, m, 
@@ -161,17 +173,17 @@ class GraphQueryManager:
                        risk_count, m.unit AS unit
                 ORDER BY risk_count DESC, m.value ASC
                 LIMIT 20
-            """,
+            """),
             
-            "operational": """
+            "operational": QUERIES.named("risk_metrics_operational", """
                 MATCH (e:Entity)-[:HAS_PROCESS]->(p:Process)-[:HAS_ISSUE]->(i)
                 RETURN e.name AS entity, p.name AS process, i.description AS issue,
                        COUNT(i) AS risk_count
                 ORDER BY risk_count DESC
                 LIMIT 20
-            """,
+            """),
             
-            "market": """
+            "market": QUERIES.named("risk_metrics_market", """
                 MATCH (e:Entity)-[:OPERATES_IN|COMPETES_WITH]->(m)
                 MATCH (m)-[:HAS_EMERGING_TREND]->(t)
                 WHERE t.name CONTAINS 'declin' OR t.name CONTAINS 'decrease' 
@@ -180,7 +192,7 @@ class GraphQueryManager:
                        COUNT(t) AS risk_count
                 ORDER BY risk_count DESC
                 LIMIT 20
-            """
+            """)
         }
         
         if risk_type not in queries:
@@ -188,7 +200,7 @@ class GraphQueryManager:
             return []
         
         try:
-            results = self.neo4j_manager.execute_query(queries[risk_type])
+            results = self.neo4j_manager.execute_read(queries[risk_type])
             return results
         except Exception as e:
             logger.error(f"Error getting {risk_type} risk metrics: {e}")
@@ -205,10 +217,10 @@ class GraphQueryManager:
             list: Strategic opportunities with supporting evidence
         """
         # Query for potential partnership opportunities
-        partnership_query = """
+        partnership_query = QUERIES.named("partnership_opportunities", """
         MATCH (e:Entity {name: $entity_name})-[:COMPETES_WITH]->(m:Market)<-[:COMPETES_WITH]-(partner:Entity)
         WHERE NOT (e)-[:PARTNERED_WITH]-(partner)
-        AND COUNT {(partner)--()} > 5  // Only well-connected entities
+        AND partner.degree > 5  // Only well-connected entities
         WITH e, partner, COUNT(m) AS shared_markets
         MATCH (partner)-[:HAS_STRENGTH]->(s:Strength)
         WHERE NOT (e)-[:HAS_STRENGTH]->(:Strength {name: s.name})
@@ -217,10 +229,10 @@ class GraphQueryManager:
             shared_markets
         ORDER BY shared_markets DESC, SIZE(complementary_strengths) DESC
         LIMIT 10
-        """
+        """)
         
         # Query for potential expansion markets
-        expansion_query = """
+        expansion_query = QUERIES.named("expansion_opportunities", """
         MATCH (e:Entity {name: $entity_name})-[:HAS_STRENGTH]->(s:Strength)
         MATCH (m:Market)
         WHERE NOT (e)-[:COMPETES_WITH|OPERATES_IN]->(m)
@@ -233,13 +245,13 @@ class GraphQueryManager:
                COUNT(DISTINCT s) AS strength_count
         ORDER BY strength_count DESC
         LIMIT 10
-        """
+        """)
         
         try:
-            partnerships = self.neo4j_manager.execute_query(
+            partnerships = self.neo4j_manager.execute_read(
                 partnership_query, {"entity_name": entity_name})
             
-            expansions = self.neo4j_manager.execute_query(
+            expansions = self.neo4j_manager.execute_read(
                 expansion_query, {"entity_name": entity_name})
             
             return {
@@ -250,117 +262,46 @@ class GraphQueryManager:
             logger.error(f"Error finding opportunities for {entity_name}: {e}")
             return {"error": str(e)}
     
-    def export_graph_segment(self, entity_name: str, depth: int = 2) -> Dict[str, Any]:
+    def export_graph_segment(self, entity_name: str, depth: int = 2,
+                             max_nodes: Optional[int] = None,
+                             max_edges: Optional[int] = None) -> Dict[str, Any]:
         """
         Export a segment of the graph centered on an entity for visualization.
     
         Args:
             entity_name: Center entity name
-            depth: Traversal depth from center entity (ignored in query)
+            depth: Traversal depth from center entity
+            max_nodes: Node budget (defaults to config.SUBGRAPH_MAX_NODES)
+            max_edges: Edge budget (defaults to config.SUBGRAPH_MAX_EDGES)
         
         Returns:
             dict: Graph data in a visualization-friendly format
         """
-        # Use fixed depths in Neo4j 5.x which doesn't allow dynamic path lengths via parameters
-        max_depth = min(depth, 3)  # Limit depth to 3 max for performance
-    
-        if max_depth == 1:
-            query = """
-            MATCH path = (e:Entity {name: $entity_name})-[*1..1]-(related)
-            WITH nodes(path) AS nodes, relationships(path) AS rels
-            UNWIND nodes AS node
-            WITH COLLECT(DISTINCT node) AS nodes, rels
-            UNWIND rels AS rel
-            WITH nodes, COLLECT(DISTINCT rel) AS relationships
-            RETURN nodes, relationships
-            """
-        elif max_depth == 2:
-            query = """
-            MATCH path = (e:Entity {name: $entity_name})-[*1..2]-(related)
-            WITH nodes(path) AS nodes, relationships(path) AS rels
-            UNWIND nodes AS node
-            WITH COLLECT(DISTINCT node) AS nodes, rels
-            UNWIND rels AS rel
-            WITH nodes, COLLECT(DISTINCT rel) AS relationships
-            RETURN nodes, relationships
-            """
-        else:  # max_depth == 3
-            query = """
-            MATCH path = (e:Entity {name: $entity_name})-[*1..3]-(related)
-            WITH nodes(path) AS nodes, relationships(path) AS rels
-            UNWIND nodes AS node
-            WITH COLLECT(DISTINCT node) AS nodes, rels
-            UNWIND rels AS rel
-            WITH nodes, COLLECT(DISTINCT rel) AS relationships
-            RETURN nodes, relationships
-            """
-        
         try:
-            result = self.neo4j_manager.execute_query(
-                query, {"entity_name": entity_name, "depth": depth})
-            
-            if not result:
-                return {"nodes": [], "links": []}
-            
-            # Process nodes and relationships into visualization format
-            nodes_set = set()
+            # Breadth-first expansion visits each node once, so depth no longer
+            # has to be capped to keep path enumeration in check
             nodes = []
             links = []
+            truncated = False
             
-            for node in result[0]["nodes"]:
-                if id(node) not in nodes_set:
-                    nodes_set.add(id(node))
-                    node_data = dict(node)
-                    node_data["id"] = id(node)
-                    # Extract labels
-                    if hasattr(node, "labels"):
-                        node_data["labels"] = list(node.labels)
+            for kind, item in self.neo4j_manager.iter_subgraph(
+                    entity_name, depth, max_nodes=max_nodes, max_edges=max_edges):
+                if kind == "node":
+                    node_data = dict(item["properties"])
+                    node_data["id"] = item["id"]
+                    node_data["labels"] = item["labels"]
                     nodes.append(node_data)
-            
-            # Update the relationship handling section
-            for rel in result[0]["relationships"]:
-                try:
-                    # Handle different relationship formats
-                    if hasattr(rel, "start_node") and hasattr(rel, "end_node"):
-                        # Neo4j 4.x style
-                        source_node = rel.start_node
-                        target_node = rel.end_node
-                        rel_type = type(rel).__name__
-                
-                        links.append({
-                            "source": id(source_node),
-                            "target": id(target_node),
-                            "type": rel_type
-                        })
-                    elif isinstance(rel, tuple) and len(rel) >= 2:
-                        # Handle tuple format
-                        logger.info("Processing relationship in tuple format")
-                        # Assuming the tuple contains (start_node, end_node) or similar
-                        source_node = rel[0]
-                        target_node = rel[1]
-                        rel_type = "RELATED_TO"  # Default type
-                
-                        links.append({
-                            "source": id(source_node),
-                            "target": id(target_node),
-                            "type": rel_type
-                        })
-                    else:
-                        logger.warning(f"Relationship returned in unexpected format: {type(rel)}")
-                        # Try to extract the relationship from the query result
-                        # This is a simplified fallback
-                except AttributeError as e:
-                    logger.warning(f"AttributeError handling relationship: {e}")
-                    # Fallback relationship handling
-                    # If the relationship is a tuple or different structure
-                    logger.warning(f"Relationship returned in unexpected format: {type(rel)}")
-                    # Try to extract nodes from the query result in a different way
-                    # This is a simplified fallback - you might need to adjust based on your Neo4j version
+                elif kind == "edge":
                     links.append({
-                        "source": id(result[0]["nodes"][0]),  # Use first node as source
-                        "target": id(result[0]["nodes"][-1]), # Use last node as target
-                        "type": "RELATED_TO"  # Generic type
+                        "source": item["source"],
+                        "target": item["target"],
+                        "type": item["type"]
                     })
+                else:
+                    truncated = item["truncated"]
+            
+            if not links:
+                return {"nodes": [], "links": []}
             
             # Save to file
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -375,6 +316,7 @@ class GraphQueryManager:
             return {
                 "nodes": nodes,
                 "links": links,
+                "truncated": truncated,
                 "exported_file": filepath
             }
         except Exception as e:
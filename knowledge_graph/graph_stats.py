@@ -0,0 +1,111 @@
+"""
+Graph statistics for the knowledge graph component.
+Serves node, relationship, label and relationship-type counts from the
+store's counters instead of scanning the graph, cached per graph version.
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime
+import config
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class GraphStatistics:
+    """
+    Cached graph-wide counts for one GraphStore.
+
+    The counts come from the backend's _count_statistics() (the Neo4j
+    count store, or the embedded store's own indexes) and are reused
+    until the store records a write. Writes made by other processes are
+    not seen by graph_version, so a snapshot is also refreshed once it is
+    older than config.GRAPH_STATS_MAX_AGE seconds.
+    """
+
+    def __init__(self, graph_store, max_age=None):
+        """
+        Initialize the service
+
+        Args:
+            graph_store: GraphStore the counts are read from
+            max_age (float, optional): Seconds before a snapshot is refreshed even
+                                       without local writes (defaults to
+                                       config.GRAPH_STATS_MAX_AGE; 0 disables)
+        """
+        self.graph_store = graph_store
+        self.max_age = config.GRAPH_STATS_MAX_AGE if max_age is None else max_age
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._taken = 0.0
+        self.stats = {"hits": 0, "refreshes": 0}
+
+    def _is_current(self):
+        if self._snapshot is None or self._snapshot["version"] != self.graph_store.graph_version:
+            return False
+        return not self.max_age or time.monotonic() - self._taken < self.max_age
+
+    def snapshot(self, refresh=False):
+        """
+        Get the current graph statistics
+
+        Args:
+            refresh (bool): Re-read the counts even if the cached snapshot is current
+
+        Returns:
+            dict: node_count, relationship_count, density, labels and
+                  relationship_types histograms ({name: count}), plus the
+                  graph version, source and time of the snapshot
+        """
+        with self._lock:
+            if not refresh and self._is_current():
+                self.stats["hits"] += 1
+                return self._snapshot
+
+            version = self.graph_store.graph_version
+            counts = self.graph_store._count_statistics()
+            node_count = counts["node_count"]
+            relationship_count = counts["relationship_count"]
+
+            self._snapshot = {
+                "node_count": node_count,
+                "relationship_count": relationship_count,
+                "density": (relationship_count / (node_count * (node_count - 1))
+                            if node_count > 1 else 0),
+                "labels": counts["labels"],
+                "relationship_types": counts["relationship_types"],
+                "source": counts["source"],
+                "version": version,
+                "taken_at": datetime.now().isoformat()
+            }
+            self._taken = time.monotonic()
+            self.stats["refreshes"] += 1
+
+        logger.debug(f"Graph statistics refreshed from {counts['source']}: {node_count} nodes, "
+                     f"{relationship_count} relationships")
+        return self._snapshot
+
+    def label_histogram(self):
+        """
+        Node count per label, largest first
+
+        Returns:
+            list: Dicts with label and count
+        """
+        labels = self.snapshot()["labels"]
+        return [{"label": label, "count": count}
+                for label, count in sorted(labels.items(), key=lambda item: item[1], reverse=True)]
+
+    def relationship_type_histogram(self):
+        """
+        Relationship count per type, largest first
+
+        Returns:
+            list: Dicts with rel_type and count
+        """
+        types = self.snapshot()["relationship_types"]
+        return [{"rel_type": rel_type, "count": count}
+                for rel_type, count in sorted(types.items(), key=lambda item: item[1], reverse=True)]
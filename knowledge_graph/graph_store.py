@@ -0,0 +1,478 @@
+"""
+Graph store interface for the knowledge graph component.
+Defines the operations the analysis code relies on so it can run against
+Neo4j or the embedded in-process backend interchangeably.
+"""
+
+import hashlib
+import logging
+from datetime import datetime
+import config
+from knowledge_graph.query_registry import QUERIES
+from knowledge_graph.graph_export import create_writer, default_export_path
+from knowledge_graph.graph_stats import GraphStatistics
+from knowledge_graph.tenancy import tenant_snapshot_path
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class GraphStore:
+    """
+    Base class for knowledge graph backends.
+
+    Queries are passed as Cypher text. Backends that do not speak Cypher
+    identify them by the name registered in QUERIES (render() for
+    templates, named() for fixed text), so callers should route every
+    query they issue through the registry.
+    """
+
+    backend = None
+
+    # Incremented on every write; caches of results derived from the graph
+    # (such as GDS projections) are keyed on it
+    graph_version = 0
+
+    def connect(self):
+        """Open the store; returns True on success"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release the store's resources"""
+        raise NotImplementedError
+
+    def execute_read(self, query, parameters=None):
+        """Run a read-only query and return records as dictionaries"""
+        raise NotImplementedError
+
+    def execute_write(self, query, parameters=None):
+        """Run a query that may modify the graph and return records as dictionaries"""
+        raise NotImplementedError
+
+    def execute_query(self, query, parameters=None):
+        """
+        Execute a query and return records as dictionaries
+
+        Kept for callers that may write; it runs on the write path. Read-only
+        callers should use execute_read.
+        """
+        return self.execute_write(query, parameters)
+
+    def stream_query(self, query, parameters=None, batch_size=None, fetch_size=None,
+                     read_only=True):
+        """Yield records (or batches of records) instead of returning a list"""
+        raise NotImplementedError
+
+    def unit_of_work(self, read_only=True, transaction=False):
+        """Context manager scoping many queries to one session or transaction"""
+        raise NotImplementedError
+
+    def verify_indexes(self, force=False):
+        """Make sure the store's indexes exist; returns a report dict"""
+        raise NotImplementedError
+
+    def fulltext_available(self):
+        """Whether fulltext_search can be used"""
+        return False
+
+    def fulltext_search(self, search_text, mode="fuzzy", entity_types=None, limit=10,
+                        return_clause="nodes"):
+        """Ranked entity name search backed by a full-text index"""
+        raise NotImplementedError
+
+    def find_entity(self, entity_name, entity_types=None, mode="fuzzy"):
+        """Find entity nodes by name, optionally filtering by type"""
+        raise NotImplementedError
+
+    def add_triplet(self, subject_type, subject_props, predicate, object_type, object_props,
+                    rel_props=None):
+        """Add a subject-predicate-object triplet to the graph"""
+        raise NotImplementedError
+
+    def add_triplets_batch(self, triplets, batch_size=None):
+        """Add many triplets; returns write statistics"""
+        raise NotImplementedError
+
+    def import_triplets_batch(self, triplets, batch_size=None):
+        """Import extractor triplets as :Entity nodes; returns import statistics"""
+        raise NotImplementedError
+
+    @staticmethod
+    def triplet_key(source_id, triplet):
+        """
+        Identity of a relationship produced by a document
+
+        Args:
+            source_id (str): Document id
+            triplet (dict): Prepared triplet row (as taken by add_triplets_batch)
+
+        Returns:
+            str: Key stored on the relationship and in the Document's triplet_keys
+        """
+        rel_props = triplet.get("rel_props") or {}
+        parts = [source_id, triplet["subject_type"], triplet["subject_props"].get("name"),
+                 triplet["predicate"], triplet["object_type"], triplet["object_props"].get("name"),
+                 rel_props.get("context", "")]
+        return hashlib.sha1("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:16]
+
+    def get_document(self, source_id):
+        """Stored content_hash and triplet_keys of a document, or None if unknown"""
+        raise NotImplementedError
+
+    def upsert_document(self, source_id, content_hash, triplets, name=None):
+        """Write a document's triplets as a diff against what it produced before"""
+        raise NotImplementedError
+
+    def delete_by_source(self, source_id):
+        """Remove everything a document contributed to the graph"""
+        raise NotImplementedError
+
+    def refresh_degrees(self, node_ids=None, batch_size=None):
+        """Recompute stored degree properties; returns the number of nodes refreshed"""
+        raise NotImplementedError
+
+    def _graph_changed(self):
+        """Record that the graph was modified"""
+        self.graph_version += 1
+
+    @property
+    def statistics(self):
+        """GraphStatistics service for this store, created on first use"""
+        service = self.__dict__.get("_statistics")
+        if service is None:
+            service = self._statistics = GraphStatistics(self)
+        return service
+
+    def _count_statistics(self):
+        """
+        Read graph-wide counts without scanning the graph
+
+        Returns:
+            dict: node_count, relationship_count, labels and relationship_types
+                  ({name: count}) and the source they were read from
+        """
+        raise NotImplementedError
+
+    def gds_available(self):
+        """Whether run_graph_analytics can be used"""
+        return False
+
+    def run_graph_analytics(self, algorithm, parameters=None, node_labels=None,
+                            relationship_types=None, **options):
+        """Run a graph algorithm server-side; returns result records"""
+        raise NotImplementedError
+
+    def get_query_stats(self, top=5):
+        """Statistics on the queries issued against the store"""
+        raise NotImplementedError
+
+    def reset_query_stats(self):
+        """Clear the per-run query counters"""
+        raise NotImplementedError
+
+    def _subgraph_start_nodes(self, entity_name, label):
+        """Backend ids of the nodes a subgraph expansion starts from"""
+        raise NotImplementedError
+
+    def _subgraph_expand(self, node_ids, relationship_types=None):
+        """
+        Yield every relationship touching a batch of frontier nodes
+
+        Yields:
+            dict: rel_id, type, source, target, properties and neighbor (the
+                  endpoint on the far side from the frontier node)
+        """
+        raise NotImplementedError
+
+    def _subgraph_nodes(self, node_ids):
+        """Yield id, labels and properties for a batch of backend node ids"""
+        raise NotImplementedError
+
+    def _emit_subgraph_nodes(self, node_ids, index):
+        """Fetch a batch of newly reached nodes and yield them in compact form"""
+        if not node_ids:
+            return
+        for node in self._subgraph_nodes(node_ids):
+            yield "node", {
+                "id": index[node["id"]],
+                "labels": list(node["labels"]),
+                "properties": node["properties"]
+            }
+
+    def iter_subgraph(self, center_entity, max_depth=2, relationship_types=None,
+                      max_nodes=None, max_edges=None, center_label="Entity"):
+        """
+        Breadth-first expansion around an entity, streamed in compact form
+
+        Each node is visited once and each relationship is read once from
+        each of its endpoints, so cost is linear in the size of the subgraph
+        rather than in the number of paths through it. Frontiers are
+        expanded NEO4J_BATCH_SIZE nodes per query.
+
+        Nodes get dense integer ids in the order they are reached; a node
+        is always yielded before any edge that refers to it. Expansion
+        stops early when the node or edge budget is used up.
+
+        Args:
+            center_entity (str): Name of the start entity
+            max_depth (int): Maximum hops from the start entity
+            relationship_types (list, optional): Only follow these relationship types
+            max_nodes (int, optional): Node budget (defaults to config.SUBGRAPH_MAX_NODES)
+            max_edges (int, optional): Edge budget (defaults to config.SUBGRAPH_MAX_EDGES)
+            center_label (str): Label of the start node
+
+        Yields:
+            tuple: ("node", {id, labels, properties}),
+                   ("edge", {source, target, type, properties}), and finally
+                   ("summary", {nodes, edges, depth, truncated})
+        """
+        max_nodes = max_nodes or config.SUBGRAPH_MAX_NODES
+        max_edges = max_edges or config.SUBGRAPH_MAX_EDGES
+        batch_size = config.NEO4J_BATCH_SIZE
+
+        index = {}
+        seen_rels = set()
+        truncated = False
+
+        start = list(self._subgraph_start_nodes(center_entity, center_label))[:max_nodes]
+        for node_id in start:
+            index[node_id] = len(index)
+        yield from self._emit_subgraph_nodes(start, index)
+
+        frontier = start
+        depth = 0
+        while frontier and depth < max_depth and not truncated:
+            next_frontier = []
+            for i in range(0, len(frontier), batch_size):
+                new_nodes = []
+                edges = []
+                for row in self._subgraph_expand(frontier[i:i + batch_size], relationship_types):
+                    if row["rel_id"] in seen_rels:
+                        continue
+                    if len(seen_rels) >= max_edges:
+                        truncated = True
+                        break
+                    neighbor = row["neighbor"]
+                    if neighbor not in index:
+                        if len(index) >= max_nodes:
+                            truncated = True
+                            continue
+                        index[neighbor] = len(index)
+                        new_nodes.append(neighbor)
+                    seen_rels.add(row["rel_id"])
+                    edges.append({
+                        "source": index[row["source"]],
+                        "target": index[row["target"]],
+                        "type": row["type"],
+                        "properties": row["properties"]
+                    })
+
+                yield from self._emit_subgraph_nodes(new_nodes, index)
+                for edge in edges:
+                    yield "edge", edge
+                next_frontier.extend(new_nodes)
+                if truncated:
+                    break
+
+            frontier = next_frontier
+            depth += 1
+
+        if truncated:
+            logger.warning(f"Subgraph around {center_entity} truncated at {len(index)} nodes, "
+                           f"{len(seen_rels)} edges (depth {depth})")
+
+        yield "summary", {"nodes": len(index), "edges": len(seen_rels),
+                          "depth": depth, "truncated": truncated}
+
+    def expand_subgraph(self, center_entity, max_depth=2, relationship_types=None,
+                        max_nodes=None, max_edges=None, center_label="Entity"):
+        """
+        Collect iter_subgraph() into lists
+
+        Returns:
+            dict: nodes, edges (referring to node ids by position) and the
+                  expansion summary
+        """
+        subgraph = {"nodes": [], "edges": []}
+        for kind, item in self.iter_subgraph(center_entity, max_depth, relationship_types,
+                                             max_nodes, max_edges, center_label):
+            if kind == "summary":
+                subgraph["summary"] = item
+            else:
+                subgraph[f"{kind}s"].append(item)
+        return subgraph
+
+    def export_subgraph(self, center_entity, relationship_types=None, 
+                      max_distance=2, format="json", max_nodes=None, max_edges=None,
+                      path=None):
+        """
+        Export a subgraph around a central entity
+        
+        The json format returns the subgraph inline. The graphml, cypher,
+        parquet and arrow formats stream the expansion straight into a file
+        writer, so the subgraph is never held in memory as a whole.
+        
+        Args:
+            center_entity (str): Central entity name
+            relationship_types (list, optional): List of relationship types to include
+            max_distance (int): Maximum path length from center entity
+            format (str): Output format (json, graphml, cypher, parquet, arrow)
+            max_nodes (int, optional): Node budget (defaults to config.SUBGRAPH_MAX_NODES)
+            max_edges (int, optional): Edge budget (defaults to config.SUBGRAPH_MAX_EDGES)
+            path (str, optional): Output file for file formats (defaults to a
+                                  timestamped file under knowledge_graph/exports)
+            
+        Returns:
+            dict: Exported subgraph data, or the files written and their counts
+        """
+        metadata = {
+            "center_entity": center_entity,
+            "max_distance": max_distance,
+            "format": format,
+            "exported_at": datetime.now().isoformat()
+        }
+        
+        if format != "json":
+            # Fail on an unknown format before running any queries
+            path = path or default_export_path(center_entity, format)
+            writer = create_writer(format, path)
+            result = writer.write(self.iter_subgraph(center_entity, max_distance, relationship_types,
+                                                     max_nodes, max_edges))
+            if not result["edges"]:
+                logger.warning(f"No subgraph found for entity: {center_entity}")
+            return {**result, "metadata": metadata}
+        
+        subgraph = self.expand_subgraph(center_entity, max_distance, relationship_types,
+                                        max_nodes, max_edges)
+        
+        if not subgraph["edges"]:
+            logger.warning(f"No subgraph found for entity: {center_entity}")
+            return {"nodes": [], "relationships": []}
+        
+        # Edges already refer to nodes by their compact ids
+        relationships_data = [{
+            "source": edge["source"],
+            "target": edge["target"],
+            "type": edge["type"],
+            "properties": edge["properties"]
+        } for edge in subgraph["edges"]]
+            
+        return {
+            "nodes": subgraph["nodes"],
+            "relationships": relationships_data,
+            "metadata": {**metadata, "truncated": subgraph["summary"]["truncated"]}
+        }
+
+    def get_risk_query(self, risk_type):
+        """
+        Get the Cypher text behind run_risk_query for a risk type
+
+        Args:
+            risk_type (str): Type of risk to analyze (financial, operational, market)
+
+        Returns:
+            str: Query text, or None for unknown risk types
+        """
+        if risk_type == "financial":
+            query = QUERIES.named("risk_query_financial", """
+            MATCH (e:Entity)-[:HAS_METRIC]->(m:Metric)
+            WHERE m.name IN ['revenue', 'profit', 'cash_flow', 'debt_to_equity', 'current_ratio']
+            WITH e, m, COUNT(*) as risk_count
+            RETURN e.name as entity, m.name as metric, m.value as value,
+                m.unit as unit, risk_count
+            ORDER BY risk_count DESC
+            LIMIT 20
+            """)
+        elif risk_type == "operational":
+            query = QUERIES.named("risk_query_operational", """
+            MATCH (e:Entity)-[:HAS_PROCESS]->(p:Process)-[:HAS_ISSUE]->(i)
+            WITH e, p, i, COUNT(*) as risk_count
+            RETURN e.name as entity, p.name as process, i.description as issue, risk_count
+            ORDER BY risk_count DESC
+            LIMIT 20
+            """)
+        elif risk_type == "market":
+            query = QUERIES.named("risk_query_market", """
+            MATCH (e:Entity)-[:OPERATES_IN|COMPETES_WITH]->(m)
+            MATCH (m)-[:HAS_EMERGING_TREND]->(t)
+            WHERE t.name CONTAINS 'declin' OR t.name CONTAINS 'decrease'
+            WITH e, m, t, COUNT(*) as risk_count
+            RETURN e.name as entity, m.name as market, t.name as trend, risk_count
+            ORDER BY risk_count DESC
+            LIMIT 20
+            """)
+        else:
+            return None
+
+        return query
+
+    def run_risk_query(self, risk_type):
+        """
+        Execute risk-specific queries for the risk analyzer
+
+        Args:
+            risk_type (str): Type of risk to analyze (financial, operational, market)
+
+        Returns:
+            list: Risk data for analysis
+        """
+        query = self.get_risk_query(risk_type)
+        if query is None:
+            return []
+
+        return self.execute_read(query)
+
+    def get_business_risks(self, entity_name=None, risk_types=None, min_level=None):
+        """
+        Get business risks from the knowledge graph
+
+        Args:
+            entity_name (str, optional): Name of specific entity
+            risk_types (list, optional): List of risk types to filter by
+            min_level (float, optional): Minimum risk level (0-1)
+
+        Returns:
+            list: Risk entities with related data
+        """
+        query = QUERIES.render("get_business_risks", entity_filter=bool(entity_name))
+        params = {
+            "entity_name": entity_name,
+            "risk_types": risk_types or None,
+            "min_level": min_level
+        }
+
+        return self.execute_read(query, params)
+
+def create_graph_store(backend=None, tenant_id=None, **kwargs):
+    """
+    Create a graph store for the configured backend
+
+    Args:
+        backend (str, optional): "neo4j" or "embedded" (defaults to config.GRAPH_BACKEND)
+        tenant_id (str, optional): Tenant to scope the store to: its own Neo4j
+                                   database, or its own embedded snapshot file
+                                   (defaults to config.TENANT_ID)
+        **kwargs: Passed to the backend's constructor
+
+    Returns:
+        GraphStore: Unconnected store instance
+
+    Raises:
+        ValueError: For an unknown backend name
+    """
+    backend = (backend or config.GRAPH_BACKEND).lower()
+
+    tenant_id = tenant_id or config.TENANT_ID or None
+
+    # Imported here because both backends import this module
+    if backend == "neo4j":
+        from knowledge_graph.neo4j_manager import Neo4jManager
+        return Neo4jManager(tenant_id=tenant_id, **kwargs)
+    if backend == "embedded":
+        from knowledge_graph.embedded_store import EmbeddedGraphStore
+        if tenant_id and "snapshot_path" not in kwargs:
+            kwargs["snapshot_path"] = tenant_snapshot_path(config.GRAPH_SNAPSHOT_PATH, tenant_id)
+        return EmbeddedGraphStore(**kwargs)
+
+    raise ValueError(f"Unknown graph backend: {backend}")
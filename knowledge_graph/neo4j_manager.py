@@ -5,76 +5,505 @@ Handles connection, transaction management, and query execution.
 
 import logging
 import json
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime
 import re
-from neo4j import GraphDatabase
-from neo4j.exceptions import ServiceUnavailable, AuthError
+from neo4j import GraphDatabase, READ_ACCESS, WRITE_ACCESS
+from neo4j.exceptions import ServiceUnavailable, AuthError, TransientError, SessionExpired, ClientError
 import config
+from knowledge_graph.schema import (apply_schema, ensure_label_index, ENTITY_FULLTEXT_INDEX,
+                                    ENTITY_FULLTEXT_LABELS)
+from knowledge_graph.query_registry import QUERIES, degree_key
+from knowledge_graph.query_profiler import QueryProfiler
+from knowledge_graph.graph_store import GraphStore
+from knowledge_graph.gds_projections import ProjectionCache, ALGORITHMS
+from knowledge_graph.tenancy import tenant_database_name
+from knowledge_graph.query_recorder import QueryRecorder, RecordingDriver, ReplayDriver
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class Neo4jManager:
+class UnitOfWork:
+    """
+    A scoped session (and optionally a single transaction) shared by many queries.
+    Obtained from Neo4jManager.unit_of_work(); not meant to be created directly.
+    """
+    
+    def __init__(self, manager, session, transaction=None, read_only=True):
+        self.manager = manager
+        self.session = session
+        self.transaction = transaction
+        self.read_only = read_only
+        self.query_count = 0
+        
+    def execute_query(self, query, parameters=None):
+        """Run a query on the shared session or transaction and return record dicts"""
+        runner = self.transaction or self.session
+        records = self.manager._run_and_collect(runner, query, parameters or {})
+        self.query_count += 1
+        return records
+
+class Neo4jManager(GraphStore):
     """Manages Neo4j database operations for the knowledge graph"""
     
-    def __init__(self, uri=None, user=None, password=None):
-        """Initialize with connection parameters"""
+    backend = "neo4j"
+    
+    def __init__(self, uri=None, user=None, password=None, tenant_id=None, database=None,
+                 record_path=None, replay_path=None):
+        """
+        Initialize with connection parameters
+        
+        Args:
+            uri, user, password: Connection settings (default to config)
+            tenant_id (str, optional): Tenant whose database every session uses
+                                       (defaults to config.TENANT_ID)
+            database (str, optional): Explicit database name, overriding the tenant's
+            record_path (str, optional): Record every query and its results to this
+                                         file (defaults to config.NEO4J_RECORD_PATH)
+            replay_path (str, optional): Answer queries from this recording instead
+                                         of a server (defaults to config.NEO4J_REPLAY_PATH)
+        """
         self.uri = uri or config.NEO4J_URI
         self.user = user or config.NEO4J_USER
         self.password = password or config.NEO4J_PASSWORD
         self.driver = None
         
+        # Every session is opened on this database (None = server default)
+        self.tenant_id = tenant_id or config.TENANT_ID or None
+        if database:
+            self.database = database
+        elif self.tenant_id:
+            self.database = tenant_database_name(self.tenant_id)
+        else:
+            self.database = config.NEO4J_DATABASE or None
+        
+        # Whether the entity full-text index is usable (None = not checked yet);
+        # only a positive result is kept, a negative one is re-checked after
+        # config.NEO4J_FULLTEXT_RECHECK_INTERVAL seconds
+        self._fulltext_available = None
+        self._fulltext_checked_at = 0.0
+        
+        # Active unit of work per thread, used transparently by execute_read/execute_write
+        self._local = threading.local()
+        
+        # Connection pool metrics
+        self._metrics_lock = threading.Lock()
+        self.pool_metrics = {
+            "sessions_opened": 0,
+            "acquisitions": 0,
+            "acquisition_wait_total": 0.0,
+            "acquisition_wait_max": 0.0,
+            "transaction_retries": 0
+        }
+        
+        # Query texts sent to the server, to check plan-cache reuse
+        self.query_counts = Counter()
+        
+        # Opt-in per-query timing, slow-query log and sampled PROFILE
+        self.profiler = QueryProfiler()
+        
+        # Named GDS projections, reused until the next write
+        self.projections = ProjectionCache(self)
+        
+        # Count source that last worked for graph statistics (None = not tried yet)
+        self._statistics_source = None
+        
+        # Query record/replay beneath the driver, for benchmarking without a server
+        self.record_path = record_path or config.NEO4J_RECORD_PATH or None
+        self.replay_path = replay_path or config.NEO4J_REPLAY_PATH or None
+        
     def connect(self):
         """Establish connection to Neo4j database"""
+        if self.replay_path:
+            self.driver = ReplayDriver(self.replay_path)
+            logger.info(f"Replaying Neo4j queries from {self.replay_path}")
+            return True
+        
         try:
             self.driver = GraphDatabase.driver(
                 self.uri,
-                auth=(self.user, self.password)
+                auth=(self.user, self.password),
+                max_connection_pool_size=config.NEO4J_MAX_POOL_SIZE,
+                max_connection_lifetime=config.NEO4J_MAX_CONNECTION_LIFETIME,
+                connection_acquisition_timeout=config.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+                max_transaction_retry_time=config.NEO4J_MAX_TRANSACTION_RETRY_TIME
             )
+            if self.tenant_id and config.TENANT_AUTO_CREATE:
+                self._create_tenant_database()
+            
             # Test connection
-            with self.driver.session() as session:
+            with self.driver.session(database=self.database) as session:
                 result = session.run("RETURN 'Connection test' AS message")
                 result.single()
-            logger.info(f"Connected to Neo4j at {self.uri}")
+            
+            if self.record_path:
+                recorder = QueryRecorder(self.record_path, {"uri": self.uri, "database": self.database})
+                self.driver = RecordingDriver(self.driver, recorder)
+                logger.info(f"Recording Neo4j queries to {self.record_path}")
+            logger.info(f"Connected to Neo4j at {self.uri} "
+                        f"(database {self.database or 'default'}, "
+                        f"pool size {config.NEO4J_MAX_POOL_SIZE})")
             return True
         except (ServiceUnavailable, AuthError) as e:
             logger.error(f"Failed to connect to Neo4j: {e}")
             return False
+        except ClientError as e:
+            # Typically a missing tenant database, or a server without multi-database
+            logger.error(f"Cannot use database {self.database} for tenant {self.tenant_id}: {e}")
+            self.driver.close()
+            self.driver = None
+            return False
+    
+    def _create_tenant_database(self):
+        """Create the tenant's database if it does not exist (Neo4j Enterprise only)"""
+        with self.driver.session(database="system") as session:
+            session.run(QUERIES.render("create_tenant_database"), {"name": self.database}).consume()
             
     def close(self):
         """Close the Neo4j connection"""
         if self.driver:
+            self.projections.drop_all()
             self.driver.close()
             logger.info("Neo4j connection closed")
             
-    def verify_indexes(self):
-        """Create necessary indexes if they don't exist"""
-        indexes = [
-            "CREATE INDEX entity_name IF NOT EXISTS FOR (e:Entity) ON (e.name)",
-            "CREATE INDEX document_id IF NOT EXISTS FOR (d:Document) ON (d.id)",
-            "CREATE INDEX concept_name IF NOT EXISTS FOR (c:Concept) ON (c.name)",
-            "CREATE INDEX risk_type IF NOT EXISTS FOR (r:Risk) ON (r.type)"
-        ]
-        
-        with self.driver.session() as session:
-            for index_query in indexes:
-                session.run(index_query)
-            logger.info("Verified all required indexes")
-            
-    def execute_query(self, query, parameters=None):
-        """Execute a Cypher query and return results with better error handling"""
+    def _ensure_connected(self):
+        """Connect lazily, raising ConnectionError if the database is unreachable"""
         if not self.driver:
             if not self.connect():
                 raise ConnectionError("Failed to connect to Neo4j database")
-                
+    
+    def _open_session(self, **kwargs):
+        """Open a driver session with the configured fetch size"""
+        kwargs.setdefault("fetch_size", config.NEO4J_FETCH_SIZE)
+        kwargs.setdefault("database", self.database)
+        with self._metrics_lock:
+            self.pool_metrics["sessions_opened"] += 1
+        return self.driver.session(**kwargs)
+    
+    def _begin_transaction(self, session):
+        """
+        Begin an explicit transaction, timing how long it takes to obtain
+        a pooled connection for it
+        """
+        start = time.perf_counter()
+        tx = session.begin_transaction()
+        self._record_acquisition(time.perf_counter() - start)
+        return tx
+    
+    def _record_acquisition(self, wait):
+        """Record one connection acquisition and the time spent waiting for it"""
+        with self._metrics_lock:
+            self.pool_metrics["acquisitions"] += 1
+            self.pool_metrics["acquisition_wait_total"] += wait
+            self.pool_metrics["acquisition_wait_max"] = max(
+                self.pool_metrics["acquisition_wait_max"], wait)
+    
+    def _record_query(self, query):
+        """Count one query text sent to the server"""
+        with self._metrics_lock:
+            self.query_counts[query] += 1
+    
+    def _run_and_collect(self, runner, query, parameters):
+        """
+        Run a query on a session or transaction and return its records,
+        feeding the profiler when profiling is enabled
+        """
+        self._record_query(query)
+        
+        if not self.profiler.enabled:
+            result = runner.run(query, parameters)
+            return [record.data() for record in result]
+        
+        profiled = self.profiler.should_profile(query)
+        start = time.perf_counter()
+        result = runner.run(f"PROFILE {query}" if profiled else query, parameters)
+        records = [record.data() for record in result]
+        summary = result.consume()
+        self.profiler.record(query, time.perf_counter() - start, len(records), summary, profiled)
+        return records
+    
+    def get_query_stats(self, top=5):
+        """
+        Get statistics on the query texts sent to the server
+        
+        Every distinct text is a separate entry in the server's query cache,
+        so distinct_queries should stay close to the number of templates.
+        
+        Args:
+            top (int): Number of most frequent query texts to include
+            
+        Returns:
+            dict: Total/distinct query counts, the most frequent texts and
+                  query registry cache statistics
+        """
+        with self._metrics_lock:
+            counts = Counter(self.query_counts)
+        
+        return {
+            "total_queries": sum(counts.values()),
+            "distinct_queries": len(counts),
+            "top_queries": [{"query": " ".join(query.split())[:120], "count": count}
+                            for query, count in counts.most_common(top)],
+            "registry": QUERIES.get_stats()
+        }
+    
+    def reset_query_stats(self):
+        """Clear the per-run query text counters"""
+        with self._metrics_lock:
+            self.query_counts.clear()
+    
+    def get_pool_metrics(self):
+        """
+        Get connection pool usage metrics
+        
+        Returns:
+            dict: Session/acquisition counts, acquisition wait times in seconds
+                  and managed transaction retries
+        """
+        with self._metrics_lock:
+            metrics = dict(self.pool_metrics)
+        
+        acquisitions = metrics["acquisitions"]
+        metrics["acquisition_wait_avg"] = (
+            metrics["acquisition_wait_total"] / acquisitions if acquisitions else 0.0)
+        metrics["max_pool_size"] = config.NEO4J_MAX_POOL_SIZE
+        return metrics
+    
+    @contextmanager
+    def unit_of_work(self, read_only=True, transaction=False):
+        """
+        Run many queries on one session, or on one transaction
+        
+        While the block is active, execute_read calls made on this thread
+        (and execute_write/execute_query calls when read_only is False) reuse
+        the scoped session instead of opening a new one. Nested calls join
+        the outer unit of work.
+        
+        Args:
+            read_only (bool): Open the session in read access mode
+            transaction (bool): Wrap all queries in a single transaction
+            
+        Yields:
+            UnitOfWork: Object exposing execute_query on the shared scope
+        """
+        active = getattr(self._local, "unit", None)
+        if active is not None:
+            yield active
+            return
+        
+        self._ensure_connected()
+        access_mode = READ_ACCESS if read_only else WRITE_ACCESS
+        
+        with self._open_session(default_access_mode=access_mode) as session:
+            tx = self._begin_transaction(session) if transaction else None
+            unit = UnitOfWork(self, session, tx, read_only=read_only)
+            self._local.unit = unit
+            try:
+                yield unit
+                if tx is not None:
+                    tx.commit()
+            except Exception:
+                if tx is not None:
+                    tx.rollback()
+                raise
+            finally:
+                self._local.unit = None
+                if tx is not None:
+                    tx.close()
+                if not read_only:
+                    self._graph_changed()
+                logger.debug(f"Unit of work finished after {unit.query_count} queries")
+            
+    @contextmanager
+    def gds_session(self):
+        """
+        One write-access session for GDS projection, algorithm and drop calls
+
+        GDS projections live in the memory of the member that created them.
+        Write access routes every call to the leader, so projections are
+        always used and dropped where they were made. The session is separate
+        from any active unit of work and does not count as a graph write.
+        
+        Yields:
+            UnitOfWork: Object exposing execute_query on the session
+        """
+        self._ensure_connected()
+        with self._open_session(default_access_mode=WRITE_ACCESS) as session:
+            yield UnitOfWork(self, session, read_only=False)
+        
+    def verify_indexes(self, force=False):
+        """
+        Apply the graph schema (constraints and indexes) if it is not current
+        
+        Args:
+            force (bool): Re-apply every statement even if the version is current
+            
+        Returns:
+            dict: Schema application report
+        """
+        return apply_schema(self, force=force)
+    
+    def run_schema(self, statement):
+        """Run a schema command (CREATE/DROP INDEX or CONSTRAINT) in auto-commit mode"""
+        self._ensure_connected()
+        with self._open_session() as session:
+            session.run(statement).consume()
+    
+    def explain_query(self, query, parameters=None):
+        """
+        Get the planner's execution plan for a query without running it
+        
+        Args:
+            query (str): Cypher query
+            parameters (dict, optional): Query parameters
+            
+        Returns:
+            dict: Plan tree (operatorType, arguments, children)
+        """
+        self._ensure_connected()
+        with self._open_session(default_access_mode=READ_ACCESS) as session:
+            summary = session.run(f"EXPLAIN {query}", parameters or {}).consume()
+            return summary.plan
+            
+    def _run_managed(self, access_mode, query, parameters):
+        """
+        Run a query in a managed transaction function on a session with the
+        given access mode
+        
+        The driver retries the transaction function on transient errors for
+        up to NEO4J_MAX_TRANSACTION_RETRY_TIME, so there is no retry loop
+        here. Only the first attempt's connection wait is recorded: later
+        attempts also include the driver's backoff sleep, so they are only
+        counted as transaction retries.
+        """
+        self._ensure_connected()
+        attempts = [0]
+        
+        def tx_function(tx, started):
+            attempts[0] += 1
+            if attempts[0] == 1:
+                self._record_acquisition(time.perf_counter() - started)
+            else:
+                with self._metrics_lock:
+                    self.pool_metrics["transaction_retries"] += 1
+            # Collect all records before the transaction function returns
+            return self._run_and_collect(tx, query, parameters)
+        
+        with self._open_session(default_access_mode=access_mode) as session:
+            started = time.perf_counter()
+            if access_mode == READ_ACCESS:
+                return session.execute_read(tx_function, started)
+            return session.execute_write(tx_function, started)
+    
+    def execute_read(self, query, parameters=None):
+        """
+        Execute a read-only Cypher query in a managed read transaction
+        
+        Reads are routed to followers/read replicas on a cluster and retried
+        on transient errors. Inside an active unit of work the query runs on
+        the scoped session instead.
+        
+        Args:
+            query (str): Cypher query that does not modify the graph
+            parameters (dict, optional): Query parameters
+            
+        Returns:
+            list: Records as dictionaries
+        """
+        unit = getattr(self._local, "unit", None)
+        
         try:
-            with self.driver.session() as session:
-                result = session.run(query, parameters or {})
-                # Explicitly collect all records before closing the session
-                records = [record.data() for record in result]
-                return records
+            if unit is not None:
+                return unit.execute_query(query, parameters)
+            return self._run_managed(READ_ACCESS, query, parameters or {})
+        except Exception as e:
+            logger.error(f"Query execution failed: {query}")
+            logger.error(f"Error: {e}")
+            raise
+    
+    def execute_write(self, query, parameters=None):
+        """
+        Execute a Cypher query in a managed write transaction on the leader
+        
+        The transaction function is retried on transient errors, so the query
+        should be idempotent (MERGE rather than CREATE where possible).
+        
+        Args:
+            query (str): Cypher query
+            parameters (dict, optional): Query parameters
+            
+        Returns:
+            list: Records as dictionaries
+        """
+        unit = getattr(self._local, "unit", None)
+        
+        try:
+            if unit is not None and not unit.read_only:
+                return unit.execute_query(query, parameters)
+            records = self._run_managed(WRITE_ACCESS, query, parameters or {})
+            self._graph_changed()
+            return records
+        except Exception as e:
+            logger.error(f"Query execution failed: {query}")
+            logger.error(f"Error: {e}")
+            raise
+            
+    def stream_query(self, query, parameters=None, batch_size=None, fetch_size=None,
+                     read_only=True):
+        """
+        Stream the results of a Cypher query instead of building a full list
+        
+        The session and transaction stay open while the caller iterates and
+        records are pulled from the server fetch_size at a time, so peak
+        memory is bounded by the batch rather than the whole result. The
+        stream always uses its own session, even inside a unit of work.
+        Stop iterating (or close the generator) to release the connection.
+        
+        Args:
+            query (str): Cypher query
+            parameters (dict, optional): Query parameters
+            batch_size (int, optional): Yield lists of this many records instead
+                                        of single records
+            fetch_size (int, optional): Records per network fetch
+                                        (defaults to config.NEO4J_FETCH_SIZE)
+            read_only (bool): Run on the read path
+            
+        Yields:
+            dict or list: One record dictionary, or a batch of them
+        """
+        self._ensure_connected()
+        access_mode = READ_ACCESS if read_only else WRITE_ACCESS
+        
+        try:
+            with self._open_session(default_access_mode=access_mode,
+                                    fetch_size=fetch_size or config.NEO4J_FETCH_SIZE) as session:
+                with self._begin_transaction(session) as tx:
+                    self._record_query(query)
+                    result = tx.run(query, parameters or {})
+                    
+                    if batch_size:
+                        batch = []
+                        for record in result:
+                            batch.append(record.data())
+                            if len(batch) >= batch_size:
+                                yield batch
+                                batch = []
+                        if batch:
+                            yield batch
+                    else:
+                        for record in result:
+                            yield record.data()
+                    
+                    if not read_only:
+                        tx.commit()
+                        self._graph_changed()
+        except GeneratorExit:
+            raise
         except Exception as e:
             logger.error(f"Query execution failed: {query}")
             logger.error(f"Error: {e}")
@@ -82,20 +511,13 @@ class Neo4jManager:
             
     def create_entity(self, entity_type, properties):
         """Create a new entity node in the graph"""
-        query = f"""
-        CREATE (e:{entity_type} $properties)
-        RETURN e
-        """
+        query = QUERIES.render("create_entity", label=entity_type)
         return self.execute_query(query, {"properties": properties})
         
     def create_relationship(self, from_node, relationship, to_node, properties=None):
         """Create a relationship between two nodes"""
-        query = f"""
-        MATCH (a), (b)
-        WHERE id(a) = $from_id AND id(b) = $to_id
-        CREATE (a)-[r:{relationship} $properties]->(b)
-        RETURN r
-        """
+        query = QUERIES.render("create_relationship", rel_type=relationship,
+                               degree_key=degree_key(relationship))
         params = {
             "from_id": from_node,
             "to_id": to_node,
@@ -106,16 +528,12 @@ class Neo4jManager:
     def add_triplet(self, subject_type, subject_props, predicate, object_type, object_props, 
                    rel_props=None):
         """Add a subject-predicate-object triplet to the graph"""
-        query = f"""
-        MERGE (s:{subject_type} {{name: $subject_name}})
-        ON CREATE SET s += $subject_props
-        
-        MERGE (o:{object_type} {{name: $object_name}})
-        ON CREATE SET o += $object_props
+        ensure_label_index(self, subject_type)
+        ensure_label_index(self, object_type)
         
-        CREATE (s)-[r:{predicate} $rel_props]->(o)
-        RETURN s, r, o
-        """
+        query = QUERIES.render("add_triplet", subject_label=subject_type,
+                               object_label=object_type, rel_type=predicate,
+                               degree_key=degree_key(predicate))
         
         params = {
             "subject_name": subject_props.get("name"),
@@ -126,7 +544,113 @@ class Neo4jManager:
         }
         
         return self.execute_query(query, params)
-        
+
+    def add_triplets_batch(self, triplets, batch_size=None):
+        """
+        Add many triplets using one UNWIND statement per label/predicate group
+
+        Triplets are grouped by (subject_type, predicate, object_type) so each
+        group can be written with a single parameterized query. Every batch runs
+        in its own explicit transaction, replacing the per-triplet round trips
+        of add_triplet.
+
+        Args:
+            triplets (list): Triplet dicts with subject_type, subject_props,
+                             predicate, object_type, object_props and rel_props
+            batch_size (int, optional): Rows per UNWIND batch
+                                        (defaults to config.NEO4J_BATCH_SIZE)
+
+        Returns:
+            dict: Totals plus per-batch created/merged counts
+        """
+        batch_size = batch_size or config.NEO4J_BATCH_SIZE
+        stats = {
+            "triplets": 0,
+            "nodes_created": 0,
+            "nodes_merged": 0,
+            "relationships_created": 0,
+            "errors": 0,
+            "batches": []
+        }
+
+        if not triplets:
+            return stats
+
+        self._ensure_connected()
+
+        # Group rows so each UNWIND statement has a fixed label/type signature
+        groups = {}
+        for t in triplets:
+            key = (t["subject_type"], t["predicate"], t["object_type"])
+            groups.setdefault(key, []).append({
+                "subject_name": t["subject_props"].get("name"),
+                "subject_props": t["subject_props"],
+                "object_name": t["object_props"].get("name"),
+                "object_props": t["object_props"],
+                "rel_props": t.get("rel_props") or {}
+            })
+
+        logger.info(f"Writing {len(triplets)} triplets in {len(groups)} groups "
+                    f"(batch size {batch_size})")
+
+        for (subject_type, predicate, object_type), rows in groups.items():
+            ensure_label_index(self, subject_type)
+            ensure_label_index(self, object_type)
+            
+            query = QUERIES.render("add_triplets_batch", subject_label=subject_type,
+                                   object_label=object_type, rel_type=predicate,
+                                   degree_key=degree_key(predicate))
+
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                batch_stats = {
+                    "group": f"{subject_type}-{predicate}->{object_type}",
+                    "rows": len(batch),
+                    "nodes_created": 0,
+                    "nodes_merged": 0,
+                    "relationships_created": 0
+                }
+
+                def work(batch=batch, query=query):
+                    with self._open_session() as session:
+                        with self._begin_transaction(session) as tx:
+                            self._record_query(query)
+                            started = time.perf_counter()
+                            summary = tx.run(query, {"rows": batch}).consume()
+                            tx.commit()
+                    return summary, started
+                
+                try:
+                    # Explicit transactions get no driver retries; MERGE rows are safe to rerun
+                    summary, started = self._retry_transient(work, f"batch {batch_stats['group']}")
+                    
+                    if self.profiler.enabled:
+                        self.profiler.record(query, time.perf_counter() - started, 0, summary)
+
+                    self._graph_changed()
+                    counters = summary.counters
+                    batch_stats["nodes_created"] = counters.nodes_created
+                    # Every row MERGEs two nodes; the ones not created were matched
+                    batch_stats["nodes_merged"] = 2 * len(batch) - counters.nodes_created
+                    batch_stats["relationships_created"] = counters.relationships_created
+
+                    stats["triplets"] += len(batch)
+                    stats["nodes_created"] += batch_stats["nodes_created"]
+                    stats["nodes_merged"] += batch_stats["nodes_merged"]
+                    stats["relationships_created"] += batch_stats["relationships_created"]
+                except Exception as e:
+                    logger.error(f"Batch write failed for {batch_stats['group']}: {e}")
+                    batch_stats["error"] = str(e)
+                    stats["errors"] += len(batch)
+
+                stats["batches"].append(batch_stats)
+
+        logger.info(f"Batch write complete: {stats['triplets']} triplets, "
+                    f"{stats['nodes_created']} nodes created, "
+                    f"{stats['relationships_created']} relationships created")
+
+        return stats
+
     def get_connected_nodes(self, node_id):
         """Get all nodes connected to the specified node"""
         query = """
@@ -134,7 +658,7 @@ class Neo4jManager:
         WHERE id(n) = $node_id
         RETURN m, r, n
         """
-        return self.execute_query(query, {"node_id": node_id})
+        return self.execute_read(query, {"node_id": node_id})
     
     def fix_cypher_query(query):
         """Fix common Cypher syntax issues for Neo4j 5.x compatibility"""
@@ -178,7 +702,7 @@ class Neo4jManager:
         RETURN r.type as risk_type, r.level as risk_level, r.description as description
         ORDER BY r.level DESC
         """
-        return self.execute_query(query, {"name": entity_name})
+        return self.execute_read(query, {"name": entity_name})
         
     def get_related_strategies(self, risk_id):
         """Get recommended strategies for a given risk"""
@@ -188,443 +712,633 @@ class Neo4jManager:
         RETURN s.name as name, s.description as description, s.impact as impact
         ORDER BY s.impact DESC
         """
-        return self.execute_query(query, {"risk_id": risk_id})
+        return self.execute_read(query, {"risk_id": risk_id})
+    
+    @staticmethod
+    def build_fulltext_query(term, mode="fuzzy"):
+        """
+        Build a Lucene query string for the entity full-text index
+        
+        Args:
+            term (str): User-supplied search text
+            mode (str): "exact" (phrase), "prefix" (term*), "fuzzy" (term~)
+                        or "fuzzy_prefix" (either)
+            
+        Returns:
+            str: Lucene query; an exact phrase match is always boosted
+        """
+        escaped = re.sub(r'([+\-!(){}\[\]^"~*?:\\/]|&&|\|\|)', r'\\\1', term.strip())
+        # Lowercase bare boolean keywords so they are matched as terms
+        words = [w.lower() if w in ("AND", "OR", "NOT") else w for w in escaped.split()]
+        if not words:
+            return '""'
+        
+        phrase = '"' + " ".join(words) + '"^4'
+        if mode == "exact":
+            return phrase
+        
+        if mode == "prefix":
+            clauses = [f"{w}*" for w in words]
+        elif mode == "fuzzy":
+            clauses = [f"{w}~" for w in words]
+        else:
+            clauses = [f"({w}* OR {w}~)" for w in words]
+        
+        return f"{phrase} OR ({' AND '.join(clauses)})"
     
-    def find_entity(self, entity_name, entity_types=None):
+    def fulltext_available(self):
+        """
+        Check whether the entity full-text index exists and is online
+        
+        An online index is remembered for the life of the manager. While the
+        index is missing or still populating, the state is checked again at
+        most every NEO4J_FULLTEXT_RECHECK_INTERVAL seconds.
+        """
+        if self._fulltext_available:
+            return True
+        
+        now = time.monotonic()
+        if (self._fulltext_available is None
+                or now - self._fulltext_checked_at >= config.NEO4J_FULLTEXT_RECHECK_INTERVAL):
+            previous = self._fulltext_available
+            self._fulltext_checked_at = now
+            try:
+                result = self.execute_read(
+                    """
+                    SHOW INDEXES YIELD name, type, state
+                    WHERE name = $name AND type = 'FULLTEXT'
+                    RETURN state
+                    """,
+                    {"name": ENTITY_FULLTEXT_INDEX}
+                )
+                self._fulltext_available = bool(result) and result[0]["state"] == "ONLINE"
+            except Exception as e:
+                logger.warning(f"Could not check full-text index state: {e}")
+                self._fulltext_available = False
+            
+            if not self._fulltext_available and previous is None:
+                logger.warning(f"Full-text index {ENTITY_FULLTEXT_INDEX} unavailable, "
+                               f"entity search will use regex scans")
+            elif self._fulltext_available and previous is False:
+                logger.info(f"Full-text index {ENTITY_FULLTEXT_INDEX} is online, "
+                            f"entity search will use it")
+        return self._fulltext_available
+    
+    def fulltext_search(self, search_text, mode="fuzzy", entity_types=None, limit=10,
+                        return_clause="nodes"):
+        """
+        Search entity names through the full-text index with ranked results
+        
+        Args:
+            search_text (str): Name or fragment to search for
+            mode (str): Matching mode passed to build_fulltext_query
+            entity_types (list, optional): Only return nodes with one of these labels
+            limit (int): Maximum number of results
+            return_clause (str): "nodes" for full nodes, "summary" for name,
+                                 types and connection count
+            
+        Returns:
+            list: Matching records ordered by score
+            
+        Raises:
+            ClientError: If the index does not exist
+        """
+        query = QUERIES.render("fulltext_search", return_clause=return_clause)
+        return self.execute_read(query, {
+            "index": ENTITY_FULLTEXT_INDEX,
+            "search": self.build_fulltext_query(search_text, mode),
+            "entity_types": entity_types or None,
+            "limit": limit
+        })
+    
+    def find_entity(self, entity_name, entity_types=None, mode="fuzzy"):
         """
         Find entity nodes by name, optionally filtering by type
         
+        Uses the entity full-text index when it is available. Falls back to a
+        case-insensitive regex scan when the index is unavailable, when
+        entity_types names a label the index does not cover, or when the
+        index finds nothing (nodes with free-form extracted labels are not
+        in it).
+        
         Args:
             entity_name (str): Name of the entity to find
             entity_types (list, optional): List of entity types to filter by
+            mode (str): Full-text matching mode (exact, prefix, fuzzy, fuzzy_prefix)
             
         Returns:
             list: Matching entity nodes
         """
-        if entity_types:
-            # Convert list of types to Cypher label expression
-            type_filter = " OR ".join([f"n:{entity_type}" for entity_type in entity_types])
-            query = f"""
-            MATCH (n)
-            WHERE (n.name = $name OR n.name =~ $fuzzy_name) AND ({type_filter})
-            RETURN n, labels(n) as types
-            LIMIT 10
-            """
-        else:
-            query = """
-            MATCH (n)
-            WHERE n.name = $name OR n.name =~ $fuzzy_name
-            RETURN n, labels(n) as types
-            LIMIT 10
-            """
+        covered = not entity_types or all(t in ENTITY_FULLTEXT_LABELS for t in entity_types)
+        if covered and self.fulltext_available():
+            try:
+                results = self.fulltext_search(entity_name, mode, entity_types, limit=10)
+                if results:
+                    return results
+            except ClientError as e:
+                logger.warning(f"Full-text entity search failed, using regex fallback: {e}")
+                self._fulltext_available = False
+                self._fulltext_checked_at = time.monotonic()
+        
+        query = QUERIES.render("find_entity_regex")
             
         # Add case-insensitive and fuzzy matching
-        fuzzy_name = f"(?i).*{entity_name}.*"
+        fuzzy_name = f"(?i).*{re.escape(entity_name)}.*"
         
-        return self.execute_query(query, {"name": entity_name, "fuzzy_name": fuzzy_name})
+        return self.execute_read(query, {"name": entity_name, "fuzzy_name": fuzzy_name,
+                                         "entity_types": entity_types or None})
 
-    def import_triplets_batch(self, triplets, batch_size=100):
+    def _retry_transient(self, work, description="query"):
         """
-        Import a large batch of triplets efficiently
+        Run a unit of work, retrying transient failures with exponential backoff
+
+        For explicit transactions only; managed transactions (execute_read,
+        execute_write) are already retried by the driver.
+
+        Args:
+            work (callable): Zero-argument function performing the database work
+            description (str): Label used in log messages
+
+        Returns:
+            The return value of work()
+        """
+        max_retries = config.NEO4J_MAX_RETRIES
+        delay = config.NEO4J_RETRY_BASE_DELAY
+
+        for attempt in range(max_retries + 1):
+            try:
+                return work()
+            except (TransientError, ServiceUnavailable, SessionExpired) as e:
+                if attempt >= max_retries:
+                    logger.error(f"{description} failed after {attempt + 1} attempts: {e}")
+                    raise
+                logger.warning(f"Transient error in {description} "
+                               f"(attempt {attempt + 1}/{max_retries + 1}), "
+                               f"retrying in {delay:.2f}s: {e}")
+                time.sleep(delay)
+                delay *= 2
+
+    def import_triplets_batch(self, triplets, batch_size=None):
+        """
+        Bulk-load raw extractor triplets into the graph
+        
+        Nodes are MERGEd on :Entity so the entity_name index is used, and rows
+        are grouped by relationship type so each group is written with a plain
+        typed MERGE instead of APOC. Relationships are idempotent on
+        (subject, predicate, object, context), so re-importing the same
+        triplets does not duplicate edges.
         
         Args:
             triplets (list): List of triplet dictionaries 
                             with subject, predicate, object data
-            batch_size (int): Number of triplets to process in each transaction
+            batch_size (int, optional): Number of triplets to process in each
+                                        transaction (defaults to config.NEO4J_BATCH_SIZE)
             
         Returns:
             dict: Import statistics
         """
+        stats = {
+            "imported": 0,
+            "errors": 0,
+            "skipped": 0,
+            "nodes_created": 0,
+            "relationships_created": 0,
+            "elapsed_seconds": 0.0,
+            "triplets_per_sec": 0.0
+        }
         if not triplets:
-            return {"imported": 0, "errors": 0}
+            return stats
         
-        stats = {"imported": 0, "errors": 0}
-        batches = [triplets[i:i+batch_size] for i in range(0, len(triplets), batch_size)]
+        self._ensure_connected()
         
-        logger.info(f"Importing {len(triplets)} triplets in {len(batches)} batches")
+        batch_size = batch_size or config.NEO4J_BATCH_SIZE
         
-        for batch_idx, batch in enumerate(batches):
-            try:
-                with self.driver.session() as session:
-                    # Create unwind query for batch insertion
-                    query = """
-                    UNWIND $batch AS triplet
-                    
-                    MERGE (s {name: triplet.subject})
-                    ON CREATE SET s:Entity, s.created_at = datetime(), 
-                                  s += triplet.subject_props
-                    
-                    MERGE (o {name: triplet.object})
-                    ON CREATE SET o:Entity, o.created_at = datetime(), 
-                                  o += triplet.object_props
-                    
-                    // Check if relationship already exists to avoid duplicates
-                    OPTIONAL MATCH (s)-[existing:PLACEHOLDER {context: triplet.context}]->(o)
-                    WHERE type(existing) = triplet.predicate
-                    
-                    // Create relationship if it doesn't exist
-                    FOREACH(_ IN CASE WHEN existing IS NULL THEN [1] ELSE [] END |
-                        CREATE (s)-[r:PLACEHOLDER]->(o)
-                        SET r = triplet.rel_props,
-                            r.created_at = datetime(),
-                            r.context = triplet.context,
-                            r.confidence = triplet.confidence
-                    )
-                    
-                    WITH s, o, triplet
-                    // Set the proper relationship type using apoc.create.relationship
-                    CALL apoc.create.relationship(s, triplet.predicate, 
-                        {context: triplet.context, 
-                         created_at: datetime(), 
-                         confidence: triplet.confidence}, o) 
-                    YIELD rel
-                    
-                    RETURN COUNT(*) as added
-                    """
-                    
-                    # Format batch data
-                    batch_data = []
-                    for t in batch:
-                        batch_item = {
-                            "subject": t.get("subject", ""),
-                            "subject_props": {
-                                "name": t.get("subject", ""),
-                                "type": t.get("subject_type", "Entity")
-                            },
-                            "predicate": t.get("predicate", "RELATED_TO"),
-                            "object": t.get("object", ""),
-                            "object_props": {
-                                "name": t.get("object", ""),
-                                "type": t.get("object_type", "Entity")
-                            },
-                            "rel_props": {
-                                "source": t.get("extraction_method", "unknown"),
-                                "timestamp": t.get("timestamp", datetime.now().isoformat())
-                            },
-                            "context": t.get("context", ""),
-                            "confidence": t.get("confidence", 0.5)
-                        }
-                        batch_data.append(batch_item)
-                    
-                    result = session.run(query.replace("PLACEHOLDER", "TEMP_REL"), 
-                                       {"batch": batch_data})
-                    added = result.single().get("added", 0)
-                    stats["imported"] += added
-                    
-                    logger.info(f"Batch {batch_idx+1}/{len(batches)}: Imported {added} triplets")
-                    
-            except Exception as e:
-                logger.error(f"Error importing batch {batch_idx+1}: {e}")
-                stats["errors"] += len(batch)
+        # Group rows by sanitized relationship type
+        groups = {}
+        for t in triplets:
+            subject = t.get("subject", "")
+            obj = t.get("object", "")
+            predicate = ''.join(c for c in str(t.get("predicate", "")).upper()
+                                if c.isalnum() or c == '_')
+            if not subject or not obj or not predicate:
+                stats["skipped"] += 1
+                continue
+            
+            groups.setdefault(predicate, []).append({
+                "subject": subject,
+                "subject_type": t.get("subject_type", "Entity"),
+                "object": obj,
+                "object_type": t.get("object_type", "Entity"),
+                "context": t.get("context", ""),
+                "confidence": t.get("confidence", 0.5),
+                "source": t.get("extraction_method", "unknown"),
+                "timestamp": t.get("timestamp", datetime.now().isoformat())
+            })
+        
+        total_batches = sum((len(rows) + batch_size - 1) // batch_size for rows in groups.values())
+        logger.info(f"Importing {len(triplets)} triplets in {total_batches} batches "
+                    f"across {len(groups)} relationship types")
+        
+        start_time = time.time()
+        batch_idx = 0
+        
+        for predicate, rows in groups.items():
+            query = QUERIES.render("import_triplets_batch", rel_type=predicate,
+                                   degree_key=degree_key(predicate))
+            
+            for offset in range(0, len(rows), batch_size):
+                batch = rows[offset:offset + batch_size]
+                batch_idx += 1
+                
+                def write_batch(tx, batch=batch, query=query):
+                    self._record_query(query)
+                    started = time.perf_counter()
+                    summary = tx.run(query, {"batch": batch}).consume()
+                    if self.profiler.enabled:
+                        self.profiler.record(query, time.perf_counter() - started, 0, summary)
+                    return summary
+                
+                try:
+                    # Managed transaction: the driver retries transient errors
+                    with self._open_session() as session:
+                        summary = session.execute_write(write_batch)
+                    self._graph_changed()
+                    counters = summary.counters
+                    stats["imported"] += len(batch)
+                    stats["nodes_created"] += counters.nodes_created
+                    stats["relationships_created"] += counters.relationships_created
+                    logger.debug(f"Batch {batch_idx}/{total_batches} ({predicate}): "
+                                 f"{len(batch)} rows, "
+                                 f"{counters.relationships_created} new relationships")
+                except Exception as e:
+                    logger.error(f"Error importing batch {batch_idx} ({predicate}): {e}")
+                    stats["errors"] += len(batch)
+        
+        elapsed = time.time() - start_time
+        stats["elapsed_seconds"] = round(elapsed, 3)
+        stats["triplets_per_sec"] = round(stats["imported"] / elapsed, 1) if elapsed > 0 else 0.0
+        
+        logger.info(f"Imported {stats['imported']} triplets in {elapsed:.2f}s "
+                    f"({stats['triplets_per_sec']} triplets/sec, {stats['errors']} errors)")
         
         return stats
 
-    def run_graph_analytics(self, algorithm, parameters=None):
+    def get_document(self, source_id):
         """
-        Run graph analytics algorithms using the Neo4j Graph Data Science library
+        Get the stored provenance state of a document
         
         Args:
-            algorithm (str): Name of the algorithm to run
-            parameters (dict, optional): Algorithm parameters
+            source_id (str): Document id
             
         Returns:
-            dict: Algorithm results
-        """
-        supported_algorithms = {
-            "pagerank": {
-                "query": """
-                CALL gds.pageRank.stream($config)
-                YIELD nodeId, score
-                MATCH (n) WHERE id(n) = nodeId
-                RETURN n.name AS entity, score
-                ORDER BY score DESC
-                LIMIT 20
-                """,
-                "default_config": {
-                    "nodeProjection": "*",
-                    "relationshipProjection": "*",
-                    "maxIterations": 20,
-                    "dampingFactor": 0.85
-                }
-            },
-            "community_detection": {
-                "query": """
-                CALL gds.louvain.stream($config)
-                YIELD nodeId, communityId
-                MATCH (n) WHERE id(n) = nodeId
-                RETURN n.name AS entity, communityId, count(*) as community_size
-                ORDER BY communityId
-                """,
-                "default_config": {
-                    "nodeProjection": "*",
-                    "relationshipProjection": "*",
-                    "includeIntermediateCommunities": False
-                }
-            },
-            "centrality": {
-                "query": """
-                CALL gds.betweenness.stream($config)
-                YIELD nodeId, score
-                MATCH (n) WHERE id(n) = nodeId
-                RETURN n.name AS entity, score
-                ORDER BY score DESC
-                LIMIT 20
-                """,
-                "default_config": {
-                    "nodeProjection": "*",
-                    "relationshipProjection": "*"
-                }
-            },
-            "similarity": {
-                "query": """
-                CALL gds.nodeSimilarity.stream($config)
-                YIELD node1, node2, similarity
-                MATCH (n1) WHERE id(n1) = node1
-                MATCH (n2) WHERE id(n2) = node2
-                RETURN n1.name AS entity1, n2.name AS entity2, similarity
-                ORDER BY similarity DESC
-                LIMIT 100
-                """,
-                "default_config": {
-                    "nodeProjection": "*",
-                    "relationshipProjection": "*",
-                    "topK": 10,
-                    "similarityCutoff": 0.5
-                }
-            }
-        }
+            dict: content_hash and triplet_keys, or None if the document is unknown
+        """
+        result = self.execute_read(QUERIES.render("document_state"), {"source_id": source_id})
+        return result[0] if result else None
+    
+    def _remove_document_triplets(self, uow, source_id, keys=None):
+        """
+        Delete a document's relationships (all of them, or the given keys)
+        and any endpoint nodes left without relationships
         
-        if algorithm not in supported_algorithms:
-            raise ValueError(f"Unsupported algorithm: {algorithm}. " +
-                           f"Supported algorithms: {list(supported_algorithms.keys())}")
+        Returns:
+            tuple: (relationships deleted, orphan nodes deleted)
+        """
+        params = {"source_id": source_id, "keys": keys}
+        result = uow.execute_query(QUERIES.render("delete_document_triplets",
+                                                  key_filter=keys is not None), params)
+        deleted = result[0]["deleted"] if result else 0
+        endpoints = list(set(result[0]["endpoints"])) if result else []
         
-        algo_config = supported_algorithms[algorithm]
-        config = algo_config["default_config"].copy()
+        uow.execute_query(QUERIES.render("unlink_document_subjects"), {"source_id": source_id})
         
-        # Update with user parameters if provided
-        if parameters:
-            config.update(parameters)
-        
-        return self.execute_query(algo_config["query"], {"config": config})
-
-    def get_business_competitors(self, company_name, limit=10):
+        orphans = 0
+        if endpoints:
+            orphan_result = uow.execute_query(QUERIES.render("delete_orphan_nodes"), {"ids": endpoints})
+            orphans = orphan_result[0]["deleted"] if orphan_result else 0
+            
+            # Deletes cannot decrement per-type degrees in Cypher, so recount
+            for start in range(0, len(endpoints), config.NEO4J_BATCH_SIZE):
+                self._refresh_degree_batch(uow, endpoints[start:start + config.NEO4J_BATCH_SIZE])
+        return deleted, orphans
+    
+    def upsert_document(self, source_id, content_hash, triplets, name=None):
         """
-        Find competitors for a given company
+        Bring the graph in line with the current contents of a document
+        
+        Every relationship a document produces is keyed by triplet_key and
+        tagged with the document id, and the Document node records the keys
+        it produced. Re-ingesting a document writes only the difference:
+        relationships whose key disappeared are deleted (with endpoint nodes
+        left isolated) and new keys are merged. An unchanged content hash
+        is a no-op. The whole diff runs in one transaction.
         
         Args:
-            company_name (str): Name of the company
-            limit (int): Maximum number of competitors to return
+            source_id (str): Stable document id (e.g. its path)
+            content_hash (str): Hash of the document content
+            triplets (list): Prepared triplet rows (as taken by add_triplets_batch)
+            name (str, optional): Display name for the Document node
             
         Returns:
-            list: Competitor entities with relationship data
+            dict: status plus added/removed/unchanged relationship counts
         """
-        query = """
-        MATCH (c:Entity {name: $company_name})-[:COMPETES_WITH]->(m:Market)
-        MATCH (competitor:Entity)-[:COMPETES_WITH]->(m)
-        WHERE competitor <> c
-        WITH competitor, count(m) as shared_markets
+        stats = {"source_id": source_id, "status": "unchanged", "added": 0, "removed": 0,
+                 "unchanged": 0, "orphans_deleted": 0}
         
-        // Get strengths of competitor
-        OPTIONAL MATCH (competitor)-[:HAS_STRENGTH]->(s:Strength)
-        WITH competitor, shared_markets, collect(s.name) as strengths
+        existing = self.get_document(source_id)
+        if existing and existing.get("content_hash") == content_hash:
+            stats["unchanged"] = len(existing.get("triplet_keys") or [])
+            return stats
         
-        // Get any direct competitor relationships
-        OPTIONAL MATCH (c:Entity {name: $company_name})-[r:COMPETES_WITH|COMPETITOR_OF]->(competitor)
+        # Deduplicate by key; the first occurrence wins
+        rows = {}
+        for t in triplets:
+            rows.setdefault(self.triplet_key(source_id, t), t)
         
-        RETURN competitor.name as name, 
-               shared_markets,
-               strengths,
-               EXISTS(r) as direct_competitor,
-               CASE WHEN EXISTS(r) THEN r.context ELSE NULL END as context
-        ORDER BY shared_markets DESC, direct_competitor DESC
-        LIMIT $limit
+        old_keys = set((existing or {}).get("triplet_keys") or [])
+        removed = sorted(old_keys - rows.keys())
+        added = {key: t for key, t in rows.items() if key not in old_keys}
+        
+        groups = {}
+        for key, t in added.items():
+            groups.setdefault((t["subject_type"], t["predicate"], t["object_type"]), []).append({
+                "key": key,
+                "subject_name": t["subject_props"].get("name"),
+                "subject_props": t["subject_props"],
+                "object_name": t["object_props"].get("name"),
+                "object_props": t["object_props"],
+                "rel_props": t.get("rel_props") or {}
+            })
+        
+        for subject_type, _, object_type in groups:
+            ensure_label_index(self, subject_type)
+            ensure_label_index(self, object_type)
+        
+        with self.unit_of_work(read_only=False, transaction=True) as uow:
+            uow.execute_query(QUERIES.render("upsert_document_node"), {
+                "source_id": source_id,
+                "name": name or source_id,
+                "content_hash": content_hash,
+                "triplet_keys": sorted(rows)
+            })
+            
+            if removed:
+                stats["removed"], stats["orphans_deleted"] = self._remove_document_triplets(
+                    uow, source_id, removed)
+            
+            for (subject_type, predicate, object_type), group_rows in groups.items():
+                query = QUERIES.render("upsert_document_triplets", subject_label=subject_type,
+                                       object_label=object_type, rel_type=predicate,
+                                       degree_key=degree_key(predicate))
+                for start in range(0, len(group_rows), config.NEO4J_BATCH_SIZE):
+                    uow.execute_query(query, {"source_id": source_id,
+                                              "rows": group_rows[start:start + config.NEO4J_BATCH_SIZE]})
+        
+        stats["status"] = "updated" if existing else "created"
+        stats["added"] = len(added)
+        stats["unchanged"] = len(rows) - len(added)
+        
+        logger.info(f"Document {source_id} {stats['status']}: {stats['added']} relationships added, "
+                    f"{stats['removed']} removed, {stats['unchanged']} unchanged")
+        return stats
+    
+    def delete_by_source(self, source_id):
         """
-        return self.execute_query(query, {"company_name": company_name, "limit": limit})
-    def run_risk_query(self, risk_type):
+        Remove everything a document contributed to the graph
+        
+        Deletes the document's relationships, endpoint nodes left without
+        relationships, and the Document node itself.
+        
+        Args:
+            source_id (str): Document id
+            
+        Returns:
+            dict: Counts of deleted relationships and orphan nodes
         """
-        Execute risk-specific queries for the risk analyzer
+        with self.unit_of_work(read_only=False, transaction=True) as uow:
+            deleted, orphans = self._remove_document_triplets(uow, source_id)
+            uow.execute_query(QUERIES.render("delete_document_node"), {"source_id": source_id})
+        
+        logger.info(f"Deleted document {source_id}: {deleted} relationships, {orphans} orphan nodes")
+        return {"source_id": source_id, "relationships_deleted": deleted, "orphans_deleted": orphans}
+
+    def _graph_changed(self):
+        """Record that the graph was modified"""
+        with self._metrics_lock:
+            self.graph_version += 1
+
+    def _count_statistics_apoc(self):
+        row = self.execute_read(QUERIES.render("apoc_meta_stats"))[0]
+        return {"node_count": row["nodeCount"], "relationship_count": row["relCount"],
+                "labels": dict(row["labels"]), "relationship_types": dict(row["relTypesCount"])}
     
-        Args:
-            risk_type (str): Type of risk to analyze (financial, operational, market)
+    def _count_statistics_db_stats(self):
+        row = self.execute_read(QUERIES.render("db_graph_counts"))[0]
+        counts = {"node_count": 0, "relationship_count": 0, "labels": {}, "relationship_types": {}}
+        for entry in row["nodes"]:
+            if "label" in entry:
+                counts["labels"][entry["label"]] = entry["count"]
+            else:
+                counts["node_count"] = entry["count"]
+        for entry in row["relationships"]:
+            # Entries qualified by start or end label are per-pattern counts
+            if "startLabel" in entry or "endLabel" in entry:
+                continue
+            if "relationshipType" in entry:
+                counts["relationship_types"][entry["relationshipType"]] = entry["count"]
+            else:
+                counts["relationship_count"] = entry["count"]
+        return counts
+    
+    def _count_statistics_queries(self):
+        counts = {
+            "node_count": self.execute_read(QUERIES.render("count_all_nodes"))[0]["count"],
+            "relationship_count": self.execute_read(QUERIES.render("count_all_relationships"))[0]["count"],
+            "labels": {},
+            "relationship_types": {}
+        }
+        for row in self.execute_read(QUERIES.render("db_labels")):
+            label = row["label"]
+            counts["labels"][label] = self.execute_read(
+                QUERIES.render("count_label_nodes", label=label))[0]["count"]
+        for row in self.execute_read(QUERIES.render("db_relationship_types")):
+            rel_type = row["relationshipType"]
+            counts["relationship_types"][rel_type] = self.execute_read(
+                QUERIES.render("count_type_relationships", rel_type=rel_type))[0]["count"]
+        return counts
+    
+    def _count_statistics(self):
+        """
+        Graph-wide counts from the count store
+        
+        Tries apoc.meta.stats, then db.stats.retrieve (which needs admin
+        rights), then one count-store query per label and relationship type.
+        The source that works is remembered for later calls.
         
         Returns:
-            list: Risk data for analysis
-        """
-        if risk_type == "financial":
-            query = """
-            MATCH (e:Entity)-[:HAS_METRIC]->(m:Metric)
-            WHERE m.name IN ['revenue', 'profit', 'cash_flow', 'debt_to_equity', 'current_ratio']
-            WITH e, m, COUNT(*) as risk_count
-            RETURN e.name as entity, m.name as metric, m.value as value, 
-                m.unit as unit, risk_count
-            ORDER BY risk_count DESC
-            LIMIT 20
-            """
-        elif risk_type == "operational":
-            query = """
-            MATCH (e:Entity)-[:HAS_PROCESS]->(p:Process)-[:HAS_ISSUE]->(i)
-            WITH e, p, i, COUNT(*) as risk_count
-            RETURN e.name as entity, p.name as process, i.description as issue, risk_count
-            ORDER BY risk_count DESC
-            LIMIT 20
-            """
-        elif risk_type == "market":
-            query = """
-            MATCH (e:Entity)-[:OPERATES_IN|COMPETES_WITH]->(m)
-            MATCH (m)-[:HAS_EMERGING_TREND]->(t)
-            WHERE t.name CONTAINS 'declin' OR t.name CONTAINS 'decrease'
-            WITH e, m, t, COUNT(*) as risk_count
-            RETURN e.name as entity, m.name as market, t.name as trend, risk_count
-            ORDER BY risk_count DESC
-            LIMIT 20
-            """
-        else:
-            return []
+            dict: node_count, relationship_count, labels, relationship_types and source
+        """
+        readers = [("apoc.meta.stats", self._count_statistics_apoc),
+                   ("db.stats", self._count_statistics_db_stats),
+                   ("count_store", self._count_statistics_queries)]
+        if self._statistics_source:
+            readers.sort(key=lambda reader: reader[0] != self._statistics_source)
         
-        return self.execute_query(query)
+        error = None
+        for source, reader in readers:
+            try:
+                counts = reader()
+            except Exception as e:
+                logger.debug(f"Graph statistics from {source} unavailable: {e}")
+                error = e
+                continue
+            counts["source"] = self._statistics_source = source
+            return counts
+        raise error
+    
+    def gds_available(self):
+        """Whether the Graph Data Science library can be used"""
+        return self.projections.available()
 
-    def get_business_risks(self, entity_name=None, risk_types=None, min_level=None):
+    def _refresh_degree_batch(self, runner, node_ids):
+        """Recount degree properties for a batch of element ids on runner (self or a unit of work)"""
+        rows = runner.execute_query(QUERIES.render("node_degree_counts"), {"ids": node_ids})
+        
+        updates = []
+        for row in rows:
+            # Per-type counts that dropped to zero are removed by setting null
+            props = {key: None for key in row["degree_keys"]}
+            total = 0
+            for rel_type, count in row["counts"]:
+                if rel_type is not None and count:
+                    props[degree_key(rel_type)] = count
+                    total += count
+            props["degree"] = total
+            updates.append({"id": row["id"], "props": props})
+        
+        if updates:
+            runner.execute_query(QUERIES.render("set_node_degrees"), {"rows": updates})
+        return len(updates)
+    
+    def refresh_degrees(self, node_ids=None, batch_size=None):
         """
-        Get business risks from the knowledge graph
+        Recompute stored degree properties from the relationships present
+        
+        The triplet write paths keep degree, degree_<TYPE> and last_updated
+        current incrementally. This repairs nodes changed by other writes
+        and backfills graphs written before the properties existed.
         
         Args:
-            entity_name (str, optional): Name of specific entity
-            risk_types (list, optional): List of risk types to filter by
-            min_level (float, optional): Minimum risk level (0-1)
+            node_ids (list, optional): Element ids to refresh (every node if omitted)
+            batch_size (int, optional): Nodes per batch (defaults to config.NEO4J_BATCH_SIZE)
             
         Returns:
-            list: Risk entities with related data
+            int: Number of nodes refreshed
         """
-        params = {}
+        batch_size = batch_size or config.NEO4J_BATCH_SIZE
         
-        if entity_name:
-            entity_filter = "AND (e.name = $entity_name)"
-            params["entity_name"] = entity_name
+        if node_ids is None:
+            batches = ([row["id"] for row in batch] for batch in
+                       self.stream_query(QUERIES.render("degree_node_ids"), batch_size=batch_size))
         else:
-            entity_filter = ""
+            batches = (node_ids[start:start + batch_size]
+                       for start in range(0, len(node_ids), batch_size))
         
-        if risk_types:
-            type_filter = "AND r.type IN $risk_types"
-            params["risk_types"] = risk_types
-        else:
-            type_filter = ""
+        refreshed = 0
+        for batch in batches:
+            refreshed += self._refresh_degree_batch(self, batch)
         
-        if min_level is not None:
-            level_filter = "AND r.level >= $min_level"
-            params["min_level"] = min_level
-        else:
-            level_filter = ""
+        logger.info(f"Refreshed degree properties on {refreshed} nodes")
+        return refreshed
+    
+    def run_graph_analytics(self, algorithm, parameters=None, node_labels=None,
+                            relationship_types=None, **options):
+        """
+        Run graph analytics algorithms using the Neo4j Graph Data Science library
         
-        query = f"""
-        MATCH (e:Entity)-[:HAS_RISK]->(r:Risk)
-        WHERE true {entity_filter} {type_filter} {level_filter}
+        Algorithms run on a named in-memory projection from self.projections,
+        which is created once per graph version (or max age) and shared by
+        every call with the same labels, relationship types and orientation.
         
-        // Get related mitigation strategies if any
-        OPTIONAL MATCH (r)-[:HAS_MITIGATION]->(s:Strategy)
+        Args:
+            algorithm (str): Name of the algorithm to run (see gds_projections.ALGORITHMS)
+            parameters (dict, optional): Algorithm configuration overrides
+            node_labels (list, optional): Labels to project (defaults to ["Entity"])
+            relationship_types (list, optional): Relationship types to project (all if omitted)
+            **options: Query options such as limit, names (restrict results to
+                       these entity names) or source_name (personalized pagerank)
+            
+        Returns:
+            list: Algorithm result records
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unsupported algorithm: {algorithm}. " +
+                           f"Supported algorithms: {list(ALGORITHMS.keys())}")
         
-        WITH e, r, collect(s) as strategies
+        spec = ALGORITHMS[algorithm]
+        algo_config = dict(spec["default_config"])
         
-        RETURN e.name as entity,
-               r.type as risk_type,
-               r.level as risk_level,
-               r.description as description,
-               r.impact as impact,
-               r.source as source,
-               strategies
-        ORDER BY risk_level DESC
-        """
+        # Update with user parameters if provided
+        if parameters:
+            algo_config.update(parameters)
         
-        return self.execute_query(query, params)
+        template, variant = spec["query"]
+        params = dict(spec["params"])
+        params.update(options)
+        params["config"] = algo_config
+        
+        # Project and run on one session, on the member holding the projection
+        with self.gds_session() as uow:
+            projection = self.projections.get(uow, node_labels, relationship_types, spec["orientation"])
+            params["graph_name"] = projection["name"]
+            return uow.execute_query(QUERIES.render(template, **variant), params)
 
-    def export_subgraph(self, center_entity, relationship_types=None, 
-                      max_distance=2, format="json"):
+    def get_business_competitors(self, company_name, limit=10):
         """
-        Export a subgraph around a central entity
+        Find competitors for a given company
         
         Args:
-            center_entity (str): Central entity name
-            relationship_types (list, optional): List of relationship types to include
-            max_distance (int): Maximum path length from center entity
-            format (str): Output format (json, graphml, cypher)
+            company_name (str): Name of the company
+            limit (int): Maximum number of competitors to return
             
         Returns:
-            dict: Exported subgraph data
+            list: Competitor entities with relationship data
         """
-        params = {
-            "center_entity": center_entity,
-            "max_distance": max_distance
-        }
-        
-        if relationship_types:
-            rel_filter = "WHERE type(r) IN $relationship_types"
-            params["relationship_types"] = relationship_types
-        else:
-            rel_filter = ""
-        
-        query = f"""
-        MATCH path = (center:Entity {{name: $center_entity}})-[r*1..$max_distance]-(connected)
-        {rel_filter}
-        WITH nodes(path) as nodes, relationships(path) as rels
-        UNWIND nodes as node
-        WITH COLLECT(DISTINCT node) as nodes, rels
-        UNWIND rels as rel
-        RETURN COLLECT(DISTINCT nodes) as nodes, COLLECT(DISTINCT rel) as relationships
-        """
-        
-        result = self.execute_query(query, params)
-        
-        if not result or not result[0]['nodes']:
-            logger.warning(f"No subgraph found for entity: {center_entity}")
-            return {"nodes": [], "relationships": []}
-        
-        # Process result based on requested format
-        if format == "json":
-            # Convert to a simpler JSON structure
-            nodes_data = []
-            for node in result[0]['nodes']:
-                node_properties = dict(node)
-                node_id = node_properties.pop('id', None)
-                node_data = {
-                    "id": node_id,
-                    "labels": list(node.labels),
-                    "properties": node_properties
-                }
-                nodes_data.append(node_data)
-                
-            relationships_data = []
-            for rel in result[0]['relationships']:
-                rel_properties = dict(rel)
-                source_id = rel.start_node.id
-                target_id = rel.end_node.id
-                rel_type = getattr(rel, "type", None) or type(rel).__name__
-                
-                rel_data = {
-                    "source": source_id,
-                    "target": target_id,
-                    "type": rel_type,
-                    "properties": rel_properties
-                }
-                relationships_data.append(rel_data)
-                
-            return {
-                "nodes": nodes_data,
-                "relationships": relationships_data,
-                "metadata": {
-                    "center_entity": center_entity,
-                    "max_distance": max_distance,
-                    "format": format,
-                    "exported_at": datetime.now().isoformat()
-                }
-            }
+        query = """
+        MATCH (c:Entity {name: $company_name})-[:COMPETES_WITH]->(m:Market)
+        MATCH (competitor:Entity)-[:COMPETES_WITH]->(m)
+        WHERE competitor <> c
+        WITH competitor, count(m) as shared_markets
         
-        elif format == "graphml":
-            # Return data for GraphML conversion
-            # (would typically be processed further to create GraphML XML)
-            return {"result": result[0], "format": "graphml"}
+        // Get strengths of competitor
+        OPTIONAL MATCH (competitor)-[:HAS_STRENGTH]->(s:Strength)
+        WITH competitor, shared_markets, collect(s.name) as strengths
         
-        elif format == "cypher":
-            # Generate Cypher script to recreate this subgraph
-            return {"result": result[0], "format": "cypher"}
+        // Get any direct competitor relationships
+        OPTIONAL MATCH (c:Entity {name: $company_name})-[r:COMPETES_WITH|COMPETITOR_OF]->(competitor)
         
-        else:
-            raise ValueError(f"Unsupported export format: {format}")
\ No newline at end of file
+        RETURN competitor.name as name, 
+               shared_markets,
+               strengths,
+               EXISTS(r) as direct_competitor,
+               CASE WHEN EXISTS(r) THEN r.context ELSE NULL END as context
+        ORDER BY shared_markets DESC, direct_competitor DESC
+        LIMIT $limit
+        """
+        return self.execute_read(query, {"company_name": company_name, "limit": limit})
+
+    def _subgraph_start_nodes(self, entity_name, label):
+        """Element ids of the nodes a subgraph expansion starts from"""
+        query = QUERIES.render("subgraph_start_nodes", label=label)
+        return [row["id"] for row in self.execute_read(query, {"name": entity_name})]
+
+    def _subgraph_expand(self, node_ids, relationship_types=None):
+        """Stream the relationships touching a batch of frontier nodes"""
+        return self.stream_query(QUERIES.render("subgraph_expand"), {
+            "frontier": node_ids,
+            "relationship_types": relationship_types or None
+        })
+
+    def _subgraph_nodes(self, node_ids):
+        """Fetch labels and properties for a batch of nodes"""
+        return self.execute_read(QUERIES.render("subgraph_nodes"), {"ids": node_ids})
@@ -0,0 +1,216 @@
+"""
+Query profiling for the knowledge graph component.
+Aggregates wall time, rows and result summary counters per named query,
+writes a slow-query log and optionally PROFILEs a sample of calls.
+"""
+
+import os
+import re
+import random
+import hashlib
+import logging
+import threading
+import config
+from knowledge_graph.query_registry import QUERIES
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Separate logger so slow queries can go to their own file
+slow_query_logger = logging.getLogger("knowledge_graph.slow_queries")
+
+# Statements that cannot be prefixed with PROFILE
+_UNPROFILABLE = re.compile(r"^\s*(EXPLAIN|PROFILE|SHOW|CREATE\s+(INDEX|CONSTRAINT|FULLTEXT)|DROP)\b",
+                           re.IGNORECASE)
+
+# Summary counters summed per query
+_COUNTER_FIELDS = ["nodes_created", "nodes_deleted", "relationships_created",
+                   "relationships_deleted", "properties_set"]
+
+def _sum_db_hits(profile):
+    """Sum dbHits over a PROFILE plan tree"""
+    if not profile:
+        return 0
+    hits = profile.get("dbHits", 0) or 0
+    for child in profile.get("children", []):
+        hits += _sum_db_hits(child)
+    return hits
+
+def query_name(query):
+    """
+    Name a query for aggregation.
+
+    Registered templates report their registry name; ad-hoc queries are
+    named after their first clause plus a short hash of the full text.
+
+    Args:
+        query: Query text
+
+    Returns:
+        str: Stable name for the query text
+    """
+    name = QUERIES.name_of(query)
+    if name:
+        return name
+
+    first_line = next((line.strip() for line in query.splitlines()
+                       if line.strip() and not line.strip().startswith("//")), "")
+    digest = hashlib.md5(query.encode("utf-8")).hexdigest()[:8]
+    return f"{first_line[:48]} [{digest}]"
+
+class QueryProfiler:
+    """
+    Opt-in per-query instrumentation used by Neo4jManager.
+
+    All settings default to the NEO4J_PROFILING_* / NEO4J_SLOW_QUERY_*
+    values in config.
+    """
+
+    def __init__(self, enabled=None, slow_query_ms=None, sample_rate=None, log_path=None):
+        self.enabled = config.NEO4J_PROFILING_ENABLED if enabled is None else enabled
+        self.slow_query_ms = config.NEO4J_SLOW_QUERY_MS if slow_query_ms is None else slow_query_ms
+        self.sample_rate = config.NEO4J_PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.log_path = log_path or config.NEO4J_SLOW_QUERY_LOG
+
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._handler = None
+
+        if self.enabled:
+            self._attach_log_handler()
+
+    def _attach_log_handler(self):
+        """Send slow-query records to the configured log file"""
+        if not self.log_path or self._handler is not None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            self._handler = logging.FileHandler(self.log_path, encoding="utf-8")
+            self._handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+            slow_query_logger.addHandler(self._handler)
+        except OSError as e:
+            logger.warning(f"Could not open slow-query log {self.log_path}: {e}")
+
+    def enable(self, slow_query_ms=None, sample_rate=None):
+        """Turn profiling on, optionally overriding the threshold and sample rate"""
+        if slow_query_ms is not None:
+            self.slow_query_ms = slow_query_ms
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        self.enabled = True
+        self._attach_log_handler()
+
+    def disable(self):
+        """Turn profiling off; collected statistics are kept"""
+        self.enabled = False
+
+    def should_profile(self, query):
+        """Decide whether this call should run with PROFILE"""
+        if self.sample_rate <= 0 or _UNPROFILABLE.match(query):
+            return False
+        return random.random() < self.sample_rate
+
+    def record(self, query, elapsed, rows, summary=None, profiled=False):
+        """
+        Record one query execution.
+
+        Args:
+            query: Query text as sent (without the PROFILE prefix)
+            elapsed: Wall time in seconds, including fetching all records
+            rows: Number of records returned
+            summary: ResultSummary from result.consume(), if available
+            profiled: Whether the call ran with PROFILE
+        """
+        name = query_name(query)
+        elapsed_ms = elapsed * 1000
+
+        db_hits = _sum_db_hits(summary.profile) if (summary is not None and profiled) else 0
+        available_after = (summary.result_available_after or 0) if summary is not None else 0
+        consumed_after = (summary.result_consumed_after or 0) if summary is not None else 0
+
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                entry = self._stats[name] = {
+                    "query": name,
+                    "calls": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "rows": 0,
+                    "result_available_after_ms": 0,
+                    "result_consumed_after_ms": 0,
+                    "profiled_calls": 0,
+                    "db_hits": 0,
+                    "slow_calls": 0,
+                    "counters": {field: 0 for field in _COUNTER_FIELDS}
+                }
+            entry["calls"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["rows"] += rows
+            entry["result_available_after_ms"] += available_after
+            entry["result_consumed_after_ms"] += consumed_after
+            if profiled:
+                entry["profiled_calls"] += 1
+                entry["db_hits"] += db_hits
+            if summary is not None:
+                for field in _COUNTER_FIELDS:
+                    entry["counters"][field] += getattr(summary.counters, field, 0)
+
+            slow = elapsed_ms >= self.slow_query_ms
+            if slow:
+                entry["slow_calls"] += 1
+
+        if slow:
+            text = " ".join(query.split())
+            slow_query_logger.warning(
+                f"Slow query {name}: {elapsed_ms:.1f} ms, {rows} rows, "
+                f"available after {available_after} ms, consumed after {consumed_after} ms"
+                + (f", {db_hits} db hits" if profiled else "")
+                + f" | {text[:500]}")
+
+    def get_report(self, top=None):
+        """
+        Get aggregated statistics per query, slowest total time first.
+
+        Args:
+            top: Only return this many queries
+
+        Returns:
+            list: Per-query statistics with average wall time
+        """
+        with self._lock:
+            entries = [dict(entry, counters=dict(entry["counters"]))
+                       for entry in self._stats.values()]
+
+        for entry in entries:
+            entry["avg_ms"] = entry["total_ms"] / entry["calls"] if entry["calls"] else 0.0
+            entry["avg_db_hits"] = (entry["db_hits"] / entry["profiled_calls"]
+                                    if entry["profiled_calls"] else None)
+
+        entries.sort(key=lambda e: e["total_ms"], reverse=True)
+        return entries[:top] if top else entries
+
+    def log_report(self, top=10):
+        """Log the aggregated report and return it"""
+        report = self.get_report()
+        if not report:
+            return report
+
+        total_ms = sum(entry["total_ms"] for entry in report)
+        logger.info(f"Query profile: {len(report)} queries, {total_ms:.1f} ms total")
+        for entry in report[:top]:
+            share = entry["total_ms"] / total_ms * 100 if total_ms else 0.0
+            hits = f", {entry['avg_db_hits']:.0f} avg db hits" if entry["avg_db_hits"] is not None else ""
+            logger.info(f"  {entry['query']}: {entry['calls']} calls, "
+                        f"{entry['total_ms']:.1f} ms ({share:.0f}%), "
+                        f"avg {entry['avg_ms']:.1f} ms, max {entry['max_ms']:.1f} ms, "
+                        f"{entry['rows']} rows{hits}")
+        return report
+
+    def reset(self):
+        """Clear collected statistics"""
+        with self._lock:
+            self._stats.clear()
@@ -0,0 +1,418 @@
+"""
+Query record/replay for the knowledge graph component.
+Captures every query Neo4jManager sends through the driver, with its
+parameters, results and timing, to a compact file, and serves a
+recording back through a stand-in driver so the analysis code can be
+profiled and compared run to run without a database.
+"""
+
+import os
+import copy
+import gzip
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+import config
+from knowledge_graph.query_profiler import query_name
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+RECORDING_FORMAT = "neo4j-replay/1"
+
+# Summary counters kept with each recorded call (zero values are omitted)
+COUNTER_FIELDS = ["nodes_created", "nodes_deleted", "relationships_created",
+                  "relationships_deleted", "properties_set", "labels_added",
+                  "labels_removed", "indexes_added", "indexes_removed",
+                  "constraints_added", "constraints_removed"]
+
+class QueryNotRecorded(LookupError):
+    """Raised in strict replay mode for a query the recording has no call for"""
+
+def _to_json(value):
+    """
+    json.dumps fallback for driver values
+
+    Neo4j temporal values are stored as ISO strings, so replayed records
+    carry strings where the live driver returned neo4j.time objects.
+    """
+    iso_format = getattr(value, "iso_format", None)
+    if callable(iso_format):
+        return iso_format()
+    isoformat = getattr(value, "isoformat", None)
+    if callable(isoformat):
+        return isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+def _dumps(value):
+    return json.dumps(value, default=_to_json, separators=(",", ":"), sort_keys=True)
+
+def _query_text(query):
+    """Query text a call is filed under; sampled PROFILE runs share the plain text"""
+    return query[len("PROFILE "):] if query.startswith("PROFILE ") else query
+
+class _Record:
+    """Stand-in for neo4j.Record built from a record dictionary"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data):
+        self._data = data
+
+    def data(self):
+        return dict(self._data)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+class _CapturedResult:
+    """Fully read result standing in for neo4j.Result"""
+
+    def __init__(self, records, summary):
+        self._records = records
+        self._summary = summary
+
+    def __iter__(self):
+        return (_Record(record) for record in self._records)
+
+    def single(self):
+        return _Record(self._records[0]) if self._records else None
+
+    def data(self):
+        return [dict(record) for record in self._records]
+
+    def consume(self):
+        return self._summary
+
+class _ReplayCounters:
+    """Summary counters of a replayed call; counters not recorded read as 0"""
+
+    def __init__(self, counters):
+        self._counters = counters or {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._counters.get(name, 0)
+
+class _ReplaySummary:
+    """Result summary of a replayed call"""
+
+    def __init__(self, entry):
+        self.counters = _ReplayCounters(entry.get("counters"))
+        self.plan = entry.get("plan")
+        self.profile = None
+        self.result_available_after = int(entry.get("ms", 0))
+        self.result_consumed_after = 0
+
+class QueryRecorder:
+    """
+    Appends recorded calls to a gzip-compressed JSON-lines file.
+
+    Each distinct query text is written once ({"type": "query", "id", "name",
+    "text"}); calls refer to it by id and carry their parameters, records,
+    non-zero summary counters, plan (for EXPLAIN) and elapsed milliseconds.
+    """
+
+    def __init__(self, path, metadata=None):
+        """
+        Open the recording file
+
+        Args:
+            path (str): Output file (overwritten)
+            metadata (dict, optional): Extra fields for the header line
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._query_ids = {}
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._write({"type": "header", "format": RECORDING_FORMAT,
+                     "created_at": datetime.now().isoformat(), **(metadata or {})})
+
+    def _write(self, entry):
+        self._file.write(_dumps(entry) + "\n")
+
+    def record(self, query, parameters, records, summary, elapsed):
+        """
+        Append one call
+
+        Args:
+            query (str): Query text as sent to the driver
+            parameters (dict): Query parameters
+            records (list): Record dictionaries returned
+            summary: Driver result summary
+            elapsed (float): Seconds from run() until the result was consumed
+        """
+        text = _query_text(query)
+        entry = {"type": "call", "params": parameters or {}, "records": records,
+                 "ms": round(elapsed * 1000, 3)}
+
+        counters = {field: getattr(summary.counters, field, 0) for field in COUNTER_FIELDS}
+        counters = {field: value for field, value in counters.items() if value}
+        if counters:
+            entry["counters"] = counters
+        if getattr(summary, "plan", None):
+            entry["plan"] = summary.plan
+
+        with self._lock:
+            if self._file is None:
+                return
+            query_id = self._query_ids.get(text)
+            if query_id is None:
+                query_id = self._query_ids[text] = len(self._query_ids)
+                self._write({"type": "query", "id": query_id, "name": query_name(text), "text": text})
+            entry["q"] = query_id
+            self._write(entry)
+            self.calls += 1
+
+    def close(self):
+        """Flush and close the file"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+        logger.info(f"Recorded {self.calls} calls of {len(self._query_ids)} queries to {self.path}")
+
+class _RecordingRunner:
+    """Session or transaction wrapper that records every run() call"""
+
+    def __init__(self, runner, recorder):
+        self._runner = runner
+        self._recorder = recorder
+
+    def run(self, query, parameters=None, **kwargs):
+        start = time.perf_counter()
+        result = self._runner.run(query, parameters, **kwargs)
+        records = [record.data() for record in result]
+        summary = result.consume()
+        self._recorder.record(query, parameters, records, summary, time.perf_counter() - start)
+        return _CapturedResult(records, summary)
+
+    def __getattr__(self, name):
+        return getattr(self._runner, name)
+
+    def __enter__(self):
+        self._runner.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._runner.__exit__(exc_type, exc_value, traceback)
+
+class _RecordingSession(_RecordingRunner):
+    """Session wrapper whose transactions are recorded too"""
+
+    def begin_transaction(self, *args, **kwargs):
+        return _RecordingRunner(self._runner.begin_transaction(*args, **kwargs), self._recorder)
+
+    def _recorded(self, work):
+        def recorded_work(tx, *args, **kwargs):
+            return work(_RecordingRunner(tx, self._recorder), *args, **kwargs)
+        return recorded_work
+
+    def execute_read(self, work, *args, **kwargs):
+        return self._runner.execute_read(self._recorded(work), *args, **kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        return self._runner.execute_write(self._recorded(work), *args, **kwargs)
+
+class RecordingDriver:
+    """
+    Wraps a neo4j.Driver and records every query run through its sessions.
+
+    Results are read in full before they are handed back, so streamed
+    queries are not streamed while recording.
+    """
+
+    def __init__(self, driver, recorder):
+        self._driver = driver
+        self.recorder = recorder
+
+    def session(self, **kwargs):
+        return _RecordingSession(self._driver.session(**kwargs), self.recorder)
+
+    def close(self):
+        self._driver.close()
+        self.recorder.close()
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+class Recording:
+    """
+    Calls loaded from a recording file, matched to incoming queries.
+
+    A query is matched on its text and parameters first. Calls whose
+    parameters differ between runs (timestamps, GDS projection names) fall
+    back to the next recorded call of the same text. Repeated matches are
+    served in recorded order, and the last call is reused once they run out.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = {}
+        self._by_call = {}
+        self._by_text = {}
+        self._call_cursors = {}
+        self._text_cursors = {}
+        self._lock = threading.Lock()
+
+        texts = {}
+        calls = 0
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                kind = entry.get("type")
+                if kind == "header":
+                    self.header = entry
+                elif kind == "query":
+                    texts[entry["id"]] = entry["text"]
+                elif kind == "call":
+                    text = texts[entry["q"]]
+                    self._by_call.setdefault((text, _dumps(entry["params"])), []).append(entry)
+                    self._by_text.setdefault(text, []).append(entry)
+                    calls += 1
+
+        if self.header.get("format") != RECORDING_FORMAT:
+            raise ValueError(f"{path} is not a {RECORDING_FORMAT} recording")
+
+        self.stats = {"calls": calls, "queries": len(texts), "exact": 0, "fallback": 0, "misses": 0}
+
+    @staticmethod
+    def _next(index, cursors, key):
+        entries = index.get(key)
+        if not entries:
+            return None
+        position = cursors.get(key, 0)
+        cursors[key] = position + 1
+        return entries[min(position, len(entries) - 1)]
+
+    def lookup(self, query, parameters):
+        """
+        Find the recorded call answering a query
+
+        Args:
+            query (str): Query text
+            parameters (dict): Query parameters
+
+        Returns:
+            dict: Recorded call, or None if the query was never recorded
+        """
+        text = _query_text(query)
+        key = (text, _dumps(parameters or {}))
+
+        with self._lock:
+            entry = self._next(self._by_call, self._call_cursors, key)
+            if entry is not None:
+                self.stats["exact"] += 1
+                return entry
+
+            entry = self._next(self._by_text, self._text_cursors, text)
+            if entry is not None:
+                self.stats["fallback"] += 1
+                return entry
+
+            self.stats["misses"] += 1
+            return None
+
+class _ReplayRunner:
+    """Replay session or transaction"""
+
+    def __init__(self, driver):
+        self._driver = driver
+
+    def run(self, query, parameters=None, **kwargs):
+        return self._driver._serve(query, parameters)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+class _ReplayTransaction(_ReplayRunner):
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+class _ReplaySession(_ReplayRunner):
+    def begin_transaction(self, *args, **kwargs):
+        return _ReplayTransaction(self._driver)
+
+    def execute_read(self, work, *args, **kwargs):
+        return work(_ReplayTransaction(self._driver), *args, **kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        return work(_ReplayTransaction(self._driver), *args, **kwargs)
+
+class ReplayDriver:
+    """
+    Stand-in for neo4j.Driver that answers every query from a recording.
+
+    Used by Neo4jManager when a replay path is configured, so every query
+    path (managed transactions, units of work, streams, batch writes)
+    runs unchanged without a server. Replayed calls return deep copies of
+    the recorded records, after an optional injected delay.
+    """
+
+    def __init__(self, path, latency=None, strict=None):
+        """
+        Load a recording
+
+        Args:
+            path (str): Recording written by QueryRecorder
+            latency (str or float, optional): Delay per call: milliseconds, or
+                                              "recorded" to replay each call's
+                                              recorded time (defaults to
+                                              config.NEO4J_REPLAY_LATENCY)
+            strict (bool, optional): Raise QueryNotRecorded for unknown queries
+                                     instead of returning no records
+                                     (defaults to config.NEO4J_REPLAY_STRICT)
+        """
+        self.recording = Recording(path)
+        latency = config.NEO4J_REPLAY_LATENCY if latency is None else latency
+        self.latency = "recorded" if latency == "recorded" else float(latency or 0) / 1000
+        self.strict = config.NEO4J_REPLAY_STRICT if strict is None else strict
+
+        logger.info(f"Loaded {self.recording.stats['calls']} recorded calls of "
+                    f"{self.recording.stats['queries']} queries from {path}")
+
+    def session(self, **kwargs):
+        return _ReplaySession(self)
+
+    def _serve(self, query, parameters):
+        entry = self.recording.lookup(query, parameters)
+        if entry is None:
+            if self.strict:
+                raise QueryNotRecorded(f"No recorded call for query {query_name(_query_text(query))}")
+            entry = {"records": []}
+
+        delay = entry.get("ms", 0) / 1000 if self.latency == "recorded" else self.latency
+        if delay:
+            time.sleep(delay)
+        return _CapturedResult(copy.deepcopy(entry["records"]), _ReplaySummary(entry))
+
+    def close(self):
+        stats = self.recording.stats
+        logger.info(f"Replay finished: {stats['exact']} exact, {stats['fallback']} by query text, "
+                    f"{stats['misses']} not recorded")
@@ -0,0 +1,507 @@
+"""
+Query template registry for the knowledge graph component.
+Keeps parameterized Cypher templates in one place and caches rendered
+query text so each (template, variant) pair always produces the same
+string, letting the server reuse its cached plan.
+"""
+
+import logging
+import re
+import threading
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+_IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def quote_identifier(name):
+    """
+    Make a label or relationship type safe to splice into Cypher.
+
+    Args:
+        name: Label or relationship type
+
+    Returns:
+        str: The name, backtick-quoted if it is not a plain identifier
+    """
+    if _IDENTIFIER_PATTERN.match(name):
+        return name
+    return "`" + name.replace("`", "``") + "`"
+
+def degree_key(rel_type):
+    """
+    Name of the node property counting a node's relationships of one type.
+
+    Args:
+        rel_type: Relationship type
+
+    Returns:
+        str: Property name (quoted by render() when used as an identifier)
+    """
+    return f"degree_{rel_type}"
+
+def degree_increment(*variables):
+    """
+    SET items recording one new relationship on each node variable.
+
+    Keeps degree, the per-type degree and last_updated current at write
+    time. Templates using it need a degree_key identifier slot.
+
+    Args:
+        *variables: Node variables at either end of the new relationship
+
+    Returns:
+        str: Comma-separated SET items
+    """
+    items = []
+    for var in variables:
+        items += [f"{var}.degree = coalesce({var}.degree, 0) + 1",
+                  f"{var}.{{degree_key}} = coalesce({var}.{{degree_key}}, 0) + 1",
+                  f"{var}.last_updated = datetime()"]
+    return ",\n            ".join(items)
+
+class QueryRegistry:
+    """
+    Named Cypher templates with a small set of variant slots.
+
+    Templates use str.format placeholders for the parts that cannot be
+    parameters (labels, relationship types, optional clauses). Everything
+    else must be a $parameter. Rendered text is cached per variant.
+    """
+
+    def __init__(self):
+        self._templates = {}
+        self._rendered = {}
+        self._names = {}
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def register(self, name, template, identifiers=(), choices=None):
+        """
+        Register a query template.
+
+        Args:
+            name: Template name used by render()
+            template: Cypher text with {placeholder} variant slots
+            identifiers: Placeholders holding labels/relationship types
+            choices: {placeholder: {value: fragment}} for optional clauses
+        """
+        self._templates[name] = {
+            "template": template,
+            "identifiers": set(identifiers),
+            "choices": choices or {}
+        }
+
+    def render(self, name, **variant):
+        """
+        Render a template for one variant, reusing cached text.
+
+        Args:
+            name: Registered template name
+            **variant: Values for the template's variant slots
+
+        Returns:
+            str: Query text, identical for identical variants
+
+        Raises:
+            KeyError: If the template or a choice value is unknown
+        """
+        key = (name, tuple(sorted(variant.items())))
+        with self._lock:
+            text = self._rendered.get(key)
+            if text is not None:
+                self.cache_hits += 1
+                return text
+            self.cache_misses += 1
+
+        spec = self._templates[name]
+        values = {}
+        for slot, value in variant.items():
+            if slot in spec["identifiers"]:
+                values[slot] = quote_identifier(value)
+            elif slot in spec["choices"]:
+                values[slot] = spec["choices"][slot][value]
+            else:
+                raise KeyError(f"Unknown variant slot {slot} for query {name}")
+
+        text = spec["template"].format(**values)
+        with self._lock:
+            self._rendered[key] = text
+            self._names[text] = name
+        return text
+
+    def named(self, name, text):
+        """
+        Tag fixed query text with a name and return it unchanged.
+
+        Used for queries that have no variant slots, so call sites can keep
+        their Cypher inline while backends and the profiler can identify it.
+
+        Args:
+            name: Query name
+            text: Cypher text
+
+        Returns:
+            str: The same text
+        """
+        with self._lock:
+            self._names[text] = name
+        return text
+
+    def name_of(self, text):
+        """
+        Look up the template a rendered query text came from.
+
+        Args:
+            text: Query text as returned by render()
+
+        Returns:
+            str: Template name, or None for ad-hoc queries
+        """
+        with self._lock:
+            return self._names.get(text)
+
+    def get_stats(self):
+        """
+        Get template and rendered-text cache statistics.
+
+        Returns:
+            dict: Template count, cached variants and cache hit/miss counts
+        """
+        with self._lock:
+            return {
+                "templates": len(self._templates),
+                "rendered_variants": len(self._rendered),
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses
+            }
+
+# Shared registry used by Neo4jManager
+QUERIES = QueryRegistry()
+
+# Run on the system database by Neo4jManager when a tenant's database is missing
+QUERIES.register("create_tenant_database", """
+        CREATE DATABASE $name IF NOT EXISTS WAIT
+        """)
+
+# degree starts at 0 so entities without relationships still sort on the
+# entity_degree index
+QUERIES.register("create_entity", """
+        CREATE (e:{label} $properties)
+        SET e.degree = coalesce(e.degree, 0)
+        RETURN e
+        """, identifiers=["label"])
+
+# Write paths that create relationships maintain the endpoints' degree
+# properties (see degree_increment); Neo4jManager.refresh_degrees repairs
+# them after deletes and backfills older graphs
+QUERIES.register("create_relationship", """
+        MATCH (a), (b)
+        WHERE id(a) = $from_id AND id(b) = $to_id
+        CREATE (a)-[r:{rel_type} $properties]->(b)
+        SET """ + degree_increment("a", "b") + """
+        RETURN r
+        """, identifiers=["rel_type", "degree_key"])
+
+QUERIES.register("add_triplet", """
+        MERGE (s:{subject_label} {{name: $subject_name}})
+        ON CREATE SET s += $subject_props
+
+        MERGE (o:{object_label} {{name: $object_name}})
+        ON CREATE SET o += $object_props
+
+        CREATE (s)-[r:{rel_type} $rel_props]->(o)
+        SET """ + degree_increment("s", "o") + """
+        RETURN s, r, o
+        """, identifiers=["subject_label", "object_label", "rel_type", "degree_key"])
+
+QUERIES.register("add_triplets_batch", """
+            UNWIND $rows AS row
+            MERGE (s:{subject_label} {{name: row.subject_name}})
+            ON CREATE SET s += row.subject_props
+            MERGE (o:{object_label} {{name: row.object_name}})
+            ON CREATE SET o += row.object_props
+            CREATE (s)-[r:{rel_type}]->(o)
+            SET r = row.rel_props,
+            """ + degree_increment("s", "o") + """
+            """, identifiers=["subject_label", "object_label", "rel_type", "degree_key"])
+
+QUERIES.register("import_triplets_batch", """
+            UNWIND $batch AS row
+            MERGE (s:Entity {{name: row.subject}})
+            ON CREATE SET s.type = row.subject_type, s.created_at = datetime()
+            MERGE (o:Entity {{name: row.object}})
+            ON CREATE SET o.type = row.object_type, o.created_at = datetime()
+            MERGE (s)-[r:{rel_type} {{context: row.context}}]->(o)
+            ON CREATE SET r.created_at = datetime(),
+                          r.source = row.source,
+                          r.timestamp = row.timestamp,
+                          r.confidence = row.confidence,
+            """ + degree_increment("s", "o") + """
+            ON MATCH SET r.confidence = CASE WHEN row.confidence > r.confidence
+                                             THEN row.confidence ELSE r.confidence END
+            """, identifiers=["rel_type", "degree_key"])
+
+# Type filtering is a parameter, so every call shares one text
+QUERIES.register("find_entity_regex", """
+            MATCH (n)
+            WHERE (n.name = $name OR n.name =~ $fuzzy_name)
+              AND NOT n:Document
+              AND ($entity_types IS NULL OR any(label IN labels(n) WHERE label IN $entity_types))
+            RETURN n, labels(n) as types
+            LIMIT 10
+            """)
+
+QUERIES.register("fulltext_search", """
+        CALL db.index.fulltext.queryNodes($index, $search) YIELD node AS n, score
+        WHERE $entity_types IS NULL OR any(label IN labels(n) WHERE label IN $entity_types)
+        {return_clause}
+        ORDER BY score DESC
+        LIMIT $limit
+        """, choices={"return_clause": {
+            "nodes": "RETURN n, labels(n) as types, score",
+            "summary": "RETURN n.name AS name, labels(n) AS types, "
+                       "coalesce(n.degree, 0) AS connection_count, score"}})
+
+# The entity filter stays a variant so a named lookup can seek on the
+# Entity.name constraint; type and level filters are null-tolerant parameters
+QUERIES.register("get_business_risks", """
+        MATCH (e:Entity{entity_filter})-[:HAS_RISK]->(r:Risk)
+        WHERE ($risk_types IS NULL OR r.type IN $risk_types)
+          AND ($min_level IS NULL OR r.level >= $min_level)
+
+        // Get related mitigation strategies if any
+        OPTIONAL MATCH (r)-[:HAS_MITIGATION]->(s:Strategy)
+
+        WITH e, r, collect(s) as strategies
+
+        RETURN e.name as entity,
+               r.type as risk_type,
+               r.level as risk_level,
+               r.description as description,
+               r.impact as impact,
+               r.source as source,
+               strategies
+        ORDER BY risk_level DESC
+        """, choices={"entity_filter": {True: " {name: $entity_name}", False: ""}})
+
+# Breadth-first subgraph expansion, one frontier batch per call; see
+# GraphStore.iter_subgraph
+QUERIES.register("subgraph_start_nodes", """
+        MATCH (n:{label} {{name: $name}})
+        RETURN elementId(n) AS id
+        """, identifiers=["label"])
+
+QUERIES.register("subgraph_expand", """
+        UNWIND $frontier AS node_id
+        MATCH (n)-[r]-(m)
+        WHERE elementId(n) = node_id
+          AND ($relationship_types IS NULL OR type(r) IN $relationship_types)
+        RETURN elementId(r) AS rel_id, type(r) AS type,
+               elementId(startNode(r)) AS source, elementId(endNode(r)) AS target,
+               properties(r) AS properties, elementId(m) AS neighbor
+        """)
+
+QUERIES.register("subgraph_nodes", """
+        UNWIND $ids AS node_id
+        MATCH (n)
+        WHERE elementId(n) = node_id
+        RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS properties
+        """)
+
+# Count-store lookups used to verify bulk imports
+QUERIES.register("count_label_nodes", """
+        MATCH (n:{label})
+        RETURN count(n) AS count
+        """, identifiers=["label"])
+
+QUERIES.register("count_type_relationships", """
+        MATCH ()-[r:{rel_type}]->()
+        RETURN count(r) AS count
+        """, identifiers=["rel_type"])
+
+# Graph-wide statistics, tried in this order by Neo4jManager._count_statistics;
+# all of them are answered from the count store
+QUERIES.register("apoc_meta_stats", """
+        CALL apoc.meta.stats() YIELD nodeCount, relCount, labels, relTypesCount
+        RETURN nodeCount, relCount, labels, relTypesCount
+        """)
+
+QUERIES.register("db_graph_counts", """
+        CALL db.stats.retrieve('GRAPH COUNTS') YIELD data
+        RETURN data.nodes AS nodes, data.relationships AS relationships
+        """)
+
+QUERIES.register("count_all_nodes", """
+        MATCH (n)
+        RETURN count(n) AS count
+        """)
+
+QUERIES.register("count_all_relationships", """
+        MATCH ()-[r]->()
+        RETURN count(r) AS count
+        """)
+
+QUERIES.register("db_labels", """
+        CALL db.labels() YIELD label
+        RETURN label
+        """)
+
+QUERIES.register("db_relationship_types", """
+        CALL db.relationshipTypes() YIELD relationshipType
+        RETURN relationshipType
+        """)
+
+# Document provenance: every relationship written by upsert_document carries
+# the document id and a per-document triplet key, and the Document node is
+# linked to the subjects of its relationships
+QUERIES.register("document_state", """
+        MATCH (d:Document {{id: $source_id}})
+        RETURN d.content_hash AS content_hash, d.triplet_keys AS triplet_keys
+        """)
+
+QUERIES.register("upsert_document_node", """
+        MERGE (d:Document {{id: $source_id}})
+        ON CREATE SET d.created_at = datetime()
+        SET d.name = $name,
+            d.content_hash = $content_hash,
+            d.triplet_keys = $triplet_keys,
+            d.updated_at = datetime()
+        """)
+
+QUERIES.register("upsert_document_triplets", """
+        UNWIND $rows AS row
+        MERGE (s:{subject_label} {{name: row.subject_name}})
+        ON CREATE SET s += row.subject_props
+        MERGE (o:{object_label} {{name: row.object_name}})
+        ON CREATE SET o += row.object_props
+        MERGE (s)-[r:{rel_type} {{triplet_key: row.key}}]->(o)
+        ON CREATE SET r += row.rel_props, r.source_doc = $source_id,
+            """ + degree_increment("s", "o") + """
+        WITH DISTINCT s
+        MATCH (d:Document {{id: $source_id}})
+        MERGE (d)-[:PRODUCED]->(s)
+        """, identifiers=["subject_label", "object_label", "rel_type", "degree_key"])
+
+QUERIES.register("delete_document_triplets", """
+        MATCH (d:Document {{id: $source_id}})-[:PRODUCED]->(s)-[r]->(o)
+        WHERE r.source_doc = $source_id{key_filter}
+        WITH r, elementId(s) AS subject_id, elementId(o) AS object_id
+        DELETE r
+        RETURN count(*) AS deleted,
+               collect(DISTINCT subject_id) + collect(DISTINCT object_id) AS endpoints
+        """, choices={"key_filter": {True: " AND r.triplet_key IN $keys", False: ""}})
+
+QUERIES.register("unlink_document_subjects", """
+        MATCH (d:Document {{id: $source_id}})-[p:PRODUCED]->(s)
+        WHERE NOT EXISTS {{ MATCH (s)-[r]->() WHERE r.source_doc = $source_id }}
+        DELETE p
+        """)
+
+QUERIES.register("delete_orphan_nodes", """
+        UNWIND $ids AS node_id
+        MATCH (n)
+        WHERE elementId(n) = node_id AND NOT n:Document AND NOT EXISTS {{ (n)--() }}
+        DELETE n
+        RETURN count(*) AS deleted
+        """)
+
+# Degree recomputation used by Neo4jManager.refresh_degrees. PRODUCED
+# provenance links are not counted.
+QUERIES.register("degree_node_ids", """
+        MATCH (n)
+        WHERE NOT n:Document AND NOT n:SchemaVersion
+        RETURN elementId(n) AS id
+        """)
+
+QUERIES.register("node_degree_counts", """
+        UNWIND $ids AS node_id
+        MATCH (n)
+        WHERE elementId(n) = node_id
+        OPTIONAL MATCH (n)-[r]-()
+        WHERE type(r) <> 'PRODUCED'
+        WITH n, node_id, type(r) AS rel_type, count(r) AS count
+        RETURN node_id AS id,
+               [key IN keys(n) WHERE key STARTS WITH 'degree_'] AS degree_keys,
+               collect([rel_type, count]) AS counts
+        """)
+
+QUERIES.register("set_node_degrees", """
+        UNWIND $rows AS row
+        MATCH (n)
+        WHERE elementId(n) = row.id
+        SET n += row.props, n.last_updated = datetime()
+        """)
+
+QUERIES.register("delete_document_node", """
+        MATCH (d:Document {{id: $source_id}})
+        DETACH DELETE d
+        """)
+
+# Graph Data Science on named in-memory projections; see
+# knowledge_graph.gds_projections
+QUERIES.register("gds_version", """
+        CALL gds.version() YIELD gdsVersion
+        RETURN gdsVersion
+        """)
+
+QUERIES.register("gds_graph_project", """
+        CALL gds.graph.project($graph_name, $node_labels, $relationship_projection)
+        YIELD graphName, nodeCount, relationshipCount
+        RETURN graphName, nodeCount, relationshipCount
+        """)
+
+QUERIES.register("gds_graph_drop", """
+        CALL gds.graph.drop($graph_name, false) YIELD graphName
+        RETURN graphName
+        """)
+
+QUERIES.register("gds_node_scores", """
+        CALL {procedure}($graph_name, $config)
+        YIELD nodeId, score
+        WITH gds.util.asNode(nodeId).name AS entity, score
+        WHERE $names IS NULL OR entity IN $names
+        RETURN entity, score
+        ORDER BY score DESC
+        LIMIT $limit
+        """, choices={"procedure": {"pagerank": "gds.pageRank.stream",
+                                    "betweenness": "gds.betweenness.stream",
+                                    "degree": "gds.degree.stream"}})
+
+QUERIES.register("gds_personalized_pagerank", """
+        MATCH (source:Entity {{name: $source_name}})
+        WITH $config AS config, collect(source) AS sources
+        WHERE size(sources) > 0
+        CALL gds.pageRank.stream($graph_name, config {{.*, sourceNodes: sources}})
+        YIELD nodeId, score
+        RETURN gds.util.asNode(nodeId).name AS entity, score
+        ORDER BY score DESC
+        LIMIT $limit
+        """)
+
+# Members matching $names are listed first so a focused caller sees them
+# within member_limit
+QUERIES.register("gds_louvain", """
+        CALL gds.louvain.stream($graph_name, $config)
+        YIELD nodeId, communityId
+        WITH communityId, collect(gds.util.asNode(nodeId).name) AS members
+        WHERE size(members) >= $min_size
+          AND ($names IS NULL OR any(name IN members WHERE name IN $names))
+        RETURN communityId, size(members) AS community_size,
+               ([name IN members WHERE $names IS NOT NULL AND name IN $names] +
+                [name IN members WHERE $names IS NULL OR NOT name IN $names])[0..$member_limit] AS entities
+        ORDER BY community_size DESC
+        LIMIT $limit
+        """)
+
+QUERIES.register("gds_node_similarity", """
+        CALL gds.nodeSimilarity.stream($graph_name, $config)
+        YIELD node1, node2, similarity
+        RETURN gds.util.asNode(node1).name AS entity1,
+               gds.util.asNode(node2).name AS entity2, similarity
+        ORDER BY similarity DESC
+        LIMIT $limit
+        """)
@@ -0,0 +1,338 @@
+"""
+Graph schema definition for the knowledge graph component.
+Declares constraints and indexes for every label/property the codebase
+matches or merges on, applies them idempotently, and reports query plans
+that still fall back to full scans.
+"""
+
+import logging
+import threading
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Bump whenever CONSTRAINTS or INDEXES change
+SCHEMA_VERSION = 6
+
+# Uniqueness constraints: (name, label, property, legacy index it replaces)
+CONSTRAINTS = [
+    ("entity_name_unique", "Entity", "name", "entity_name"),
+    ("document_id_unique", "Document", "id", "document_id"),
+]
+
+# Range indexes: (name, label, [properties]); multi-property entries are composite
+INDEXES = [
+    ("entity_degree", "Entity", ["degree"]),
+    ("document_name", "Document", ["name"]),
+    ("concept_name", "Concept", ["name"]),
+    ("risk_type", "Risk", ["type"]),
+    ("risk_type_level", "Risk", ["type", "level"]),
+    ("metric_name", "Metric", ["name"]),
+    ("metric_name_timestamp", "Metric", ["name", "timestamp"]),
+    ("assessment_name", "Assessment", ["name"]),
+    ("market_name", "Market", ["name"]),
+    ("market_segment_name", "MarketSegment", ["name"]),
+    ("strength_name", "Strength", ["name"]),
+    ("weakness_name", "Weakness", ["name"]),
+    ("opportunity_name", "Opportunity", ["name"]),
+    ("threat_name", "Threat", ["name"]),
+    ("risk_factor_name", "RiskFactor", ["name"]),
+    ("competitive_parameter_name", "CompetitiveParameter", ["name"]),
+    ("finding_description", "Finding", ["description"]),
+    ("strategy_name", "Strategy", ["name"]),
+    ("product_name", "Product", ["name"]),
+    ("process_name", "Process", ["name"]),
+    ("knowledge_base_type", "KnowledgeBase", ["type"]),
+]
+
+# Data backfills run once when upgrading past a schema version:
+# version -> Neo4jManager method
+BACKFILLS = {
+    5: "refresh_degrees",   # degree properties maintained by the write paths
+}
+
+# Labels produced by TripletExtractor (pattern and LLM paths) after the
+# Orchestrator's label clean-up; add_triplet MERGEs on name for these
+EXTRACTOR_LABELS = [
+    "Companies", "FinancialMetrics", "Percentages", "MonetaryValues", "Dates",
+    "Company", "Person", "FinancialMetric", "Product", "Percentage",
+    "Information",
+]
+
+# Full-text index over entity names, used by find_entity/search_entities.
+# :Document holds provenance records, not entities, so it is left out;
+# find_entity falls back to a regex scan for labels not listed here
+ENTITY_FULLTEXT_INDEX = "entity_name_fulltext"
+ENTITY_FULLTEXT_LABELS = list(dict.fromkeys(
+    ["Entity", "Concept", "Report", "Market", "Product", "Strength"] + EXTRACTOR_LABELS))
+
+# Full-text indexes: (name, [labels], [properties])
+FULLTEXT_INDEXES = [
+    (ENTITY_FULLTEXT_INDEX, ENTITY_FULLTEXT_LABELS, ["name"]),
+]
+
+# Representative hot queries checked by report_full_scans: name -> (query, params)
+HOT_QUERIES = {
+    "entity_by_name": (
+        "MATCH (e:Entity {name: $name}) RETURN e",
+        {"name": ""}),
+    "entity_metrics": (
+        "MATCH (e:Entity {name: $name})-[:HAS_METRIC]->(m:Metric) WHERE m.name IN $metrics "
+        "RETURN m.name, m.value",
+        {"name": "", "metrics": []}),
+    "entities_by_degree": (
+        "MATCH (e:Entity) WHERE e.degree IS NOT NULL "
+        "RETURN e.name, e.degree ORDER BY e.degree DESC LIMIT 10",
+        {}),
+    "document_by_id": (
+        "MATCH (d:Document {id: $id}) RETURN d.content_hash",
+        {"id": ""}),
+    "metric_by_name": (
+        "MATCH (m:Metric {name: $name}) RETURN m",
+        {"name": ""}),
+    "assessment_by_name": (
+        "MATCH (a:Assessment {name: $name}) RETURN a",
+        {"name": ""}),
+    "market_by_name": (
+        "MATCH (m:Market {name: $name}) RETURN m",
+        {"name": ""}),
+    "strength_by_name": (
+        "MATCH (s:Strength {name: $name}) RETURN s",
+        {"name": ""}),
+    "finding_by_description": (
+        "MATCH (f:Finding {description: $description}) RETURN f",
+        {"description": ""}),
+    "risk_by_type": (
+        "MATCH (r:Risk) WHERE r.type = $type RETURN avg(r.level)",
+        {"type": ""}),
+    "knowledge_base_by_type": (
+        "MATCH (k:KnowledgeBase {type: $type}) RETURN k",
+        {"type": ""}),
+    "triplet_merge": (
+        "MERGE (s:Company {name: $subject}) MERGE (o:Company {name: $object}) RETURN s, o",
+        {"subject": "", "object": ""}),
+}
+
+# Operators that indicate the planner could not use an index
+FULL_SCAN_OPERATORS = {
+    "AllNodesScan",
+    "NodeByLabelScan",
+    "DirectedAllRelationshipsScan",
+    "UndirectedAllRelationshipsScan",
+}
+
+# (database, label, property) keys already given an index in this process
+_indexed_labels = set()
+_indexed_labels_lock = threading.Lock()
+
+def _index_statement(name, label, properties):
+    """Build an idempotent CREATE INDEX statement"""
+    props = ", ".join(f"n.{prop}" for prop in properties)
+    return f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON ({props})"
+
+def _label_index_name(label, prop):
+    """Index name used for dynamically created label indexes"""
+    return f"auto_{label.lower()}_{prop}"
+
+def get_schema_version(neo4j_manager):
+    """
+    Read the schema version recorded in the graph.
+
+    Returns:
+        int: Applied schema version, or 0 if none has been recorded
+    """
+    result = neo4j_manager.execute_read(
+        "MATCH (v:SchemaVersion {id: 'graph'}) RETURN v.version AS version")
+    if result and result[0].get("version") is not None:
+        return int(result[0]["version"])
+    return 0
+
+def apply_schema(neo4j_manager, force=False):
+    """
+    Apply all constraints and indexes idempotently.
+
+    Args:
+        neo4j_manager: Connected Neo4jManager instance
+        force: Re-run every statement even if the recorded version is current
+
+    Returns:
+        dict: Applied version plus created/failed statement lists
+    """
+    report = {"version": SCHEMA_VERSION, "applied": [], "failed": [], "skipped": False}
+
+    current_version = 0
+    try:
+        current_version = get_schema_version(neo4j_manager)
+    except Exception as e:
+        logger.warning(f"Could not read schema version: {e}")
+
+    if current_version >= SCHEMA_VERSION and not force:
+        logger.info(f"Graph schema is current (version {current_version})")
+        report["skipped"] = True
+        return report
+
+    # Uniqueness constraints replace the legacy single-property indexes
+    for name, label, prop, legacy_index in CONSTRAINTS:
+        statement = (f"CREATE CONSTRAINT {name} IF NOT EXISTS "
+                     f"FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE")
+        try:
+            if legacy_index:
+                neo4j_manager.run_schema(f"DROP INDEX {legacy_index} IF EXISTS")
+            neo4j_manager.run_schema(statement)
+            report["applied"].append(name)
+        except Exception as e:
+            # Usually existing duplicates; keep an index so lookups stay fast
+            logger.warning(f"Could not create constraint {name}, falling back to index: {e}")
+            report["failed"].append({"name": name, "error": str(e)})
+            index_name = legacy_index or name
+            try:
+                neo4j_manager.run_schema(_index_statement(index_name, label, [prop]))
+                report["applied"].append(index_name)
+            except Exception as e:
+                logger.warning(f"Could not create fallback index {index_name}: {e}")
+                report["failed"].append({"name": index_name, "error": str(e)})
+
+    for name, label, properties in INDEXES:
+        try:
+            neo4j_manager.run_schema(_index_statement(name, label, properties))
+            report["applied"].append(name)
+        except Exception as e:
+            logger.warning(f"Could not create index {name}: {e}")
+            report["failed"].append({"name": name, "error": str(e)})
+
+    for name, labels, properties in FULLTEXT_INDEXES:
+        label_expr = "|".join(labels)
+        props = ", ".join(f"n.{prop}" for prop in properties)
+        try:
+            # CREATE ... IF NOT EXISTS keeps an older definition, so drop it first
+            existing = neo4j_manager.execute_read(
+                "SHOW INDEXES YIELD name, labelsOrTypes, properties WHERE name = $name "
+                "RETURN labelsOrTypes, properties", {"name": name})
+            if existing and (set(existing[0]["labelsOrTypes"] or []) != set(labels)
+                             or set(existing[0]["properties"] or []) != set(properties)):
+                neo4j_manager.run_schema(f"DROP INDEX {name} IF EXISTS")
+            neo4j_manager.run_schema(f"CREATE FULLTEXT INDEX {name} IF NOT EXISTS "
+                                     f"FOR (n:{label_expr}) ON EACH [{props}]")
+            report["applied"].append(name)
+        except Exception as e:
+            logger.warning(f"Could not create full-text index {name}: {e}")
+            report["failed"].append({"name": name, "error": str(e)})
+
+    for label in EXTRACTOR_LABELS:
+        ensure_label_index(neo4j_manager, label)
+
+    for version, method in sorted(BACKFILLS.items()):
+        if current_version < version:
+            try:
+                getattr(neo4j_manager, method)()
+                report["applied"].append(method)
+            except Exception as e:
+                logger.warning(f"Backfill {method} failed: {e}")
+                report["failed"].append({"name": method, "error": str(e)})
+
+    neo4j_manager.execute_write(
+        """
+        MERGE (v:SchemaVersion {id: 'graph'})
+        SET v.version = $version, v.applied_at = datetime()
+        """,
+        {"version": SCHEMA_VERSION}
+    )
+
+    logger.info(f"Applied graph schema version {SCHEMA_VERSION} "
+                f"({len(report['applied'])} statements, {len(report['failed'])} failed)")
+    return report
+
+def ensure_label_index(neo4j_manager, label, prop="name"):
+    """
+    Make sure a dynamically chosen label has an index on its MERGE key.
+
+    Called by the triplet write paths before MERGEing on labels that come
+    from extractor output. Each label is only checked once per process
+    and database.
+
+    Args:
+        neo4j_manager: Connected Neo4jManager instance
+        label: Node label
+        prop: Property used as the MERGE key
+    """
+    key = (getattr(neo4j_manager, "database", None), label, prop)
+    with _indexed_labels_lock:
+        if key in _indexed_labels:
+            return
+
+    # Entity.name is covered by its uniqueness constraint
+    if label == "Entity" and prop == "name":
+        covered = True
+    else:
+        covered = any(l == label and props == [prop] for _, l, props in INDEXES)
+
+    if not covered:
+        try:
+            neo4j_manager.run_schema(_index_statement(_label_index_name(label, prop), label, [prop]))
+        except Exception as e:
+            logger.warning(f"Could not create index for :{label}({prop}): {e}")
+            return
+
+    with _indexed_labels_lock:
+        _indexed_labels.add(key)
+
+def _collect_operators(plan, operators):
+    """Walk a plan tree and collect operator names"""
+    if not plan:
+        return operators
+    operator = plan.get("operatorType", "").split("@")[0]
+    operators.append(operator)
+    for child in plan.get("children", []):
+        _collect_operators(child, operators)
+    return operators
+
+def report_full_scans(neo4j_manager, queries=None):
+    """
+    EXPLAIN each hot query and report the ones whose plans still scan.
+
+    Args:
+        neo4j_manager: Connected Neo4jManager instance
+        queries: Optional {name: (query, params)} mapping (defaults to HOT_QUERIES)
+
+    Returns:
+        list: Entries with query name and offending scan operators
+    """
+    queries = queries or HOT_QUERIES
+    findings = []
+
+    for name, (query, params) in queries.items():
+        try:
+            plan = neo4j_manager.explain_query(query, params)
+        except Exception as e:
+            logger.warning(f"Could not EXPLAIN {name}: {e}")
+            continue
+
+        scans = [op for op in _collect_operators(plan, []) if op in FULL_SCAN_OPERATORS]
+        if scans:
+            findings.append({"query": name, "scan_operators": scans})
+            logger.warning(f"Query {name} still plans a full scan: {', '.join(scans)}")
+
+    if not findings:
+        logger.info(f"All {len(queries)} checked queries use index-backed plans")
+
+    return findings
+
+# For command line usage
+if __name__ == "__main__":
+    from knowledge_graph.neo4j_manager import Neo4jManager
+
+    manager = Neo4jManager()
+    if not manager.connect():
+        raise SystemExit(1)
+
+    try:
+        result = apply_schema(manager, force=True)
+        print(f"Schema version {result['version']}: {len(result['applied'])} applied, "
+              f"{len(result['failed'])} failed")
+
+        for finding in report_full_scans(manager):
+            print(f"  {finding['query']}: {', '.join(finding['scan_operators'])}")
+    finally:
+        manager.close()
@@ -0,0 +1,84 @@
+"""
+Tenant scoping for the knowledge graph component.
+Each tenant gets its own Neo4j database (or its own embedded snapshot),
+so a tenant's queries only ever see that tenant's graph.
+"""
+
+import os
+import re
+import logging
+import config
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Neo4j database names: ASCII letters, digits, dots and dashes, 3-63 characters.
+# Tenant ids must already be in this form; rewriting them would let distinct
+# tenants ("Acme_Co", "acme co") share a database.
+_TENANT_ID = re.compile(r"[a-z0-9](?:[a-z0-9.-]*[a-z0-9])?")
+MIN_DATABASE_NAME_LENGTH = 3
+MAX_DATABASE_NAME_LENGTH = 63
+
+def validate_tenant_id(tenant_id):
+    """
+    Check that a tenant id can be used unchanged in database and path names
+
+    Args:
+        tenant_id (str): Tenant id as supplied by the caller
+
+    Returns:
+        str: The same id
+
+    Raises:
+        ValueError: If the id is not lower-case letters, digits, dots and
+                    dashes (starting and ending with a letter or digit), or
+                    its database name would have the wrong length or not start
+                    with a letter
+    """
+    if not isinstance(tenant_id, str) or not _TENANT_ID.fullmatch(tenant_id):
+        raise ValueError(f"Invalid tenant id {tenant_id!r}: use lower-case letters, digits, "
+                         f"dots and dashes, starting and ending with a letter or digit")
+    name = f"{config.TENANT_DATABASE_PREFIX}{tenant_id}"
+    if not MIN_DATABASE_NAME_LENGTH <= len(name) <= MAX_DATABASE_NAME_LENGTH:
+        raise ValueError(f"Tenant id {tenant_id!r} gives database name {name!r}, which must be "
+                         f"{MIN_DATABASE_NAME_LENGTH}-{MAX_DATABASE_NAME_LENGTH} characters")
+    if not name[0].isalpha():
+        raise ValueError(f"Tenant id {tenant_id!r} must start with a letter when "
+                         f"TENANT_DATABASE_PREFIX is empty")
+    return tenant_id
+
+def tenant_database_name(tenant_id):
+    """
+    Name of the Neo4j database holding a tenant's graph
+
+    Args:
+        tenant_id (str): Tenant id
+
+    Returns:
+        str: Database name (config.TENANT_DATABASE_PREFIX plus the id)
+
+    Raises:
+        ValueError: If the tenant id is invalid (see validate_tenant_id)
+    """
+    return f"{config.TENANT_DATABASE_PREFIX}{validate_tenant_id(tenant_id)}"
+
+def tenant_snapshot_path(path, tenant_id):
+    """
+    Embedded-store snapshot file for a tenant
+
+    Args:
+        path (str): Configured snapshot path (empty disables snapshots)
+        tenant_id (str): Tenant id
+
+    Returns:
+        str: <dir>/tenants/<tenant>/<file>, or the empty string if path is empty
+
+    Raises:
+        ValueError: If the tenant id is invalid (see validate_tenant_id)
+    """
+    if not path:
+        return path
+    return os.path.join(os.path.dirname(path), "tenants", validate_tenant_id(tenant_id),
+                        os.path.basename(path))
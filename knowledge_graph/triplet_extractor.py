@@ -8,9 +8,11 @@ import time
 import logging
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import config
-import requests
+from llm_client import get_client, LLMUnavailable, MalformedResponse
+from llm_schemas import TRIPLETS
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
@@ -28,10 +30,11 @@ class TripletExtractor:
         # Load common business entities and relationships for pattern matching
         self._load_patterns()
         
-        # Initialize LLM client
-        self.llm_endpoint = config.MODELS['reasoning']['endpoint']
-        self.llm_name = config.MODELS['reasoning']['name']
-        self.llm_params = config.MODELS['reasoning']['parameters']
+        # Shared LLM client (model routed by the document_analysis task)
+        self.llm = get_client()
+        
+        # Concurrent LLM requests when extracting a multi-chunk document
+        self.llm_workers = config.LLM_EXTRACTION_WORKERS
         
     def _load_patterns(self):
         """Load entity and relationship patterns"""
@@ -268,9 +271,6 @@ class TripletExtractor:
             logger.warning("Text too short for meaningful LLM extraction")
             return []
 
-        # Initialize results list
-        triplets = []
-
         # Process text in chunks if it's too long
         max_chunk_size = 2500  # Reduced chunk size for better reliability
         text_chunks = []
@@ -295,175 +295,20 @@ class TripletExtractor:
         else:
             text_chunks = [text]
 
-        logger.info(f"Processing {len(text_chunks)} text chunks with LLM")
+        workers = max(1, min(self.llm_workers, len(text_chunks)))
+        logger.info(f"Processing {len(text_chunks)} text chunks with LLM ({workers} workers)")
 
-        # Process each chunk with retry logic
-        for i, chunk in enumerate(text_chunks):
-            logger.info(f"Processing chunk {i+1}/{len(text_chunks)}")
-        
-            # Add retry logic (up to 3 attempts)
-            max_retries = 3
-            retry_count = 0
-        
-            while retry_count < max_retries:
-                try:
-                    # Create prompt for the LLM
-                    prompt = f"""
-                    You are an expert in knowledge extraction. Extract business-related subject-predicate-object triplets from the following text.
-                    For each assertion in the text, identify:
-            
-                    1. The SUBJECT entity (who/what is the statement about)
-                    2. The PREDICATE (relationship or action)
-                    3. The OBJECT entity (what is being affected or related to the subject)
-            
-                    Only extract triplets that represent factual business relationships or events.
-            
-                    Format your response as a JSON array of triplet objects, with each having these fields:
-                    - "subject": The entity that is the subject (e.g., company name, person, product)
-                    - "subject_type": Category of the subject (company, person, financial_metric, product, etc.)
-                    - "predicate": The relationship or action (e.g., acquired, increased, invested_in)
-                    - "object": The entity that is the object of the relationship
-                    - "object_type": Category of the object
-                    - "confidence": A number between 0.0 and 1.0 indicating your confidence in this extraction
-            
-                    Example format:
-                    [
-                    {{
-                        "subject": "TechCorp Inc.",
-                        "subject_type": "company",
-                        "predicate": "acquired",
-                        "object": "SmallTech Solutions",
-                        "object_type": "company",
-                        "confidence": 0.95
-                    }},
-                    {{
-                        "subject": "Revenue",
-                        "subject_type": "financial_metric",
-                        "predicate": "increased_by",
-                        "object": "15%",
-                        "object_type": "percentage",
-                        "confidence": 0.85
-                    }}
-                    ]
-            
-                    Text to analyze:
-                    {chunk}
-            
-                    Respond ONLY with the JSON array of triplets. If no valid triplets can be extracted, return an empty array [].
-                    """
-                
-                    # Set a timeout for the request (10 seconds)
-                    timeout = 60
-                
-                    # Call the LLM API (Ollama) with timeout
-                    response = requests.post(
-                        self.llm_endpoint,
-                        json={
-                            "model": self.llm_name,
-                            "prompt": prompt,
-                            "stream": False,
-                            **self.llm_params
-                        },
-                        timeout=timeout
-                    )
-                
-                    # Parse the response
-                    result = response.json()
-                    content = result.get('response', '')
-                
-                    # Extract JSON from the response
-                    json_match = re.search(r'\[\s*\{.*\}\s*\]', content, re.DOTALL)
-                    if json_match:
-                        json_str = json_match.group(0)
-                    else:
-                        # Try to find any JSON array in the response
-                        json_start = content.find('[')
-                        json_end = content.rfind(']') + 1
-                    
-                        if json_start >= 0 and json_end > json_start:
-                            json_str = content[json_start:json_end]
-                        else:
-                            logger.warning("No valid JSON found in LLM response")
-                            # Try a different approach or retry
-                            retry_count += 1
-                            time.sleep(1)  # Wait before retrying
-                            continue
-                
-                    try:
-                        chunk_triplets = json.loads(json_str)
-                    
-                        # Add extraction source metadata
-                        for triplet in chunk_triplets:
-                            triplet["extraction_method"] = "llm_based"
-                        
-                            # Add context if possible
-                            subject = triplet.get("subject", "")
-                            predicate = triplet.get("predicate", "")
-                            obj = triplet.get("object", "")
-                    
-                            if subject and predicate and obj:
-                                # Try to find a sentence containing all three
-                                pattern = re.compile(r'[^.!?]*(?:\b' + re.escape(subject) + r'\b.*\b' + 
-                                            re.escape(obj) + r'\b|' + r'\b' + re.escape(obj) + 
-                                            r'\b.*\b' + re.escape(subject) + r'\b)[^.!?]*[.!?]')
-                                context_match = pattern.search(chunk)
-                            
-                                if context_match:
-                                    triplet["context"] = context_match.group(0).strip()
-                                
-                        triplets.extend(chunk_triplets)
-                        logger.info(f"Extracted {len(chunk_triplets)} triplets from chunk {i+1}")
-                    
-                        # Success, break retry loop
-                        break
-                    
-                    except json.JSONDecodeError as e:
-                        logger.warning(f"Failed to parse JSON from LLM response: {e}")
-                        logger.debug(f"Problematic JSON string: {json_str}")
-                    
-                        # Try to fix common JSON issues
-                        try:
-                            # Replace single quotes with double quotes
-                            fixed_json = json_str.replace("'", '"')
-                            chunk_triplets = json.loads(fixed_json)
-                        
-                            # Add extraction source metadata
-                            for triplet in chunk_triplets:
-                                triplet["extraction_method"] = "llm_based"
-                        
-                            triplets.extend(chunk_triplets)
-                            logger.info(f"Extracted {len(chunk_triplets)} triplets after fixing JSON")
-                        
-                            # Success, break retry loop
-                            break
-                        except:
-                            # If fixing failed, retry
-                            retry_count += 1
-                            time.sleep(1)  # Wait before retrying
-                            continue
-                        
-                except requests.exceptions.Timeout:
-                    logger.warning(f"LLM request timed out (retry {retry_count+1}/{max_retries})")
-                    retry_count += 1
-                    time.sleep(2)  # Wait longer before retrying after a timeout
-            
-                except Exception as e:
-                    logger.error(f"Error calling LLM API: {e}")
-                    retry_count += 1
-                    time.sleep(1)  # Wait before retrying
-        
-            # If we've exhausted all retries for this chunk, try pattern-based extraction
-            if retry_count >= max_retries:
-                logger.warning(f"Failed to extract triplets from chunk {i+1} after {max_retries} attempts")
-                # Fall back to pattern-based extraction for this chunk
-                pattern_triplets = self._extract_pattern_based(chunk)
-                if pattern_triplets:
-                    logger.info(f"Extracted {len(pattern_triplets)} triplets using pattern fallback")
-                    triplets.extend(pattern_triplets)
-        
-            # Add a short delay between chunks regardless of success/failure
-            if i < len(text_chunks) - 1:
-                time.sleep(1)
+        # Chunks are independent: dispatch them concurrently, up to the number of
+        # requests the Ollama server handles in parallel, and keep chunk order
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-extract") as executor:
+            chunk_results = list(executor.map(self._extract_chunk_llm, range(len(text_chunks)),
+                                              text_chunks, [len(text_chunks)] * len(text_chunks)))
+        elapsed = time.perf_counter() - start
+
+        triplets = [triplet for chunk_triplets in chunk_results for triplet in chunk_triplets]
+        logger.info(f"Processed {len(text_chunks)} chunks in {elapsed:.1f}s "
+                    f"({len(text_chunks) / elapsed if elapsed else 0:.2f} chunks/sec)")
 
         # Filter out low-confidence triplets
         confidence_threshold = 0.5  # Lowered threshold for better recall
@@ -480,6 +325,141 @@ class TripletExtractor:
         
         return filtered_triplets
 
+    def _extract_chunk_llm(self, i, chunk, total):
+        """
+        Extract triplets from one text chunk with the LLM, retrying failed
+        calls and falling back to pattern extraction when they all fail
+
+        Args:
+            i (int): Index of the chunk
+            chunk (str): Chunk text
+            total (int): Number of chunks in the document (for logging)
+
+        Returns:
+            list: Triplets extracted from the chunk
+        """
+        logger.info(f"Processing chunk {i+1}/{total}")
+
+        # Create prompt for the LLM
+        prompt = f"""
+        You are an expert in knowledge extraction. Extract business-related subject-predicate-object triplets from the following text.
+        For each assertion in the text, identify:
+
+        1. The SUBJECT entity (who/what is the statement about)
+        2. The PREDICATE (relationship or action)
+        3. The OBJECT entity (what is being affected or related to the subject)
+
+        Only extract triplets that represent factual business relationships or events.
+
+        Format your response as a JSON array of triplet objects, with each having these fields:
+        - "subject": The entity that is the subject (e.g., company name, person, product)
+        - "subject_type": Category of the subject (company, person, financial_metric, product, etc.)
+        - "predicate": The relationship or action (e.g., acquired, increased, invested_in)
+        - "object": The entity that is the object of the relationship
+        - "object_type": Category of the object
+        - "confidence": A number between 0.0 and 1.0 indicating your confidence in this extraction
+
+        Example format:
+        [
+        {{
+            "subject": "TechCorp Inc.",
+            "subject_type": "company",
+            "predicate": "acquired",
+            "object": "SmallTech Solutions",
+            "object_type": "company",
+            "confidence": 0.95
+        }},
+        {{
+            "subject": "Revenue",
+            "subject_type": "financial_metric",
+            "predicate": "increased_by",
+            "object": "15%",
+            "object_type": "percentage",
+            "confidence": 0.85
+        }}
+        ]
+
+        Text to analyze:
+        {chunk}
+
+        Respond ONLY with the JSON array of triplets. If no valid triplets can be extracted, return an empty array [].
+        """
+
+        # Connection errors and timeouts are retried by the client, and the
+        # schema constrains decoding to a JSON array of triplets. The retry is
+        # for replies that still go wrong (cut off at the token limit, or
+        # structured output disabled); they are abandoned as soon as they do
+        # and retried past the cache, keeping the triplets that had arrived
+        max_retries = 2
+        triplets = None
+        partial = []
+        for attempt in range(max_retries):
+            received = []
+            try:
+                for triplet in self.llm.stream_json_array(prompt, task="document_analysis",
+                                                          schema=TRIPLETS, refresh=attempt > 0):
+                    received.append(self._add_llm_context(triplet, chunk))
+                triplets = received
+                break
+            except MalformedResponse as e:
+                logger.warning(f"Abandoned LLM response for chunk {i+1} after {len(received)} triplets: "
+                               f"{e} (attempt {attempt+1}/{max_retries})")
+                if len(received) > len(partial):
+                    partial = received
+            except LLMUnavailable as e:
+                logger.warning(f"Skipping LLM for chunk {i+1}: {e}")
+                break
+            except Exception as e:
+                logger.error(f"Error calling LLM API: {e}")
+                break
+
+        if triplets is None and partial:
+            logger.info(f"Keeping {len(partial)} triplets from a partial LLM response for chunk {i+1}")
+            triplets = partial
+
+        if triplets is None:
+            logger.warning(f"Failed to extract triplets from chunk {i+1} with the LLM")
+            # Fall back to pattern-based extraction for this chunk
+            pattern_triplets = self._extract_pattern_based(chunk)
+            if pattern_triplets:
+                logger.info(f"Extracted {len(pattern_triplets)} triplets using pattern fallback")
+            return pattern_triplets
+
+        logger.info(f"Extracted {len(triplets)} triplets from chunk {i+1}")
+        return triplets
+
+    def _add_llm_context(self, triplet, chunk):
+        """
+        Annotate an LLM triplet with its extraction method and source sentence
+
+        Args:
+            triplet (dict): Triplet as returned by the LLM
+            chunk (str): Chunk text it was extracted from
+
+        Returns:
+            dict: The same triplet
+        """
+        # Add extraction source metadata
+        triplet["extraction_method"] = "llm_based"
+
+        # Add context if possible
+        subject = triplet.get("subject", "")
+        predicate = triplet.get("predicate", "")
+        obj = triplet.get("object", "")
+
+        if subject and predicate and obj:
+            # Try to find a sentence containing all three
+            pattern = re.compile(r'[^.!?]*(?:\b' + re.escape(subject) + r'\b.*\b' + 
+                        re.escape(obj) + r'\b|' + r'\b' + re.escape(obj) + 
+                        r'\b.*\b' + re.escape(subject) + r'\b)[^.!?]*[.!?]')
+            context_match = pattern.search(chunk)
+
+            if context_match:
+                triplet["context"] = context_match.group(0).strip()
+
+        return triplet
+
+
 # For testing
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,191 @@
+"""
+LLM response cache for the business consulting system.
+Stores Ollama responses in SQLite keyed on the request (endpoint, model,
+parameters and a hash of the prompt/messages/images), so re-running an
+assessment or re-processing a document does not repeat identical inference.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import config
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                   format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+def request_key(endpoint, payload):
+    """
+    Content address of an LLM request
+
+    Args:
+        endpoint (str): Ollama endpoint URL
+        payload (dict): Request body
+
+    Returns:
+        str: SHA-256 hex digest of the endpoint and the canonical request body
+    """
+    body = {k: v for k, v in payload.items() if k != "stream"}
+    canonical = json.dumps([endpoint, body], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    Persistent LRU cache of LLM responses with a time-to-live.
+
+    Entries expire ttl seconds after they were stored; once the cache holds
+    more than max_entries, the least recently read entries are evicted.
+    Safe to share between threads, and between processes through SQLite's
+    own locking.
+    """
+
+    def __init__(self, path=None, max_entries=None, ttl=None):
+        """
+        Open (and create if needed) the cache database
+
+        Args:
+            path (str, optional): SQLite file (defaults to config.LLM_CACHE_PATH)
+            max_entries (int, optional): Entry limit (defaults to config.LLM_CACHE_MAX_ENTRIES)
+            ttl (float, optional): Seconds an entry stays valid, 0 for no expiry
+                                   (defaults to config.LLM_CACHE_TTL)
+        """
+        self.path = path or config.LLM_CACHE_PATH
+        self.max_entries = config.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl = config.LLM_CACHE_TTL if ttl is None else ttl
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def get(self, endpoint, payload):
+        """
+        Look up a cached response
+
+        Args:
+            endpoint (str): Ollama endpoint URL
+            payload (dict): Request body
+
+        Returns:
+            dict: Cached response body, or None on a miss or an expired entry
+        """
+        key = request_key(endpoint, payload)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?",
+                                     (key,)).fetchone()
+            if row is None or (self.ttl and now - row[1] > self.ttl):
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.stats["misses"] += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats["hits"] += 1
+
+        return json.loads(row[0])
+
+    def put(self, endpoint, payload, response):
+        """
+        Store a response, evicting the least recently used entries over the limit
+
+        Args:
+            endpoint (str): Ollama endpoint URL
+            payload (dict): Request body
+            response (dict): Response body
+        """
+        key = request_key(endpoint, payload)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, payload.get("model"), json.dumps(response), now, now))
+            self.stats["stores"] += 1
+
+            if self.max_entries:
+                excess = self._conn.execute("SELECT count(*) FROM responses").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)", (excess,))
+                    self.stats["evictions"] += excess
+            self._conn.commit()
+
+    def delete(self, endpoint, payload):
+        """
+        Drop the cached response to a request, e.g. one that failed validation
+
+        Args:
+            endpoint (str): Ollama endpoint URL
+            payload (dict): Request body
+        """
+        key = request_key(endpoint, payload)
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge_expired(self):
+        """Delete expired entries; returns how many were removed"""
+        if not self.ttl:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM responses WHERE created_at < ?",
+                                        (time.time() - self.ttl,))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def clear(self):
+        """Delete every entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """
+    The process-wide response cache, opened on first use
+
+    Returns:
+        LLMResponseCache: Shared cache, or None when config.LLM_CACHE_ENABLED is False
+    """
+    global _cache
+    if not config.LLM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache()
+            logger.info(f"LLM response cache at {_cache.path}")
+    return _cache
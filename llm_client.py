@@ -0,0 +1,802 @@
+"""
+LLM client for the business consulting system.
+Every call to Ollama goes through one pooled keep-alive HTTP session, with
+per-task model routing (config.MODEL_USAGE), timeouts, jittered retry, a
+concurrency limit, a circuit breaker that makes callers fall back to their
+rule-based paths at once while Ollama is down, streaming with incremental
+JSON parsing, schema-constrained JSON output, and per-model latency and
+token metrics.
+"""
+
+import re
+import json
+import time
+import random
+import logging
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+import config
+from llm_cache import get_cache
+from llm_schemas import schema_errors
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                   format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: overloaded or restarting server
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Model parameters that Ollama reads from "options" under another name
+OPTION_NAMES = {"max_tokens": "num_predict"}
+
+class LLMError(RuntimeError):
+    """The LLM server rejected a request or could not be reached"""
+
+class LLMUnavailable(LLMError):
+    """Raised without contacting the server while the circuit breaker is open"""
+
+class MalformedResponse(LLMError):
+    """The model's output is not the JSON that was asked for"""
+
+    def __init__(self, message, content=None):
+        super().__init__(message)
+        self.content = content
+
+class _RetryableStatus(LLMError):
+    """Transient HTTP status from the server"""
+
+def _error_text(response):
+    """Error message of a failed Ollama response"""
+    try:
+        return response.json().get("error", f"HTTP {response.status_code}")
+    except ValueError:
+        return f"HTTP {response.status_code}"
+
+def extract_json(content, expect=list):
+    """
+    Salvage a JSON array or object from model output
+
+    Tries, in order: the span between the outermost brackets, the first
+    bracketed span, then the same after fixing single quotes, unquoted keys
+    and trailing commas.
+
+    Args:
+        content (str): Model response text
+        expect (type): list for a JSON array, dict for an object
+
+    Returns:
+        list or dict: Parsed value, or None if nothing usable was found
+    """
+    if not content:
+        return None
+
+    opening, closing = ("[", "]") if expect is list else ("{", "}")
+    candidates = []
+
+    start = content.find(opening)
+    end = content.rfind(closing) + 1
+    if start >= 0 and end > start:
+        candidates.append(content[start:end])
+
+    pattern = r"\[\s*\{.*?\}\s*\]" if expect is list else r"\{.*?\}"
+    match = re.search(pattern, content, re.DOTALL)
+    if match:
+        candidates.append(match.group(0))
+
+    fixes = [
+        lambda text: text,
+        lambda text: text.replace("'", '"'),
+        lambda text: re.sub(r'([{,])\s*(\w+)\s*:', r'\1"\2":', text),
+        lambda text: re.sub(r",\s*([\]}])", r"\1", text),
+    ]
+    for fix in fixes:
+        for candidate in candidates:
+            try:
+                value = json.loads(fix(candidate))
+            except (json.JSONDecodeError, re.error):
+                continue
+            if isinstance(value, expect):
+                return value
+
+    return None
+
+class JSONArrayParser:
+    """
+    Incremental parser for a JSON array of objects in streamed model output.
+
+    feed() takes text fragments as they arrive and returns the objects they
+    complete. Text before the opening bracket is skipped (code fences,
+    preambles and <think> blocks of reasoning models), as is text after the
+    closing bracket. Anything else between elements, or an element that
+    cannot be parsed even after extract_json()'s fixes, raises
+    MalformedResponse at once so the caller can abandon the request.
+    """
+
+    def __init__(self, max_preamble=None):
+        """
+        Args:
+            max_preamble (int, optional): Characters allowed before the array
+                                          starts, excluding a <think> block
+                                          (defaults to config.LLM_STREAM_MAX_PREAMBLE)
+        """
+        self.max_preamble = max_preamble or config.LLM_STREAM_MAX_PREAMBLE
+        self.done = False
+        self.count = 0
+        self._preamble = ""
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._element = []
+
+    def feed(self, text):
+        """
+        Parse the next fragment
+
+        Args:
+            text (str): Fragment of model output
+
+        Returns:
+            list: Objects completed by this fragment
+        """
+        items = []
+        if self.done:
+            return items
+
+        if not self._started:
+            self._preamble += text
+            body = self._preamble
+            # Brackets inside a reasoning model's thinking are not the answer
+            if body.lstrip().startswith("<think>"):
+                end = body.find("</think>")
+                if end < 0:
+                    return items
+                body = body[end + len("</think>"):]
+            start = body.find("[")
+            if start < 0:
+                if len(body) > self.max_preamble:
+                    raise MalformedResponse(f"No JSON array in the first {self.max_preamble} characters")
+                return items
+            self._started = True
+            self._depth = 1
+            self._preamble = ""
+            text = body[start + 1:]
+
+        for char in text:
+            if self._depth == 1 and not self._element:
+                # Between elements
+                if char.isspace() or char == ",":
+                    continue
+                if char == "]":
+                    self.done = True
+                    break
+                if char != "{":
+                    raise MalformedResponse(f"Unexpected {char!r} after {self.count} array elements")
+
+            self._element.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    items.append(self._parse("".join(self._element)))
+                    self._element = []
+
+        return items
+
+    def _parse(self, text):
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            value = extract_json(text, dict)
+        if not isinstance(value, dict):
+            raise MalformedResponse(f"Array element {self.count + 1} is not a JSON object")
+        self.count += 1
+        return value
+
+    def finish(self):
+        """
+        Check that the whole array was seen
+
+        Raises:
+            MalformedResponse: If the output ended before the closing bracket
+        """
+        if not self._started:
+            raise MalformedResponse("No JSON array in LLM response")
+        if not self.done:
+            raise MalformedResponse(f"LLM response truncated after {self.count} array elements")
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing server for a while.
+
+    After failure_threshold consecutive failed calls the circuit opens and
+    calls are refused for reset_timeout seconds. The first call after that
+    is let through as a probe: success closes the circuit, failure opens it
+    again.
+    """
+
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self.failure_threshold = failure_threshold or config.LLM_CIRCUIT_FAILURES
+        self.reset_timeout = config.LLM_CIRCUIT_RESET if reset_timeout is None else reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self.state = "closed"
+
+    def allow(self):
+        """Whether a call may go to the server now"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: this caller probes; others keep failing fast meanwhile
+            self._opened_at = time.monotonic()
+            self.state = "half_open"
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info("LLM server reachable again, closing circuit")
+            self._failures = 0
+            self._opened_at = None
+            self.state = "closed"
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self._open()
+
+    def trip(self):
+        """Open the circuit now, e.g. after a failed health check"""
+        with self._lock:
+            self._open()
+
+    def _open(self):
+        if self.state != "open":
+            logger.warning(f"LLM server failing, skipping LLM calls for {self.reset_timeout:.0f}s")
+        self._opened_at = time.monotonic()
+        self.state = "open"
+
+class LLMClient:
+    """
+    Shared client for the Ollama API.
+
+    Use get_client() rather than creating instances, so the connection
+    pool, concurrency limit and circuit breaker are shared process-wide.
+    """
+
+    def __init__(self, timeout=None, max_retries=None, max_concurrency=None):
+        """
+        Initialize the client
+
+        Args:
+            timeout (float, optional): Seconds per request (defaults to config.LLM_TIMEOUT)
+            max_retries (int, optional): Retries of transient failures
+                                         (defaults to config.LLM_MAX_RETRIES)
+            max_concurrency (int, optional): Requests in flight at once
+                                             (defaults to config.LLM_MAX_CONCURRENCY)
+        """
+        self.timeout = timeout or config.LLM_TIMEOUT
+        self.max_retries = config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.max_concurrency = max_concurrency or config.LLM_MAX_CONCURRENCY
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.breaker = CircuitBreaker()
+
+        self._metrics_lock = threading.Lock()
+        self._metrics = {}
+
+    @staticmethod
+    def model_for(task):
+        """
+        Model configuration for a task
+
+        Args:
+            task (str): Key of config.MODEL_USAGE (unknown tasks use the reasoning model)
+
+        Returns:
+            dict: Entry of config.MODELS
+        """
+        return config.MODELS[config.MODEL_USAGE.get(task, "reasoning")]
+
+    @staticmethod
+    def build_payload(model_config, prompt, images=None, **extra):
+        """
+        Request body for a model's endpoint
+
+        Model parameters are sent as Ollama "options". Chat endpoints get
+        the prompt (and images) as a single user message.
+
+        Args:
+            model_config (dict): Entry of config.MODELS
+            prompt (str): Prompt text
+            images (list, optional): Base64-encoded images
+            **extra: Further top-level request fields
+
+        Returns:
+            dict: Request body
+        """
+        options = {OPTION_NAMES.get(name, name): value
+                   for name, value in model_config["parameters"].items()}
+        payload = {"model": model_config["name"], "stream": False, "options": options, **extra}
+
+        if model_config["endpoint"].endswith("/api/chat"):
+            message = {"role": "user", "content": prompt}
+            if images:
+                message["images"] = images
+            payload["messages"] = [message]
+        else:
+            payload["prompt"] = prompt
+            if images:
+                payload["images"] = images
+
+        return payload
+
+    @staticmethod
+    def response_text(body):
+        """Generated text of a /api/generate or /api/chat response"""
+        if "message" in body:
+            return body["message"].get("content", "")
+        return body.get("response", "")
+
+    def generate(self, prompt, task="document_analysis", images=None, timeout=None,
+                 use_cache=True, refresh=False, **extra):
+        """
+        Generate a completion with the model configured for a task
+
+        Args:
+            prompt (str): Prompt text
+            task (str): Key of config.MODEL_USAGE
+            images (list, optional): Base64-encoded images
+            timeout (float, optional): Seconds for this request
+            use_cache (bool): Read and write the response cache
+            refresh (bool): Skip the cached response but store the new one
+            **extra: Further top-level request fields
+
+        Returns:
+            str: Generated text
+
+        Raises:
+            LLMUnavailable: While the circuit breaker is open
+            LLMError: If the server rejects the request
+        """
+        model_config = self.model_for(task)
+        payload = self.build_payload(model_config, prompt, images, **extra)
+        body = self.request(model_config["endpoint"], payload, timeout, use_cache, refresh)
+        return self.response_text(body)
+
+    def request(self, endpoint, payload, timeout=None, use_cache=True, refresh=False):
+        """
+        Send a request body to an endpoint, answering from the cache when possible
+
+        Returns:
+            dict: Response body
+        """
+        model = payload.get("model")
+        cache = get_cache() if use_cache else None
+
+        if cache is not None and not refresh:
+            cached = cache.get(endpoint, payload)
+            if cached is not None:
+                self._record(model, cache_hit=True)
+                return cached
+
+        if not self.breaker.allow():
+            self._record(model, rejected=True)
+            raise LLMUnavailable(f"LLM server unavailable, not calling {model}")
+
+        body = self._post(endpoint, payload, timeout or self.timeout)
+
+        if cache is not None:
+            cache.put(endpoint, payload, body)
+        return body
+
+    def _send(self, endpoint, payload, timeout, stream=False):
+        """
+        POST with retries of connection errors, timeouts and transient statuses
+
+        Returns:
+            tuple: (response with status 200, start time). A concurrency slot
+                   stays held for the caller to release once the body is read.
+        """
+        model = payload.get("model")
+        attempt = 0
+
+        while True:
+            self._slots.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.post(endpoint, json=payload, timeout=timeout, stream=stream)
+                if response.status_code in RETRY_STATUSES:
+                    response.close()
+                    raise _RetryableStatus(f"HTTP {response.status_code} from {endpoint}")
+                if response.status_code != 200:
+                    message = _error_text(response)
+                    response.close()
+                    raise LLMError(f"{model}: {message}")
+            except (requests.ConnectionError, requests.Timeout, _RetryableStatus) as e:
+                self._slots.release()
+                self._record(model, latency=time.perf_counter() - start, error=True)
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    raise LLMError(f"{model} failed after {attempt + 1} attempts: {e}") from e
+                attempt += 1
+                # Full jitter keeps parallel callers from retrying in lockstep
+                delay = random.uniform(0, config.LLM_RETRY_BASE_DELAY * 2 ** attempt)
+                logger.warning(f"LLM call to {model} failed ({e}), retry {attempt}/{self.max_retries} "
+                               f"in {delay:.1f}s")
+                self._record(model, retried=True)
+                time.sleep(delay)
+                continue
+            except requests.RequestException as e:
+                # Not worth retrying (bad URL, broken encoding, redirect loop)
+                self._slots.release()
+                self._record(model, latency=time.perf_counter() - start, error=True)
+                self.breaker.record_failure()
+                raise LLMError(f"{model} request failed: {e}") from e
+            except BaseException:
+                # The slot must come back whatever was raised, or callers block forever
+                self._slots.release()
+                self._record(model, latency=time.perf_counter() - start, error=True)
+                raise
+            return response, start
+
+    def _post(self, endpoint, payload, timeout):
+        """POST a non-streaming request and return the response body"""
+        model = payload.get("model")
+        response, start = self._send(endpoint, payload, timeout)
+        try:
+            body = response.json()
+        except ValueError as e:
+            self._record(model, latency=time.perf_counter() - start, error=True)
+            raise LLMError(f"{model}: response is not JSON") from e
+        finally:
+            self._slots.release()
+
+        if "error" in body:
+            self._record(model, latency=time.perf_counter() - start, error=True)
+            raise LLMError(f"{model}: {body['error']}")
+
+        self.breaker.record_success()
+        self._record(model, latency=time.perf_counter() - start, body=body)
+        return body
+
+    def stream(self, prompt, task="document_analysis", images=None, timeout=None,
+               use_cache=True, refresh=False, **extra):
+        """
+        Generate a completion, yielding text fragments as Ollama streams them
+
+        Closing the generator early abandons the request and frees the
+        connection. Only complete generations are cached; a cached
+        response is yielded as one fragment.
+
+        Args:
+            Same as generate(); timeout bounds each wait for the next fragment
+
+        Yields:
+            str: Generated text fragments
+
+        Raises:
+            LLMUnavailable: While the circuit breaker is open
+            LLMError: If the request fails or the stream breaks off
+        """
+        model_config = self.model_for(task)
+        endpoint = model_config["endpoint"]
+        payload = self.build_payload(model_config, prompt, images, **extra)
+        payload["stream"] = True
+        model = payload["model"]
+        cache = get_cache() if use_cache else None
+
+        if cache is not None and not refresh:
+            cached = cache.get(endpoint, payload)
+            if cached is not None:
+                self._record(model, cache_hit=True)
+                yield self.response_text(cached)
+                return
+
+        if not self.breaker.allow():
+            self._record(model, rejected=True)
+            raise LLMUnavailable(f"LLM server unavailable, not calling {model}")
+
+        response, start = self._send(endpoint, payload, timeout or self.timeout, stream=True)
+        parts = []
+        final = None
+        first_fragment = None
+        try:
+            with response:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise LLMError(f"{model}: {chunk['error']}")
+                    text = self.response_text(chunk)
+                    if text:
+                        if first_fragment is None:
+                            first_fragment = time.perf_counter() - start
+                        parts.append(text)
+                        yield text
+                    if chunk.get("done"):
+                        final = chunk
+                        break
+        except GeneratorExit:
+            self._record(model, latency=time.perf_counter() - start, abandoned=True)
+            raise
+        except LLMError:
+            self._record(model, latency=time.perf_counter() - start, error=True)
+            raise
+        except (requests.RequestException, ValueError) as e:
+            self._record(model, latency=time.perf_counter() - start, error=True)
+            if isinstance(e, requests.RequestException):
+                self.breaker.record_failure()
+            raise LLMError(f"{model} stream failed: {e}") from e
+        finally:
+            self._slots.release()
+
+        if final is None:
+            self._record(model, latency=time.perf_counter() - start, error=True)
+            raise LLMError(f"{model} stream ended before the generation was done")
+
+        self.breaker.record_success()
+        self._record(model, latency=time.perf_counter() - start, body=final,
+                     first_fragment=first_fragment)
+
+        if cache is not None:
+            text = "".join(parts)
+            body = dict(final)
+            if "message" in final:
+                body["message"] = {**final["message"], "content": text}
+            else:
+                body["response"] = text
+            cache.put(endpoint, payload, body)
+
+    def _forget(self, prompt, task, images=None, timeout=None, use_cache=True, refresh=False,
+                **extra):
+        """Evict the cached response to a generate()/stream() call so the next call asks again"""
+        cache = get_cache() if use_cache else None
+        if cache is not None:
+            model_config = self.model_for(task)
+            cache.delete(model_config["endpoint"],
+                         self.build_payload(model_config, prompt, images, **extra))
+
+    def _structured(self, schema, kwargs):
+        """Request fields constraining the output to a JSON schema"""
+        if schema is not None and config.LLM_STRUCTURED_OUTPUT:
+            kwargs = {**kwargs, "format": schema}
+        return kwargs
+
+    def generate_json(self, prompt, schema, task="document_analysis", **kwargs):
+        """
+        Generate a JSON value constrained to and validated against a schema
+
+        The schema is sent as Ollama's "format", so the model can only
+        produce matching JSON (config.LLM_STRUCTURED_OUTPUT=false leaves
+        the output unconstrained, for servers without schema support).
+
+        Args:
+            prompt (str): Prompt text
+            schema (dict): JSON schema of the answer (see llm_schemas)
+            task (str): Key of config.MODEL_USAGE
+            **kwargs: Passed to generate()
+
+        Returns:
+            dict or list: Validated value
+
+        Raises:
+            MalformedResponse: If the output is not valid JSON for the schema;
+                               its content attribute holds the raw text, and
+                               the response is dropped from the cache
+            LLMUnavailable, LLMError: As for generate()
+        """
+        kwargs = self._structured(schema, kwargs)
+        content = self.generate(prompt, task, **kwargs)
+        try:
+            return self._parse_json(content, schema)
+        except MalformedResponse:
+            # Otherwise every caller gets the same bad answer until the entry expires
+            self._forget(prompt, task, **kwargs)
+            raise
+
+    @staticmethod
+    def _parse_json(content, schema):
+        """Parse and validate generate_json() output"""
+        expect = list if schema.get("type") == "array" else dict
+        try:
+            value = json.loads(content)
+        except json.JSONDecodeError:
+            # Unconstrained output may wrap the JSON in prose or code fences
+            value = extract_json(content, expect)
+
+        if not isinstance(value, expect):
+            raise MalformedResponse(f"No JSON {'array' if expect is list else 'object'} in LLM response",
+                                    content)
+        errors = schema_errors(value, schema)
+        if errors:
+            raise MalformedResponse(f"LLM response does not match the schema: {'; '.join(errors[:3])}",
+                                    content)
+        return value
+
+    def stream_json_array(self, prompt, task="document_analysis", schema=None, **kwargs):
+        """
+        Yield each object of a JSON-array answer as soon as it is complete
+
+        With config.LLM_STREAMING off, the full response is fetched and
+        salvaged with extract_json() instead.
+
+        Args:
+            prompt (str): Prompt asking for a JSON array of objects
+            task (str): Key of config.MODEL_USAGE
+            schema (dict, optional): Array schema (see llm_schemas) that
+                                     constrains decoding and that each
+                                     element is validated against
+            **kwargs: Passed to stream() / generate()
+
+        Yields:
+            dict: Array elements, in order
+
+        Raises:
+            MalformedResponse: When the output stops looking like a JSON array
+                               of objects, or an element does not match the
+                               schema; the request is abandoned at that point
+            LLMUnavailable, LLMError: As for stream()
+        """
+        kwargs = self._structured(schema, kwargs)
+        item_schema = schema.get("items") if schema else None
+
+        def checked(items, offset):
+            for i, item in enumerate(items, offset):
+                errors = schema_errors(item, item_schema, f"$[{i}]") if item_schema else []
+                if errors:
+                    raise MalformedResponse(f"LLM response does not match the schema: "
+                                            f"{'; '.join(errors[:3])}")
+                yield item
+
+        try:
+            if not config.LLM_STREAMING:
+                content = self.generate(prompt, task, **kwargs)
+                items = extract_json(content, list)
+                if items is None:
+                    raise MalformedResponse("No JSON array in LLM response", content)
+                yield from checked([item for item in items if isinstance(item, dict)], 0)
+                return
+
+            parser = JSONArrayParser()
+            fragments = self.stream(prompt, task, **kwargs)
+            try:
+                for fragment in fragments:
+                    # Keep reading after the closing bracket so the response is cached
+                    offset = parser.count
+                    yield from checked(parser.feed(fragment), offset)
+            finally:
+                fragments.close()
+            parser.finish()
+        except MalformedResponse:
+            # A complete but unusable response may have been cached
+            self._forget(prompt, task, **kwargs)
+            raise
+
+    def health_check(self, timeout=10):
+        """
+        Check that the Ollama server answers, tripping the circuit breaker if not
+
+        Returns:
+            bool: True if the server listed its models
+        """
+        parts = urlsplit(self.model_for("document_analysis")["endpoint"])
+        try:
+            response = self.session.get(f"{parts.scheme}://{parts.netloc}/api/tags", timeout=timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f"LLM health check failed: {e}")
+            self.breaker.trip()
+            return False
+
+        self.breaker.record_success()
+        return True
+
+    def _record(self, model, latency=None, body=None, error=False, cache_hit=False,
+                rejected=False, retried=False, abandoned=False, first_fragment=None):
+        """Update the per-model call metrics"""
+        with self._metrics_lock:
+            entry = self._metrics.get(model)
+            if entry is None:
+                entry = self._metrics[model] = {
+                    "calls": 0, "cache_hits": 0, "errors": 0, "retries": 0, "rejected": 0,
+                    "abandoned": 0, "latency_total": 0.0, "latency_max": 0.0,
+                    "streams": 0, "first_fragment_total": 0.0,
+                    "prompt_tokens": 0, "completion_tokens": 0, "eval_seconds": 0.0
+                }
+            if cache_hit:
+                entry["cache_hits"] += 1
+            if rejected:
+                entry["rejected"] += 1
+            if retried:
+                entry["retries"] += 1
+            if error:
+                entry["errors"] += 1
+            if abandoned:
+                entry["abandoned"] += 1
+            if first_fragment is not None:
+                entry["streams"] += 1
+                entry["first_fragment_total"] += first_fragment
+            if latency is not None:
+                entry["calls"] += 1
+                entry["latency_total"] += latency
+                entry["latency_max"] = max(entry["latency_max"], latency)
+            if body is not None:
+                entry["prompt_tokens"] += body.get("prompt_eval_count", 0) or 0
+                entry["completion_tokens"] += body.get("eval_count", 0) or 0
+                entry["eval_seconds"] += (body.get("eval_duration", 0) or 0) / 1e9
+
+    def get_metrics(self):
+        """
+        Get per-model call metrics
+
+        Returns:
+            dict: models ({model: calls, cache_hits, errors, retries, rejected,
+                  abandoned, latency_avg/max and first_fragment_avg (time to
+                  the first streamed text) in seconds, token counts and
+                  tokens_per_sec})
+                  and the circuit breaker state
+        """
+        with self._metrics_lock:
+            models = {model: dict(entry) for model, entry in self._metrics.items()}
+
+        for entry in models.values():
+            entry["latency_avg"] = entry["latency_total"] / entry["calls"] if entry["calls"] else 0.0
+            entry["first_fragment_avg"] = (entry["first_fragment_total"] / entry["streams"]
+                                           if entry["streams"] else 0.0)
+            entry["tokens_per_sec"] = (entry["completion_tokens"] / entry["eval_seconds"]
+                                       if entry["eval_seconds"] else 0.0)
+
+        return {"models": models, "circuit": self.breaker.state}
+
+    def log_metrics(self):
+        """Log one summary line per model and return the metrics"""
+        metrics = self.get_metrics()
+        for model, entry in metrics["models"].items():
+            logger.info(f"LLM {model}: {entry['calls']} calls, {entry['cache_hits']} cached, "
+                        f"{entry['errors']} errors, {entry['rejected']} skipped, "
+                        f"{entry['abandoned']} abandoned, "
+                        f"avg {entry['latency_avg']:.2f}s, max {entry['latency_max']:.2f}s, "
+                        f"{entry['prompt_tokens']}+{entry['completion_tokens']} tokens "
+                        f"({entry['tokens_per_sec']:.1f} tokens/sec)")
+        return metrics
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """
+    The process-wide LLM client, created on first use
+
+    Returns:
+        LLMClient: Shared client
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+    return _client
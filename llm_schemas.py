@@ -0,0 +1,160 @@
+"""
+JSON schemas for structured LLM output in the business consulting system.
+Sent as Ollama's "format" parameter, so the model is constrained to the
+schema while decoding, and used to validate what comes back.
+"""
+
+STRING = {"type": "string"}
+STRING_LIST = {"type": "array", "items": STRING}
+SCORE = {"type": "number", "minimum": 0.0, "maximum": 1.0}
+
+def _object(properties, required=None):
+    """Object schema requiring every property unless told otherwise"""
+    return {"type": "object", "properties": properties,
+            "required": list(properties) if required is None else required}
+
+TRIPLET = _object({
+    "subject": STRING,
+    "subject_type": STRING,
+    "predicate": STRING,
+    "object": STRING,
+    "object_type": STRING,
+    "confidence": SCORE
+})
+TRIPLETS = {"type": "array", "items": TRIPLET}
+
+RISK = _object({
+    "financial": SCORE,
+    "operational": SCORE,
+    "market": SCORE,
+    "overall": SCORE,
+    "reasoning": STRING
+})
+
+STRATEGY = _object({
+    "title": STRING,
+    "rationale": STRING,
+    "benefits": STRING_LIST,
+    "implementation_steps": STRING_LIST,
+    "kpis": STRING_LIST,
+    "timeline": {"type": "string", "enum": ["short", "medium", "long"]},
+    "priority": {"type": "string", "enum": ["high", "medium", "low"]}
+})
+STRATEGIES = {"type": "array", "items": STRATEGY}
+
+FINDING = _object({
+    "title": STRING,
+    "explanation": STRING,
+    "business_implications": STRING,
+    "category": {"type": "string", "enum": ["pattern", "trend", "correlation", "anomaly", "network"]}
+})
+FINDINGS = {"type": "array", "items": FINDING}
+
+# Vision outputs: only the fields every image has are required
+CHART_VISION = _object({
+    "document_type": STRING,
+    "title": STRING,
+    "text": STRING,
+    "description": STRING,
+    "time_period": STRING,
+    "metrics": STRING_LIST,
+    "entities": STRING_LIST,
+    "axis_info": _object({
+        "x_axis": _object({"label": STRING, "units": STRING}, []),
+        "y_axis": _object({"label": STRING, "units": STRING}, [])
+    }, []),
+    "data_series": {"type": "array", "items": _object({
+        "name": STRING,
+        "values": {"type": "array", "items": {"type": ["number", "string"]}}
+    }, ["name"])},
+    "key_insights": STRING_LIST,
+    "limitations": STRING_LIST
+}, ["document_type", "text", "description", "key_insights"])
+
+DOCUMENT_VISION = _object({
+    "document_type": STRING,
+    "text": STRING,
+    "description": STRING,
+    "main_topics": STRING_LIST,
+    "entities": _object({
+        "companies": STRING_LIST,
+        "people": STRING_LIST,
+        "products": STRING_LIST,
+        "other": STRING_LIST
+    }, []),
+    "metrics": {"type": "array", "items": _object({
+        "name": STRING,
+        "value": STRING,
+        "unit": STRING
+    }, ["name", "value"])},
+    "tables": {"type": "array", "items": _object({
+        "headers": STRING_LIST,
+        "description": STRING
+    }, [])},
+    "diagrams": {"type": "array", "items": _object({
+        "type": STRING,
+        "components": STRING_LIST,
+        "description": STRING
+    }, [])},
+    "key_insights": STRING_LIST,
+    "limitations": STRING_LIST
+}, ["document_type", "text", "description", "key_insights"])
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+    "null": type(None)
+}
+
+def _is_type(value, name):
+    # bool is an int subclass but not a JSON number
+    if isinstance(value, bool) and name in ("number", "integer"):
+        return False
+    return isinstance(value, _TYPES[name])
+
+def schema_errors(value, schema, path="$"):
+    """
+    Check a value against the subset of JSON Schema used in this module
+
+    Supports type (a name or a list of names), enum, minimum, maximum,
+    properties, required and items.
+
+    Args:
+        value: Parsed JSON value
+        schema (dict): Schema to check against
+        path (str): Location of the value, for error messages
+
+    Returns:
+        list: Error messages, empty if the value is valid
+    """
+    types = schema.get("type")
+    if types is not None:
+        names = types if isinstance(types, list) else [types]
+        if not any(_is_type(value, name) for name in names):
+            return [f"{path}: expected {' or '.join(names)}, got {type(value).__name__}"]
+
+    errors = []
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} is not one of {schema['enum']}")
+    if "minimum" in schema and _is_type(value, "number") and value < schema["minimum"]:
+        errors.append(f"{path}: {value} is below {schema['minimum']}")
+    if "maximum" in schema and _is_type(value, "number") and value > schema["maximum"]:
+        errors.append(f"{path}: {value} is above {schema['maximum']}")
+
+    if isinstance(value, dict):
+        for name in schema.get("required", []):
+            if name not in value:
+                errors.append(f"{path}: missing {name!r}")
+        for name, subschema in schema.get("properties", {}).items():
+            if name in value:
+                errors.extend(schema_errors(value[name], subschema, f"{path}.{name}"))
+
+    if isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(schema_errors(item, schema["items"], f"{path}[{i}]"))
+
+    return errors
@@ -5,20 +5,24 @@ Controls the flow of data processing, analysis, and output generation.
 
 import os
 import json
+import hashlib
 import logging
 import importlib
-import requests
 from datetime import datetime
 import time
 from typing import Dict, Any, List, Optional, Tuple, Set
 import config
-from knowledge_graph.neo4j_manager import Neo4jManager
+from knowledge_graph.graph_store import create_graph_store
+from knowledge_graph.async_neo4j_manager import AsyncNeo4jManager
+from knowledge_graph.schema import report_full_scans
 from knowledge_graph.triplet_extractor import TripletExtractor
+from knowledge_graph.bulk_import import BulkImportWriter, verify_import
 from analysis.risk_engine import RiskAnalyzer
 from analysis.strategy_generator import StrategyGenerator
 from analysis.insight_extractor import InsightExtractor
 from strategy_assessment import StrategyAssessment
 from assessment_pdf_generator import AssessmentPDFGenerator
+from llm_client import get_client
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
@@ -31,16 +35,32 @@ class Orchestrator:
     Manages the flow from document ingestion to recommendations.
     """
     
-    def __init__(self):
-        """Initialize the orchestrator and its components"""
-        # Initialize Neo4j connection
-        self.neo4j_manager = Neo4jManager()
+    def __init__(self, tenant_id=None):
+        """
+        Initialize the orchestrator and its components
+        
+        Args:
+            tenant_id (str, optional): Tenant whose graph all processing and analysis
+                                       runs against (defaults to config.TENANT_ID)
+        """
+        # Initialize the graph store (config.GRAPH_BACKEND), scoped to the tenant
+        self.tenant_id = tenant_id or config.TENANT_ID or None
+        self.neo4j_manager = create_graph_store(tenant_id=self.tenant_id)
         self.neo4j_manager.connect()
-        self.neo4j_manager.verify_indexes()
+        schema_report = self.neo4j_manager.verify_indexes()
+        if not schema_report.get("skipped"):
+            report_full_scans(self.neo4j_manager)
+        
+        # Async manager for fanning out independent analysis queries (connects lazily);
+        # the embedded store answers in-process, so it has none
+        self.async_neo4j_manager = None
+        if self.neo4j_manager.backend == "neo4j":
+            self.async_neo4j_manager = AsyncNeo4jManager(database=self.neo4j_manager.database,
+                                                         stats_manager=self.neo4j_manager)
     
         # Initialize components
         self.triplet_extractor = TripletExtractor()
-        self.risk_analyzer = RiskAnalyzer(self.neo4j_manager)
+        self.risk_analyzer = RiskAnalyzer(self.neo4j_manager, self.async_neo4j_manager)
     
         # Add this line to initialize graph_query
         from knowledge_graph.graph_query import GraphQueryManager
@@ -55,7 +75,8 @@ class Orchestrator:
         # Validate directories exist
         self._ensure_directories()
     
-        logger.info("Orchestrator initialized successfully")
+        logger.info(f"Orchestrator initialized successfully"
+                    f"{' for tenant ' + self.tenant_id if self.tenant_id else ''}")
         
     def _ensure_directories(self):
         """Ensure all required directories exist"""
@@ -130,7 +151,7 @@ class Orchestrator:
                 r.market_position as position, r.years_present as years
             """
         
-            markets = self.neo4j_manager.execute_query(markets_query, {"entity_name": entity_name})
+            markets = self.neo4j_manager.execute_read(markets_query, {"entity_name": entity_name})
         
             if markets:
                 market_context = {
@@ -168,12 +189,14 @@ class Orchestrator:
             ]
         }
     
-    def process_document(self, file_path):
+    def process_document(self, file_path, bulk_writer=None):
         """
         Process a single document through the entire pipeline with improved error handling
     
         Args:
             file_path: Path to the document file
+            bulk_writer: Optional BulkImportWriter; triplets are written to its
+                         CSV file set instead of the live graph and analysis is skipped
         
         Returns:
             dict: Results of the analysis
@@ -186,6 +209,15 @@ class Orchestrator:
             logger.error(f"Unsupported file type: {file_ext}")
             return {"error": f"Unsupported file type: {file_ext}"}
     
+        # Re-ingesting an unchanged document is a no-op
+        source_id = self._document_source_id(file_path)
+        content_hash = self._file_hash(file_path)
+        if bulk_writer is None:
+            existing = self.neo4j_manager.get_document(source_id)
+            if existing and existing.get("content_hash") == content_hash:
+                logger.info(f"Document unchanged since last ingestion, skipping: {file_path}")
+                return {"status": "unchanged", "document": file_path}
+    
         # 2. Load the extractor dynamically
         extractor_path = config.EXTRACTORS[file_ext]
         module_path, function_name = extractor_path.rsplit('.', 1)
@@ -252,7 +284,7 @@ class Orchestrator:
                 base_name = os.path.splitext(os.path.basename(file_path))[0]
                 triplets = [{
                     "subject": base_name,
-                    "subject_type": "Document",
+                    "subject_type": "Report",
                     "predicate": "CONTAINS",
                     "object": "business information",
                     "object_type": "Information",
@@ -261,9 +293,27 @@ class Orchestrator:
                     "confidence": 1.0
                 }]
             
-            # 5. Store in knowledge graph
-            entities_added = self._store_triplets_in_graph(triplets)
-            logger.info(f"Added {entities_added} entities/relationships to knowledge graph")
+            # 5. Store in knowledge graph, or queue for an offline bulk import
+            if bulk_writer is not None:
+                prepared, skipped = self._prepare_triplets(triplets)
+                bulk_writer.add_document(source_id, content_hash, prepared,
+                                         name=os.path.basename(file_path))
+                logger.info(f"Queued {len(prepared)} triplets for bulk import ({skipped} skipped)")
+                return {
+                    "status": "queued",
+                    "document": file_path,
+                    "triplets": len(prepared),
+                    "parsed_data_path": parsed_path
+                }
+            
+            # Write only what changed since the document was last ingested
+            prepared, skipped = self._prepare_triplets(triplets)
+            write_stats = self.neo4j_manager.upsert_document(
+                source_id, content_hash, prepared, name=os.path.basename(file_path))
+            logger.info(f"Stored {len(prepared)} triplets in knowledge graph "
+                        f"({write_stats['added']} relationships added, "
+                        f"{write_stats['removed']} removed, "
+                        f"{write_stats['unchanged']} unchanged, {skipped} skipped)")
         
         except Exception as e:
             logger.error(f"Triplet extraction or storage failed: {e}")
@@ -332,79 +382,106 @@ class Orchestrator:
             "document": file_path,
             "extraction_success": True,
             "kg_construction_success": True,
+            "graph_write_stats": write_stats,
             "primary_entities": primary_entities,
             "analysis_results": analysis_results,
             "parsed_data_path": parsed_path
         }
     
-    def _store_triplets_in_graph(self, triplets):
+    @staticmethod
+    def _document_source_id(file_path):
+        """Stable provenance id for a document: its absolute path"""
+        return os.path.abspath(file_path)
+    
+    @staticmethod
+    def _file_hash(file_path):
+        """SHA-256 of a file's bytes, read in chunks"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def delete_document(self, file_path):
+        """
+        Remove everything a document contributed to the knowledge graph
+        
+        Args:
+            file_path: Path the document was ingested from
+            
+        Returns:
+            dict: Counts of deleted relationships and orphan nodes
+        """
+        return self.neo4j_manager.delete_by_source(self._document_source_id(file_path))
+    
+    def _prepare_triplets(self, triplets):
         """
-        Store extracted triplets in the Neo4j knowledge graph
+        Normalize extracted triplets into graph write rows
         
         Args:
             triplets: List of extracted triplets
             
         Returns:
-            int: Number of entities/relationships added
+            tuple: (rows for add_triplets_batch, number of invalid triplets skipped)
         """
-        entities_added = 0
+        prepared = []
+        skipped = 0
         
         for triplet in triplets:
-            try:
-                # Extract data from triplet
-                subject = triplet.get("subject", "")
-                subject_type = triplet.get("subject_type", "Entity")
-                predicate = triplet.get("predicate", "")
-                obj = triplet.get("object", "")
-                object_type = triplet.get("object_type", "Entity")
-                
-                # Skip invalid triplets
-                if not subject or not predicate or not obj:
-                    continue
-                
-                # Clean up types for Neo4j (capitalize and remove special chars)
-                subject_type = ''.join(c for c in subject_type.title() if c.isalnum())
-                object_type = ''.join(c for c in object_type.title() if c.isalnum())
-                predicate = ''.join(c for c in predicate.upper() if c.isalnum() or c == '_')
-                
-                # If types are empty, set to Entity
-                if not subject_type:
-                    subject_type = "Entity"
-                if not object_type:
-                    object_type = "Entity"
-                
-                # Prepare properties
-                subject_props = {"name": subject}
-                object_props = {"name": obj}
-                
-                # Add source and context if available
-                rel_props = {}
-                if "context" in triplet:
-                    rel_props["context"] = triplet["context"]
-                if "source" in triplet:
-                    rel_props["source"] = triplet["source"]
-                if "confidence" in triplet:
-                    rel_props["confidence"] = triplet["confidence"]
-                
-                # Add timestamp
-                rel_props["timestamp"] = datetime.now().isoformat()
-                
-                # Add to Neo4j
-                result = self.neo4j_manager.add_triplet(
-                    subject_type, subject_props, 
-                    predicate, 
-                    object_type, object_props,
-                    rel_props
-                )
-                
-                if result:
-                    entities_added += 1
-                    
-            except Exception as e:
-                logger.warning(f"Failed to add triplet to graph: {e}")
+            # Extract data from triplet
+            subject = triplet.get("subject", "")
+            subject_type = triplet.get("subject_type", "Entity")
+            predicate = triplet.get("predicate", "")
+            obj = triplet.get("object", "")
+            object_type = triplet.get("object_type", "Entity")
+            
+            # Skip invalid triplets
+            if not subject or not predicate or not obj:
+                skipped += 1
                 continue
-                
-        return entities_added
+            
+            # Clean up types for Neo4j (capitalize and remove special chars)
+            subject_type = ''.join(c for c in str(subject_type).title() if c.isalnum())
+            object_type = ''.join(c for c in str(object_type).title() if c.isalnum())
+            predicate = ''.join(c for c in str(predicate).upper() if c.isalnum() or c == '_')
+            
+            # If types are empty, set to Entity
+            if not subject_type:
+                subject_type = "Entity"
+            if not object_type:
+                object_type = "Entity"
+            
+            # :Document is reserved for provenance nodes (see upsert_document)
+            if subject_type == "Document":
+                subject_type = "Report"
+            if object_type == "Document":
+                object_type = "Report"
+            if not predicate:
+                skipped += 1
+                continue
+            
+            # Add source and context if available
+            rel_props = {}
+            if "context" in triplet:
+                rel_props["context"] = triplet["context"]
+            if "source" in triplet:
+                rel_props["source"] = triplet["source"]
+            if "confidence" in triplet:
+                rel_props["confidence"] = triplet["confidence"]
+            
+            # Add timestamp
+            rel_props["timestamp"] = datetime.now().isoformat()
+            
+            prepared.append({
+                "subject_type": subject_type,
+                "subject_props": {"name": subject},
+                "predicate": predicate,
+                "object_type": object_type,
+                "object_props": {"name": obj},
+                "rel_props": rel_props
+            })
+        
+        return prepared, skipped
     
     def _identify_primary_entities(self, triplets):
         """
@@ -435,12 +512,16 @@ class Orchestrator:
         # Limit to top 5 entities to avoid excessive processing
         return primary_entities[:5]
     
-    def process_directory(self, directory_path):
+    def process_directory(self, directory_path, bulk_import=False, bulk_output_dir=None):
         """
         Process all supported documents in a directory
         
         Args:
             directory_path: Path to directory containing documents
+            bulk_import: Write triplets as a neo4j-admin CSV file set instead of
+                         loading them transactionally (for large initial loads)
+            bulk_output_dir: Output directory for the file set, inside neo4j/import
+                             (defaults to config.BULK_IMPORT_DIR)
             
         Returns:
             dict: Summary of processing results
@@ -448,7 +529,12 @@ class Orchestrator:
         if not os.path.isdir(directory_path):
             return {"error": f"Directory not found: {directory_path}"}
             
+        if bulk_import and self.neo4j_manager.backend != "neo4j":
+            return {"error": "Bulk import writes a neo4j-admin file set and needs GRAPH_BACKEND=neo4j"}
+            
         results = {"processed": [], "errors": []}
+        bulk_writer = (BulkImportWriter(bulk_output_dir, database=self.neo4j_manager.database)
+                       if bulk_import else None)
         
         for filename in os.listdir(directory_path):
             file_path = os.path.join(directory_path, filename)
@@ -456,14 +542,32 @@ class Orchestrator:
             if os.path.isfile(file_path):
                 file_ext = os.path.splitext(file_path)[1].lower()[1:]
                 if file_ext in config.EXTRACTORS:
-                    result = self.process_document(file_path)
+                    result = self.process_document(file_path, bulk_writer=bulk_writer)
                     if "error" in result:
                         results["errors"].append({file_path: result["error"]})
                     else:
                         results["processed"].append(file_path)
         
+        if bulk_writer is not None:
+            results["bulk_import"] = bulk_writer.finish()
+        
         return results
     
+    def verify_bulk_import(self, manifest):
+        """
+        Check the graph against the counts recorded for a bulk import and
+        backfill degree properties, which the import files do not carry
+        
+        Args:
+            manifest: Manifest dict from process_directory(bulk_import=True) or its path
+            
+        Returns:
+            dict: Verification report with the number of nodes whose degrees were refreshed
+        """
+        report = verify_import(self.neo4j_manager, manifest)
+        report["degrees_refreshed"] = self.neo4j_manager.refresh_degrees()
+        return report
+    
     def _generate_charts_for_report(self, assessment_results, strategies_data):
         """
         Generate chart data for the PDF report.
@@ -582,7 +686,7 @@ class Orchestrator:
         RETURN a.risk_score as risk_score
         """
     
-        result = self.neo4j_manager.execute_query(
+        result = self.neo4j_manager.execute_read(
             query, {"entity_name": entity_name, "group_name": group_id}
         )
     
@@ -633,7 +737,7 @@ class Orchestrator:
             RETURN k.type as type, k.content as content, k.source as source
             """
         
-            knowledge_data = self.neo4j_manager.execute_query(query, {"entity_name": entity_name})
+            knowledge_data = self.neo4j_manager.execute_read(query, {"entity_name": entity_name})
         
             if not knowledge_data:
                 # If no specific knowledge is found, return generic strategy frameworks
@@ -717,27 +821,22 @@ class Orchestrator:
             dict: Visualization data
         """
         try:
-            # Get graph data
-            graph_data = self.neo4j_manager.execute_query(
-                """
-                MATCH path = (e:Entity {name: $name})-[*1..$depth]-(related)
-                UNWIND relationships(path) AS rel
-                WITH DISTINCT startNode(rel) AS source, endNode(rel) AS target, type(rel) AS type
-                RETURN source.name AS source, target.name AS target, type
-                """,
-                {"name": entity_name, "depth": depth}
-            )
+            # Expand breadth first and keep one link per (source, target, type)
+            subgraph = self.neo4j_manager.expand_subgraph(entity_name, depth)
+            names = {node["id"]: node["properties"].get("name") for node in subgraph["nodes"]}
             
             # Process into visualization format
             nodes = set()
             links = []
+            seen_links = set()
             
-            for rel in graph_data:
-                source = rel.get("source")
-                target = rel.get("target")
-                rel_type = rel.get("type")
+            for edge in subgraph["edges"]:
+                source = names[edge["source"]]
+                target = names[edge["target"]]
+                rel_type = edge["type"]
                 
-                if source and target:
+                if source and target and (source, target, rel_type) not in seen_links:
+                    seen_links.add((source, target, rel_type))
                     nodes.add(source)
                     nodes.add(target)
                     links.append({
@@ -772,29 +871,16 @@ class Orchestrator:
             return {"error": str(e)}
     
     def _test_llm_connection(self):
-        """Test connection to the LLM endpoint."""
-        try:
-            model_config = config.MODELS['reasoning']
-            response = requests.post(
-                model_config['endpoint'],
-                json={
-                    "model": model_config['name'],
-                    "prompt": "Test connection",
-                    "stream": False,
-                    **model_config['parameters']
-                },
-                timeout=10  # Short timeout for test
-            )
+        """
+        Test connection to the LLM server.
         
-            if response.status_code == 200:
-                logger.info("Successfully connected to LLM endpoint")
-                return True
-            else:
-                logger.warning(f"LLM connection test failed with status code: {response.status_code}")
-                return False
-        except Exception as e:
-            logger.warning(f"LLM connection test failed: {e}")
-            return False
+        A failed test opens the LLM client's circuit breaker, so the run
+        goes straight to rule-based fallbacks instead of waiting on timeouts.
+        """
+        if get_client().health_check(timeout=10):  # Short timeout for test
+            logger.info("Successfully connected to LLM endpoint")
+            return True
+        return False
     
     def run_qmirac_assessment(self, entity_name: str, user_inputs: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -931,6 +1017,10 @@ class Orchestrator:
     
         # Add timing metrics
         start_time = time.time()
+        self.neo4j_manager.reset_query_stats()
+        is_neo4j = self.neo4j_manager.backend == "neo4j"
+        if is_neo4j:
+            self.neo4j_manager.profiler.reset()
     
         # Perform the assessment
         assessment_results = self.strategy_assessment.assess(entity_name, user_inputs)
@@ -965,12 +1055,32 @@ class Orchestrator:
         # Calculate processing time
         end_time = time.time()
         logger.info(f"Qmirac assessment completed in {end_time - start_time:.2f} seconds")
+        
+        pool_metrics = self.neo4j_manager.get_pool_metrics() if is_neo4j else {}
+        if pool_metrics:
+            logger.info(f"Neo4j pool: {pool_metrics['sessions_opened']} sessions, "
+                        f"{pool_metrics['acquisitions']} acquisitions, "
+                        f"avg wait {pool_metrics['acquisition_wait_avg'] * 1000:.1f} ms, "
+                        f"max wait {pool_metrics['acquisition_wait_max'] * 1000:.1f} ms")
+        
+        query_stats = self.neo4j_manager.get_query_stats()
+        logger.info(f"Neo4j queries: {query_stats['total_queries']} sent, "
+                    f"{query_stats['distinct_queries']} distinct query texts")
+        
+        # Per-query timing report (empty unless NEO4J_PROFILING_ENABLED is set)
+        query_profile = self.neo4j_manager.profiler.log_report() if is_neo4j else {}
+        
+        llm_metrics = get_client().log_metrics()
     
         return {
             "assessment_results": assessment_results,
             "charts": charts,
             "pdf_paths": pdf_paths,
-            "processing_time": end_time - start_time
+            "processing_time": end_time - start_time,
+            "neo4j_pool_metrics": pool_metrics,
+            "neo4j_query_stats": query_stats,
+            "neo4j_query_profile": query_profile,
+            "llm_metrics": llm_metrics
         }
     
     def _get_knowledge_base_data(self, entity_name: str) -> Dict:
@@ -984,6 +1094,8 @@ class Orchestrator:
 
     def cleanup(self):
         """Close connections and clean up resources"""
+        if self.async_neo4j_manager is not None:
+            self.async_neo4j_manager.shutdown()
         self.neo4j_manager.close()
         logger.info("Orchestrator cleanup completed")
 
@@ -999,14 +1111,26 @@ if __name__ == "__main__":
     parser.add_argument("--analyze", "-a", help="Entity name to analyze", default=None)
     parser.add_argument("--visualize", "-v", help="Entity name to visualize", default=None)
     parser.add_argument("--depth", "-d", type=int, help="Relationship depth for visualization", default=2)
+    parser.add_argument("--delete", action="store_true",
+                        help="Remove everything the document at path contributed to the graph")
+    parser.add_argument("--tenant", "-t", help="Tenant whose graph to use", default=None)
+    parser.add_argument("--no-llm-cache", action="store_true",
+                        help="Always call the LLM instead of reusing cached responses")
     
     args = parser.parse_args()
     
-    orchestrator = Orchestrator()
+    if args.no_llm_cache:
+        config.LLM_CACHE_ENABLED = False
+    
+    orchestrator = Orchestrator(tenant_id=args.tenant)
     
     try:
         # Process documents if path is provided
-        if args.path:
+        if args.delete:
+            result = orchestrator.delete_document(args.path)
+            print(f"Deleted {result['relationships_deleted']} relationships and "
+                  f"{result['orphans_deleted']} orphan nodes from {args.path}")
+        elif args.path:
             if os.path.isfile(args.path):
                 print(f"Processing file: {args.path}")
                 result = orchestrator.process_document(args.path)
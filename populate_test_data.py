@@ -11,12 +11,12 @@ from knowledge_graph.neo4j_manager import Neo4jManager
 
 # Add to populate_test_data.py
 
-def populate_test_data():
+def populate_test_data(tenant_id=None):
     """Generate test data for the 30 assessment groups in the Qmirac Engine Guidelines."""
     # This would simulate the data that would normally come from the 30 PDF sections
     
     # Initialize Neo4j manager
-    neo4j = Neo4jManager()
+    neo4j = Neo4jManager(tenant_id=tenant_id)
     neo4j.connect()
     
     try:
@@ -947,6 +947,10 @@ def populate_test_data():
             {"entity": sales_marketing_metrics_data["entity"], "properties": sales_marketing_metrics_data}
         )
         
+        # The statements above write relationships directly, so recount
+        # the stored degree properties in one pass
+        neo4j.refresh_degrees()
+        
         print("Qmirac test data generated successfully")
         return True
     
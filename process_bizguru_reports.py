@@ -12,6 +12,7 @@ from typing import Dict, Any, List, Optional
 
 from bizguru_extractor import BizGuruExtractor
 from knowledge_graph.neo4j_manager import Neo4jManager
+from knowledge_graph.query_registry import degree_increment, degree_key, quote_identifier
 import populate_test_data
 
 # Set up logging
@@ -89,6 +90,10 @@ def process_bizguru_report(pdf_path: str, neo4j_manager: Neo4jManager) -> Dict[s
             "timestamp": datetime.now().isoformat()
         }
 
+def _degree_update(rel_type: str, *variables: str) -> str:
+    """SET items maintaining the degree properties of a new relationship's endpoints"""
+    return degree_increment(*variables).format(degree_key=quote_identifier(degree_key(rel_type)))
+
 def store_report_data(neo4j_manager: Neo4jManager, entity_name: str, report_data: Dict[str, Any]) -> None:
     """
     Store extracted report data in Neo4j with improved robustness.
@@ -102,7 +107,7 @@ def store_report_data(neo4j_manager: Neo4jManager, entity_name: str, report_data
         # Create entity if it doesn't exist
         create_entity_query = """
         MERGE (e:Entity {name: $entity_name})
-        ON CREATE SET e.created_at = datetime()
+        ON CREATE SET e.created_at = datetime(), e.degree = 0
         RETURN e
         """
         
@@ -116,6 +121,7 @@ def store_report_data(neo4j_manager: Neo4jManager, entity_name: str, report_data
                 assessment_query = """
                 MATCH (e:Entity {name: $entity_name})
                 MERGE (e)-[:HAS_ASSESSMENT]->(a:Assessment {name: $group_name})
+                ON CREATE SET """ + _degree_update("HAS_ASSESSMENT", "e", "a") + """
                 SET a.score = $score,
                     a.risk_level = $risk_level,
                     a.updated_at = datetime()
@@ -137,7 +143,8 @@ def store_report_data(neo4j_manager: Neo4jManager, entity_name: str, report_data
                     try:
                         finding_query = """
                         MATCH (e:Entity {name: $entity_name})-[:HAS_ASSESSMENT]->(a:Assessment {name: $group_name})
-                        MERGE (a)-[:HAS_FINDING]->(:Finding {description: $description})
+                        MERGE (a)-[:HAS_FINDING]->(f:Finding {description: $description})
+                        ON CREATE SET """ + _degree_update("HAS_FINDING", "a", "f") + """
                         """
                         
                         neo4j_manager.execute_query(finding_query, {
@@ -170,6 +177,7 @@ def store_report_data(neo4j_manager: Neo4jManager, entity_name: str, report_data
                             risk_query = """
                             MATCH (e:Entity {name: $entity_name})
                             MERGE (e)-[:HAS_RISK]->(r:Risk {type: $risk_type})
+                            ON CREATE SET """ + _degree_update("HAS_RISK", "e", "r") + """
                             SET r.description = $description,
                                 r.level = $level
                             """
@@ -191,6 +199,7 @@ def store_report_data(neo4j_manager: Neo4jManager, entity_name: str, report_data
                             MATCH (e:Entity {name: $entity_name})
                             MERGE (m:Market {name: $segment_name})
                             MERGE (e)-[r:OPERATES_IN]->(m)
+                            ON CREATE SET """ + _degree_update("OPERATES_IN", "e", "m") + """
                             SET r.attractiveness = $attractiveness,
                                 r.updated_at = datetime()
                             """
@@ -210,6 +219,7 @@ def store_report_data(neo4j_manager: Neo4jManager, entity_name: str, report_data
                             metric_query = """
                             MATCH (e:Entity {name: $entity_name})
                             MERGE (e)-[:HAS_METRIC]->(m:Metric {name: $metric_name})
+                            ON CREATE SET """ + _degree_update("HAS_METRIC", "e", "m") + """
                             SET m.value = $value,
                                 m.raw_value = $raw_value,
                                 m.timestamp = datetime()
@@ -232,14 +242,14 @@ def store_report_data(neo4j_manager: Neo4jManager, entity_name: str, report_data
     except Exception as e:
         logger.error(f"Error storing report data for {entity_name}: {e}")
 
-def main():
+def main(tenant_id: Optional[str] = None):
     """Main entry point for BizGuru report processing"""
     print("\n" + "="*80)
     print(" BizGuru Report Processor ".center(80, "="))
     print("="*80 + "\n")
     
     # Initialize Neo4j connection
-    neo4j_manager = Neo4jManager()
+    neo4j_manager = Neo4jManager(tenant_id=tenant_id)
     connected = neo4j_manager.connect()
     
     if not connected:
@@ -276,7 +286,7 @@ def main():
             print("No BizGuru reports found. Falling back to test data...")
             
             # Fall back to populate_test_data.py
-            success = populate_test_data.populate_test_data()
+            success = populate_test_data.populate_test_data(tenant_id=tenant_id)
             
             if success:
                 print("Test data populated successfully.")
@@ -9,6 +9,7 @@ import time
 import argparse
 import logging
 from datetime import datetime
+import config
 from orchestrator import Orchestrator
 
 # Set up logging
@@ -36,12 +37,13 @@ def list_entities(orchestrator):
     try:
         query = """
         MATCH (e:Entity)
-        RETURN e.name AS name, COUNT { (e)--() } AS connections
-        ORDER BY connections DESC
+        WHERE e.degree IS NOT NULL
+        RETURN e.name AS name, e.degree AS connections
+        ORDER BY e.degree DESC
         LIMIT 20
         """
         
-        entities = orchestrator.neo4j_manager.execute_query(query)
+        entities = orchestrator.neo4j_manager.execute_read(query)
         return entities
     except Exception as e:
         logger.error(f"Error listing entities: {e}")
@@ -104,12 +106,12 @@ def run_qmirac_assessment(orchestrator, entity_name, user_inputs):
         print(f"Error: {result.get('error', 'Unknown error occurred')}")
         return result
 
-def simplified_interactive_mode():
+def simplified_interactive_mode(tenant_id=None):
     """Run a simplified interactive mode focused on Qmirac assessment"""
     print_banner()
     
     print("Initializing system components...")
-    orchestrator = Orchestrator()
+    orchestrator = Orchestrator(tenant_id=tenant_id)
     
     try:
         while True:
@@ -207,9 +209,20 @@ def main():
     parser.add_argument("--populate-test", action="store_true", help="Populate with Qmirac test data")
     parser.add_argument("--process-reports", action="store_true", 
                   help="Process BizGuru reports if available, otherwise use test data")
+    parser.add_argument("--bulk-import", metavar="DIRECTORY", default=None,
+                        help="Extract documents in DIRECTORY into a neo4j-admin CSV file set")
+    parser.add_argument("--verify-import", metavar="MANIFEST", default=None,
+                        help="Verify graph counts against a bulk import manifest")
+    parser.add_argument("--tenant", "-t", default=None,
+                        help="Tenant whose graph to use, e.g. acme-co (defaults to TENANT_ID)")
+    parser.add_argument("--no-llm-cache", action="store_true",
+                        help="Always call the LLM instead of reusing cached responses")
     
     args = parser.parse_args()
     
+    if args.no_llm_cache:
+        config.LLM_CACHE_ENABLED = False
+    
     # If no arguments provided, default to interactive mode
     if len(sys.argv) == 1:
         args.interactive = True
@@ -218,7 +231,7 @@ def main():
     if args.populate_test:
         print("Populating system with Qmirac test data...")
         import populate_test_data
-        success = populate_test_data.populate_test_data()
+        success = populate_test_data.populate_test_data(tenant_id=args.tenant)
         if success:
             print("Test data populated successfully.")
         else:
@@ -227,18 +240,18 @@ def main():
     
     # Normal system operation
     if args.interactive:
-        simplified_interactive_mode()
+        simplified_interactive_mode(tenant_id=args.tenant)
         return 0
     
     if args.process_reports:
         import process_bizguru_reports
-        result = process_bizguru_reports.main()
+        result = process_bizguru_reports.main(tenant_id=args.tenant)
         return result
 
     # Non-interactive mode
     print_banner()
     
-    orchestrator = Orchestrator()
+    orchestrator = Orchestrator(tenant_id=args.tenant)
     
     try:
         if args.list_entities:
@@ -254,6 +267,28 @@ def main():
             else:
                 print("\nNo companies found in knowledge graph.")
         
+        if args.bulk_import:
+            result = orchestrator.process_directory(args.bulk_import, bulk_import=True)
+            if "error" in result:
+                print(f"\nBulk import failed: {result['error']}")
+            else:
+                manifest = result["bulk_import"]
+                print(f"\nExtracted {len(result['processed'])} documents "
+                      f"({len(result['errors'])} errors): {manifest['nodes']} nodes, "
+                      f"{manifest['relationships']} relationships")
+                print(f"Stop Neo4j and run {manifest['script_path']} to import, then verify with:")
+                print(f"  python run_system.py --verify-import {manifest['manifest_path']}")
+        
+        if args.verify_import:
+            report = orchestrator.verify_bulk_import(args.verify_import)
+            if report["ok"]:
+                print(f"\nImport verified: {report['nodes']} nodes, {report['relationships']} relationships "
+                      f"(degrees refreshed on {report['degrees_refreshed']} nodes)")
+            else:
+                print("\nImport count mismatches:")
+                for mismatch in report["mismatches"]:
+                    print(f"  {mismatch}")
+        
         if args.analyze:
             entity_name = args.analyze
             
@@ -455,10 +455,11 @@ class StrategyAssessment:
         priorities = user_inputs.get("priorities", [])
         constraints = user_inputs.get("constraints", [])
         
-        # Perform assessment for each group
-        for group_id, group_data in self.assessment_groups.items():
-            group_result = self._assess_group(entity_name, group_id, group_data, user_inputs)
-            assessment_results["groups"][group_id] = group_result
+        # Perform assessment for each group, reusing one session for all group queries
+        with self.neo4j_manager.unit_of_work(read_only=True):
+            for group_id, group_data in self.assessment_groups.items():
+                group_result = self._assess_group(entity_name, group_id, group_data, user_inputs)
+                assessment_results["groups"][group_id] = group_result
         
         # Generate overall assessment summary
         assessment_results["summary"] = self._generate_assessment_summary(entity_name, assessment_results["groups"], user_inputs)
@@ -525,7 +526,7 @@ class StrategyAssessment:
                 r.mitigation_status as mitigation_status
             RETURN risk_type, risk_level, description, impact_area, probability, mitigation_status
             """
-            detailed_risks = self.neo4j_manager.execute_query(
+            detailed_risks = self.neo4j_manager.execute_read(
                 detailed_risks_query, {"entity_name": entity_name}
             )
     
@@ -576,7 +577,7 @@ class StrategyAssessment:
         LIMIT 20
         """
         
-        results = self.neo4j_manager.execute_query(query, {
+        results = self.neo4j_manager.execute_read(query, {
             "entity_name": entity_name,
             "keywords": keywords
         })
@@ -674,7 +675,7 @@ class StrategyAssessment:
         RETURN m.name as name, m.value as value, m.unit as unit, m.timestamp as timestamp
         """
         
-        results = self.neo4j_manager.execute_query(query, {
+        results = self.neo4j_manager.execute_read(query, {
             "entity_name": entity_name,
             "metrics": metrics
         })